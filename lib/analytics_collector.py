@@ -1,18 +1,26 @@
-"""YouTube Analytics collection utilities."""
+"""YouTube Analytics collection utilities.
+
+Batch collection builds the OAuth credentials and API client once, asks for up
+to ``ANALYTICS_BATCH_SIZE`` videos per report query (``dimensions=video`` with
+a comma-separated ``video==a,b,...`` filter, paged with ``startIndex``) and
+runs the queries on a small thread pool behind a request-rate limiter that
+backs off on quota errors. Snapshots are written with one bulk insert per
+chunk, so a catalogue refresh costs API pages rather than API calls per video.
+"""
 
 from __future__ import annotations
 
 import json
 import os
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 from pathlib import Path
-from typing import Any, Dict, Iterable, Optional
-
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from dotenv import load_dotenv
+from typing import Any, Dict, Iterable, List, Optional
 
+from .env_utils import load_project_env
 from .run_logger import build_metrics, emit_run_log
 from .supabase_client import supabase
 
@@ -21,17 +29,26 @@ ANALYTICS_SCOPES = [
     "https://www.googleapis.com/auth/yt-analytics.readonly",
     "https://www.googleapis.com/auth/youtube.readonly",
 ]
+METRIC_NAMES = "views,estimatedMinutesWatched,averageViewDuration,impressionsCtr"
+PAGE_SIZE = 200
+INSERT_CHUNK = 500
+
+
+def default_batch_size() -> int:
+    return int(os.getenv("ANALYTICS_BATCH_SIZE", "200"))
+
 
+def build_analytics_credentials() -> Any:
+    from google.oauth2.credentials import Credentials
 
-def build_analytics_client() -> Any:
-    load_dotenv()
+    load_project_env()
     client_id = os.getenv("GOOGLE_CLIENT_ID")
     client_secret = os.getenv("GOOGLE_CLIENT_SECRET")
     refresh_token = os.getenv("GOOGLE_REFRESH_TOKEN")
     if not client_id or not client_secret or not refresh_token:
         raise ValueError("Missing Google OAuth environment variables.")
 
-    credentials = Credentials(
+    return Credentials(
         token=None,
         refresh_token=refresh_token,
         token_uri="https://oauth2.googleapis.com/token",
@@ -39,7 +56,32 @@ def build_analytics_client() -> Any:
         client_secret=client_secret,
         scopes=ANALYTICS_SCOPES,
     )
-    return build("youtubeAnalytics", "v2", credentials=credentials)
+
+
+def build_analytics_client(credentials: Any = None) -> Any:
+    from googleapiclient.discovery import build
+
+    return build("youtubeAnalytics", "v2", credentials=credentials or build_analytics_credentials())
+
+
+def _empty_metrics(video_id: str) -> Dict[str, Any]:
+    return {
+        "video_id": video_id,
+        "views": 0,
+        "estimated_minutes_watched": 0,
+        "average_view_duration": 0,
+        "impressions_ctr": None,
+    }
+
+
+def _row_metrics(row: List[Any]) -> Dict[str, Any]:
+    return {
+        "video_id": row[0],
+        "views": row[1],
+        "estimated_minutes_watched": row[2],
+        "average_view_duration": row[3],
+        "impressions_ctr": row[4] if len(row) > 4 else None,
+    }
 
 
 def fetch_video_metrics(
@@ -47,15 +89,16 @@ def fetch_video_metrics(
     video_id: str,
     start_date: str,
     end_date: str,
+    client: Any = None,
 ) -> Dict[str, Any]:
-    client = build_analytics_client()
+    client = client or build_analytics_client()
     response = (
         client.reports()
         .query(
             ids="channel==MINE",
             startDate=start_date,
             endDate=end_date,
-            metrics="views,estimatedMinutesWatched,averageViewDuration,impressionsCtr",
+            metrics=METRIC_NAMES,
             dimensions="video",
             filters=f"video=={video_id}",
         )
@@ -64,21 +107,139 @@ def fetch_video_metrics(
 
     rows = response.get("rows", [])
     if not rows:
-        return {
-            "video_id": video_id,
-            "views": 0,
-            "estimated_minutes_watched": 0,
-            "average_view_duration": 0,
-            "impressions_ctr": None,
-        }
-
-    row = rows[0]
+        return _empty_metrics(video_id)
+    return _row_metrics(rows[0])
+
+
+def _is_quota_error(exc: Exception) -> bool:
+    status = getattr(getattr(exc, "resp", None), "status", None)
+    message = str(exc)
+    return status == 429 or "quotaExceeded" in message or "rateLimitExceeded" in message or "userRateLimitExceeded" in message
+
+
+class QuotaLimiter:
+    """Spaces requests to ``rate_per_s`` and slows down further after a quota error."""
+
+    def __init__(self, rate_per_s: float = 5.0, sleep: Any = time.sleep, clock: Any = time.monotonic) -> None:
+        self.interval_s = 1.0 / rate_per_s if rate_per_s > 0 else 0.0
+        self._sleep = sleep
+        self._clock = clock
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = self._clock()
+            wait_s = max(0.0, self._next_at - now)
+            self._next_at = max(now, self._next_at) + self.interval_s
+        if wait_s:
+            self._sleep(wait_s)
+
+    def penalize(self, delay_s: float) -> None:
+        with self._lock:
+            self._next_at = max(self._next_at, self._clock() + delay_s)
+
+
+class AnalyticsBatchCollector:
+    """Fetch video metrics for many videos with batched, paged, rate-limited report queries."""
+
+    def __init__(
+        self,
+        client: Any = None,
+        *,
+        credentials: Any = None,
+        batch_size: Optional[int] = None,
+        page_size: int = PAGE_SIZE,
+        max_workers: int = 4,
+        limiter: Optional[QuotaLimiter] = None,
+        max_retries: int = 5,
+    ) -> None:
+        if client is None:
+            credentials = credentials or build_analytics_credentials()
+            client = build_analytics_client(credentials)
+        self.client = client
+        self.credentials = credentials
+        self.batch_size = max(1, min(batch_size or default_batch_size(), 500))
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.limiter = limiter or QuotaLimiter(float(os.getenv("ANALYTICS_QPS", "5")))
+        self.max_retries = max_retries
+        self.requests_made = 0
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+
+    def _http(self) -> Any:
+        # httplib2 connections are not thread-safe; each worker gets its own authorized transport.
+        http = getattr(self._local, "http", None)
+        if http is None:
+            import google_auth_httplib2
+            import httplib2
+
+            http = self._local.http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http())
+        return http
+
+    def _execute(self, request: Any) -> Dict[str, Any]:
+        attempt = 0
+        while True:
+            attempt += 1
+            self.limiter.acquire()
+            with self._counter_lock:
+                self.requests_made += 1
+            try:
+                if self.credentials is not None:
+                    return request.execute(http=self._http())
+                return request.execute()
+            except Exception as exc:
+                if not _is_quota_error(exc) or attempt >= self.max_retries:
+                    raise
+                self.limiter.penalize(2 ** attempt)
+
+    def _fetch_chunk(self, video_ids: List[str], start_date: str, end_date: str) -> Dict[str, Dict[str, Any]]:
+        found: Dict[str, Dict[str, Any]] = {}
+        start_index = 1
+        while True:
+            request = self.client.reports().query(
+                ids="channel==MINE",
+                startDate=start_date,
+                endDate=end_date,
+                metrics=METRIC_NAMES,
+                dimensions="video",
+                filters="video==" + ",".join(video_ids),
+                sort="-views",
+                maxResults=self.page_size,
+                startIndex=start_index,
+            )
+            rows = self._execute(request).get("rows", []) or []
+            for row in rows:
+                found[row[0]] = _row_metrics(row)
+            if len(rows) < self.page_size:
+                return found
+            start_index += self.page_size
+
+    def fetch(self, video_ids: Iterable[str], start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """Return metrics for every requested video (zeros for videos with no rows), in input order."""
+        ordered = list(dict.fromkeys(video_id for video_id in video_ids if video_id))
+        chunks = [ordered[index : index + self.batch_size] for index in range(0, len(ordered), self.batch_size)]
+        found: Dict[str, Dict[str, Any]] = {}
+        if len(chunks) <= 1 or self.max_workers <= 1:
+            for chunk in chunks:
+                found.update(self._fetch_chunk(chunk, start_date, end_date))
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks)), thread_name_prefix="analytics") as pool:
+                for result in pool.map(lambda chunk: self._fetch_chunk(chunk, start_date, end_date), chunks):
+                    found.update(result)
+        return [found.get(video_id) or _empty_metrics(video_id) for video_id in ordered]
+
+
+def _snapshot_payload(video_id: str, start_date: str, end_date: str, metrics: Dict[str, Any]) -> Dict[str, Any]:
     return {
-        "video_id": row[0],
-        "views": row[1],
-        "estimated_minutes_watched": row[2],
-        "average_view_duration": row[3],
-        "impressions_ctr": row[4] if len(row) > 4 else None,
+        "video_id": video_id,
+        "experiment_type": "analytics_snapshot",
+        "start_date": start_date,
+        "end_date": end_date,
+        "ctr": metrics.get("impressions_ctr"),
+        "avd": metrics.get("average_view_duration"),
+        "notes": None,
     }
 
 
@@ -90,43 +251,43 @@ def store_metrics_snapshot(
     metrics: Dict[str, Any],
     notes: Optional[str] = None,
 ) -> Dict[str, Any]:
-    payload = {
-        "video_id": video_id,
-        "experiment_type": "analytics_snapshot",
-        "start_date": start_date,
-        "end_date": end_date,
-        "ctr": metrics.get("impressions_ctr"),
-        "avd": metrics.get("average_view_duration"),
-        "notes": notes,
-    }
+    payload = {**_snapshot_payload(video_id, start_date, end_date, metrics), "notes": notes}
     supabase.table("metadata_experiments").insert(payload).execute()
     return payload
 
 
+def store_metrics_snapshots(snapshots: List[Dict[str, Any]], chunk_size: int = INSERT_CHUNK) -> int:
+    """Bulk-insert snapshot rows; returns the number of insert requests issued."""
+    requests = 0
+    for index in range(0, len(snapshots), chunk_size):
+        supabase.table("metadata_experiments").insert(snapshots[index : index + chunk_size]).execute()
+        requests += 1
+    return requests
+
+
 def collect_metrics_for_videos(
     *,
     video_ids: Iterable[str],
     start_date: str,
     end_date: str,
+    collector: Optional[AnalyticsBatchCollector] = None,
 ) -> Dict[str, Any]:
-    results = []
-    for video_id in video_ids:
-        metrics = fetch_video_metrics(
-            video_id=video_id,
-            start_date=start_date,
-            end_date=end_date,
-        )
-        snapshot = store_metrics_snapshot(
-            video_id=video_id,
-            start_date=start_date,
-            end_date=end_date,
-            metrics=metrics,
-        )
-        results.append({"metrics": metrics, "snapshot": snapshot})
-    return {"start_date": start_date, "end_date": end_date, "results": results}
+    collector = collector or AnalyticsBatchCollector()
+    metrics_list = collector.fetch(video_ids, start_date, end_date)
+    snapshots = [_snapshot_payload(metrics["video_id"], start_date, end_date, metrics) for metrics in metrics_list]
+    insert_requests = store_metrics_snapshots(snapshots)
+    results = [{"metrics": metrics, "snapshot": snapshot} for metrics, snapshot in zip(metrics_list, snapshots)]
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "api_requests": collector.requests_made,
+        "insert_requests": insert_requests,
+        "results": results,
+    }
 
 
 def main() -> int:
+    load_project_env()
     if len(sys.argv) < 2:
         print(
             "Usage: python -m lib.analytics_collector <video_id> [start_date] [end_date]",
@@ -150,7 +311,7 @@ def main() -> int:
             )
             output_path = Path(__file__).resolve().parent.parent / "data" / f"analytics_{end_date}.json"
             output_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-            output_refs = {"metrics_batch": str(output_path)}
+            output_refs = {"metrics_batch": str(output_path), "api_requests": payload["api_requests"]}
         else:
             metrics = fetch_video_metrics(
                 video_id=video_id,
@@ -0,0 +1,244 @@
+"""Incremental YouTube Analytics sync with per-video watermarks.
+
+``analytics_sync_state`` stores the last day synced for each video. A sync
+fetches only the days after each video's watermark (new videos start
+``ANALYTICS_INITIAL_DAYS`` back), groups videos that need the same day into
+batched report queries (see ``AnalyticsBatchCollector``), upserts one row per
+(video_id, metric_date) into ``video_daily_metrics`` and advances the
+watermarks day by day, so an interrupted sync resumes where it stopped and a
+re-run never duplicates rows. The newest ``ANALYTICS_LAG_DAYS`` days are left
+for a later run because YouTube keeps revising them.
+
+    python -m lib.analytics_sync sync <video_id|ids.txt> [end_date]
+    python -m lib.analytics_sync backfill <video_id|ids.txt> <start_date> <end_date>
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .analytics_collector import AnalyticsBatchCollector
+from .env_utils import load_project_env
+from .run_logger import build_metrics, emit_run_log
+
+
+QUERY_CHUNK = 200
+
+
+def default_lag_days() -> int:
+    return int(os.getenv("ANALYTICS_LAG_DAYS", "2"))
+
+
+def default_initial_days() -> int:
+    return int(os.getenv("ANALYTICS_INITIAL_DAYS", "28"))
+
+
+class SupabaseAnalyticsStore:
+    def __init__(self, client: Any = None) -> None:
+        if client is None:
+            from .supabase_client import get_client
+
+            client = get_client()
+        self.client = client
+
+    def watermarks(self, video_ids: List[str]) -> Dict[str, date]:
+        marks: Dict[str, date] = {}
+        for index in range(0, len(video_ids), QUERY_CHUNK):
+            response = (
+                self.client.table("analytics_sync_state")
+                .select("video_id,last_synced_date")
+                .in_("video_id", video_ids[index : index + QUERY_CHUNK])
+                .execute()
+            )
+            for row in response.data or []:
+                marks[row["video_id"]] = date.fromisoformat(str(row["last_synced_date"])[:10])
+        return marks
+
+    def existing_days(self, video_ids: List[str], start: date, end: date) -> Set[Tuple[str, date]]:
+        found: Set[Tuple[str, date]] = set()
+        for index in range(0, len(video_ids), QUERY_CHUNK):
+            offset = 0
+            while True:
+                response = (
+                    self.client.table("video_daily_metrics")
+                    .select("video_id,metric_date")
+                    .in_("video_id", video_ids[index : index + QUERY_CHUNK])
+                    .gte("metric_date", start.isoformat())
+                    .lte("metric_date", end.isoformat())
+                    .range(offset, offset + 999)
+                    .execute()
+                )
+                rows = response.data or []
+                found.update((row["video_id"], date.fromisoformat(str(row["metric_date"])[:10])) for row in rows)
+                if len(rows) < 1000:
+                    break
+                offset += 1000
+        return found
+
+    def upsert_daily(self, rows: List[Dict[str, Any]]) -> None:
+        for index in range(0, len(rows), 500):
+            self.client.table("video_daily_metrics").upsert(
+                rows[index : index + 500], on_conflict="video_id,metric_date"
+            ).execute()
+
+    def set_watermarks(self, marks: Dict[str, date]) -> None:
+        now = datetime.now(timezone.utc).isoformat()
+        rows = [{"video_id": vid, "last_synced_date": day.isoformat(), "updated_at": now} for vid, day in marks.items()]
+        for index in range(0, len(rows), 500):
+            self.client.table("analytics_sync_state").upsert(rows[index : index + 500], on_conflict="video_id").execute()
+
+
+def _days(start: date, end: date) -> Iterable[date]:
+    for offset in range((end - start).days + 1):
+        yield start + timedelta(days=offset)
+
+
+def plan_sync(
+    video_ids: Iterable[str],
+    watermarks: Dict[str, date],
+    end: date,
+    initial_days: Optional[int] = None,
+) -> Dict[date, List[str]]:
+    """Map each day that still needs fetching to the videos missing it."""
+    if initial_days is None:
+        initial_days = default_initial_days()
+    plan: Dict[date, List[str]] = {}
+    for video_id in dict.fromkeys(video_ids):
+        mark = watermarks.get(video_id)
+        start = mark + timedelta(days=1) if mark else end - timedelta(days=initial_days - 1)
+        for day in _days(start, end):
+            plan.setdefault(day, []).append(video_id)
+    return dict(sorted(plan.items()))
+
+
+def _daily_row(metrics: Dict[str, Any], day: date) -> Dict[str, Any]:
+    return {
+        "video_id": metrics["video_id"],
+        "metric_date": day.isoformat(),
+        "views": metrics.get("views"),
+        "estimated_minutes_watched": metrics.get("estimated_minutes_watched"),
+        "average_view_duration": metrics.get("average_view_duration"),
+        "impressions_ctr": metrics.get("impressions_ctr"),
+    }
+
+
+def _fetch_days(plan: Dict[date, List[str]], collector: AnalyticsBatchCollector, store: Any, advance: bool) -> int:
+    rows_written = 0
+    for day, videos in plan.items():
+        metrics = collector.fetch(videos, day.isoformat(), day.isoformat())
+        rows = [_daily_row(item, day) for item in metrics]
+        store.upsert_daily(rows)
+        rows_written += len(rows)
+        if advance:
+            store.set_watermarks({video_id: day for video_id in videos})
+    return rows_written
+
+
+def sync_incremental(
+    video_ids: Iterable[str],
+    *,
+    end: Optional[date] = None,
+    store: Any = None,
+    collector: Optional[AnalyticsBatchCollector] = None,
+    initial_days: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Fetch and upsert only the days after each video's watermark, up to ``end``."""
+    end = end or date.today() - timedelta(days=default_lag_days())
+    videos = list(dict.fromkeys(video_ids))
+    store = store or SupabaseAnalyticsStore()
+    plan = plan_sync(videos, store.watermarks(videos), end, initial_days)
+    if not plan:
+        return {"end_date": end.isoformat(), "days": 0, "rows": 0, "api_requests": 0}
+    collector = collector or AnalyticsBatchCollector()
+    rows = _fetch_days(plan, collector, store, advance=True)
+    return {
+        "end_date": end.isoformat(),
+        "days": len(plan),
+        "rows": rows,
+        "api_requests": collector.requests_made,
+    }
+
+
+def backfill_gaps(
+    video_ids: Iterable[str],
+    start: date,
+    end: date,
+    *,
+    store: Any = None,
+    collector: Optional[AnalyticsBatchCollector] = None,
+) -> Dict[str, Any]:
+    """Fetch only the (video, day) pairs in ``[start, end]`` that have no stored row; watermarks are left alone."""
+    videos = list(dict.fromkeys(video_ids))
+    store = store or SupabaseAnalyticsStore()
+    existing = store.existing_days(videos, start, end)
+    plan: Dict[date, List[str]] = {}
+    for day in _days(start, end):
+        missing = [video_id for video_id in videos if (video_id, day) not in existing]
+        if missing:
+            plan[day] = missing
+    if not plan:
+        return {"start_date": start.isoformat(), "end_date": end.isoformat(), "days": 0, "rows": 0, "api_requests": 0}
+    collector = collector or AnalyticsBatchCollector()
+    rows = _fetch_days(plan, collector, store, advance=False)
+    return {
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "days": len(plan),
+        "rows": rows,
+        "api_requests": collector.requests_made,
+    }
+
+
+def _video_ids(arg: str) -> List[str]:
+    if arg.endswith(".txt"):
+        return [line.strip() for line in Path(arg).read_text(encoding="utf-8").splitlines() if line.strip()]
+    return [arg.strip()]
+
+
+def main() -> int:
+    load_project_env()
+    args = sys.argv[1:]
+    if len(args) < 2 or args[0] not in {"sync", "backfill"} or (args[0] == "backfill" and len(args) < 4):
+        print(
+            "Usage: python -m lib.analytics_sync sync <video_id|ids.txt> [end_date]\n"
+            "       python -m lib.analytics_sync backfill <video_id|ids.txt> <start_date> <end_date>",
+            file=sys.stderr,
+        )
+        return 1
+
+    command, videos = args[0], _video_ids(args[1])
+    input_refs = {"command": command, "videos": len(videos), "args": args[2:]}
+    try:
+        if command == "sync":
+            end = date.fromisoformat(args[2]) if len(args) > 2 else None
+            summary = sync_incremental(videos, end=end)
+        else:
+            summary = backfill_gaps(videos, date.fromisoformat(args[2]), date.fromisoformat(args[3]))
+    except Exception as exc:
+        emit_run_log(
+            stage="analytics_sync",
+            status="failure",
+            input_refs=input_refs,
+            error_summary=str(exc),
+            metrics=build_metrics(cache_hit=False),
+        )
+        print(f"Analytics sync failed: {exc}", file=sys.stderr)
+        return 1
+    emit_run_log(
+        stage="analytics_sync",
+        status="success",
+        input_refs=input_refs,
+        output_refs=summary,
+        metrics=build_metrics(cache_hit=summary["days"] == 0),
+    )
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
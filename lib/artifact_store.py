@@ -0,0 +1,194 @@
+"""SQLite-backed artifact store for per-video stage outputs.
+
+Artifacts are keyed by their canonical file name (``{video_id}_{stage}.json``,
+``{video_id}_{stage}.md``) so callers that pass ``data/`` paths around keep
+working unchanged. Writes issued inside ``transaction()`` are committed together,
+giving one durable commit per checkpoint instead of one tmp-file rename per file.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .metrics import ARTIFACT_BYTES, ARTIFACT_WRITES
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+  name TEXT PRIMARY KEY,
+  video_id TEXT NOT NULL,
+  stage TEXT NOT NULL,
+  kind TEXT NOT NULL,
+  content TEXT NOT NULL,
+  content_hash TEXT NOT NULL,
+  created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS artifacts_video_stage_idx ON artifacts (video_id, stage);
+"""
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def artifact_name(stage: str, video_id: str, kind: str) -> str:
+    suffix = "md" if kind == "md" else "json"
+    return f"{video_id}_{stage}.{suffix}"
+
+
+class ArtifactStore:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._conn = sqlite3.connect(str(path), isolation_level=None, check_same_thread=False, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator["ArtifactStore"]:
+        """Group writes into a single atomic commit; nested calls join the outer one."""
+        with self._lock:
+            if self._depth == 0:
+                self._conn.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._conn.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                self._conn.execute("COMMIT")
+
+    def put(self, *, name: str, video_id: str, stage: str, kind: str, content: str) -> str:
+        """Upsert an artifact; identical content (by hash) is left untouched."""
+        digest = content_hash(content)
+        with self._lock:
+            row = self._conn.execute("SELECT content_hash FROM artifacts WHERE name = ?", (name,)).fetchone()
+            if row and row[0] == digest:
+                ARTIFACT_WRITES.inc(kind=kind, result="unchanged")
+                return digest
+            self._conn.execute(
+                "INSERT INTO artifacts (name, video_id, stage, kind, content, content_hash, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET content=excluded.content, "
+                "content_hash=excluded.content_hash, created_at=excluded.created_at",
+                (name, video_id, stage, kind, content, digest, datetime.now(timezone.utc).isoformat()),
+            )
+        ARTIFACT_WRITES.inc(kind=kind, result="stored")
+        ARTIFACT_BYTES.inc(len(content.encode("utf-8")), kind=kind)
+        return digest
+
+    def get(self, name: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT content FROM artifacts WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def exists(self, name: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM artifacts WHERE name = ?", (name,)).fetchone()
+        return row is not None
+
+    def delete(self, name: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM artifacts WHERE name = ?", (name,))
+
+    def index(self, video_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return artifact metadata (no content), optionally filtered to one video."""
+        query = "SELECT name, video_id, stage, kind, content_hash, created_at FROM artifacts"
+        params: tuple = ()
+        if video_id:
+            query += " WHERE video_id = ?"
+            params = (video_id,)
+        query += " ORDER BY video_id, stage, kind"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        keys = ("name", "video_id", "stage", "kind", "content_hash", "created_at")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT name FROM artifacts ORDER BY name")]
+
+
+def _split_name(name: str) -> tuple[str, str, str] | None:
+    stem, _, suffix = name.rpartition(".")
+    if suffix not in {"json", "md"} or "_" not in stem:
+        return None
+    # YouTube IDs are 11 chars and may themselves contain underscores.
+    if len(stem) > 12 and stem[11] == "_":
+        video_id, stage = stem[:11], stem[12:]
+    else:
+        video_id, _, stage = stem.partition("_")
+    if not video_id or not stage:
+        return None
+    kind = "md" if suffix == "md" else ("raw" if stage.endswith("_raw") else "json")
+    return video_id, stage, kind
+
+
+def import_directory(store: ArtifactStore, data_dir: Path) -> int:
+    """Copy loose ``data/`` artifacts into the store in one transaction."""
+    imported = 0
+    with store.transaction():
+        for path in sorted(data_dir.glob("*_*.*")):
+            parts = _split_name(path.name)
+            if not parts or not path.is_file():
+                continue
+            video_id, stage, kind = parts
+            store.put(name=path.name, video_id=video_id, stage=stage, kind=kind, content=path.read_text(encoding="utf-8"))
+            imported += 1
+    return imported
+
+
+def export_directory(store: ArtifactStore, data_dir: Path) -> int:
+    """Materialize stored artifacts back into loose files (for inspection or rollback)."""
+    data_dir.mkdir(parents=True, exist_ok=True)
+    exported = 0
+    for name in store.names():
+        content = store.get(name)
+        if content is None:
+            continue
+        (data_dir / name).write_text(content, encoding="utf-8")
+        exported += 1
+    return exported
+
+
+def main() -> int:
+    from .storage_utils import DATA_DIR, STORE_PATH
+
+    if len(sys.argv) < 2 or sys.argv[1] not in {"import", "export", "index"}:
+        print("Usage: python -m lib.artifact_store <import|export|index> [video_id]", file=sys.stderr)
+        return 1
+
+    store = ArtifactStore(STORE_PATH)
+    mode = sys.argv[1]
+    if mode == "import":
+        print(f"Imported {import_directory(store, DATA_DIR)} artifacts into {STORE_PATH}.")
+    elif mode == "export":
+        print(f"Exported {export_directory(store, DATA_DIR)} artifacts into {DATA_DIR}.")
+    else:
+        video_id = sys.argv[2] if len(sys.argv) > 2 else None
+        for row in store.index(video_id):
+            print(json.dumps(row, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,31 @@
+"""Deferred loading of the project-root ``.env`` file.
+
+Nothing loads ``.env`` at import time, so every CLI ``main()`` (and any helper
+that reads credentials) calls ``load_project_env()`` first, and settings are
+read with ``os.getenv`` when used rather than into module constants.
+"""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+
+ROOT_ENV_PATH = Path(__file__).resolve().parent.parent / ".env"
+
+_loaded = False
+_lock = threading.Lock()
+
+
+def load_project_env() -> None:
+    """Load ``.env`` once, on first use, so importing lib modules stays cheap."""
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if _loaded:
+            return
+        from dotenv import load_dotenv
+
+        load_dotenv(ROOT_ENV_PATH)
+        _loaded = True
@@ -1,18 +1,10 @@
 import os
-import sys
-from pathlib import Path
-
-# Path configuration.
-venv_path = Path(__file__).resolve().parent.parent / ".venv" / "Lib" / "site-packages"
-sys.path.append(str(venv_path))
 
 from .supabase_client import supabase
 from .run_logger import build_metrics, emit_run_log
 from .model_router import ModelRouter
-from dotenv import load_dotenv
 import re
 
-load_dotenv()
 
 class ContentEvaluator:
     def __init__(self):
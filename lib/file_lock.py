@@ -0,0 +1,42 @@
+"""Exclusive lock files for small read-modify-write stores under ``data/``.
+
+``file_lock(path)`` serializes threads of this process with a per-path lock
+and other processes (validation runs, daemon workers, CLIs) with
+``fcntl.flock`` on ``path``. Where ``fcntl`` is unavailable only threads are
+serialized. Locks are not reentrant; do not nest the same path.
+"""
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator
+
+_registry_lock = threading.Lock()
+_thread_locks: Dict[str, threading.Lock] = {}
+
+
+def _thread_lock(path: Path) -> threading.Lock:
+    key = str(path.resolve())
+    with _registry_lock:
+        lock = _thread_locks.get(key)
+        if lock is None:
+            lock = _thread_locks[key] = threading.Lock()
+        return lock
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _thread_lock(path), path.open("a+b") as handle:
+        try:
+            import fcntl
+        except ImportError:  # Windows: threads only.
+            yield
+            return
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
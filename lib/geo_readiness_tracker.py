@@ -0,0 +1,211 @@
+"""Streaming GEO readiness tracker fed by validation warning events.
+
+``evaluate_geo_readiness`` recomputes the warning streak from a full weekly
+list. The tracker instead keeps the current week's total, the previous week's
+total and the streak ending at the previous week, so every event and every
+level lookup is O(1), and ``status()`` returns the same level / incident /
+hold fields as ``evaluate_geo_readiness`` over the equivalent weekly series.
+
+Events are per-video warning counts from one validation run. Each video
+contributes its latest run of the week (latest day wins, and a later run on
+the same day replaces an earlier one), so re-validating a video on Monday and
+Thursday counts it once. Weeks without any validation event are skipped rather
+than counted as zero. ``KpiStore.weekly`` applies the same two rules to
+``geo_warnings``, so the tracker and ``KpiStore.phase_input`` report the same
+level for the same runs. Events older than the current week are ignored and
+counted in ``late_events``.
+
+Validation runs (``validation_runner all``, daemon jobs with ``validate``)
+share the tracker through ``data/geo_readiness_state.json``, which stays small
+(the history window plus the current week's per-video counts). Read the level
+with ``GET /geo-readiness`` on the pipeline daemon or::
+
+    python -m lib.geo_readiness_tracker [state.json]
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+from collections import deque
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .file_lock import file_lock
+from .kpi_store import week_index, week_start
+from .policy_engine import DEFAULT_POLICY_PATH, get_policy
+
+
+STATE_PATH = Path(__file__).resolve().parent.parent / "data" / "geo_readiness_state.json"
+HISTORY_WEEKS = 12
+
+
+class GeoReadinessTracker:
+    def __init__(self, policy_path: Path = DEFAULT_POLICY_PATH, history_weeks: int = HISTORY_WEEKS) -> None:
+        self.policy_path = policy_path
+        self.incident_open = False
+        self.late_events = 0
+        self._week: Optional[int] = None
+        self._current = 0
+        self._video_counts: Dict[str, Tuple[int, int]] = {}
+        self._previous: Optional[int] = None
+        self._closed_streak = 0
+        self._history: Deque[Tuple[int, int]] = deque(maxlen=history_weeks)
+        self._lock = threading.Lock()
+
+    def _roll_to(self, week: int) -> None:
+        if self._week is not None and self._week < week and self._video_counts:
+            # Only weeks with validation events enter the series; quiet weeks are skipped.
+            self._closed_streak = self._streak()
+            self._previous = self._current
+            self._history.append((self._week, self._current))
+            self._current = 0
+            self._video_counts.clear()
+        if self._week is None or self._week < week:
+            self._week = week
+
+    def _streak(self) -> int:
+        if self._previous is None:
+            return 0
+        return self._closed_streak + 1 if self._current > self._previous else 0
+
+    def observe(self, video_id: str, count: int, at: Optional[datetime] = None) -> None:
+        """Record one validation run's warning count for ``video_id``."""
+        day = (at or datetime.now(timezone.utc)).date()
+        week = week_index(day)
+        with self._lock:
+            if self._week is not None and week < self._week:
+                self.late_events += 1
+                return
+            self._roll_to(week)
+            ordinal = day.toordinal()
+            seen_day, seen_count = self._video_counts.get(video_id, (ordinal, 0))
+            if ordinal < seen_day:
+                return  # An earlier day's run than the one already counted for this video.
+            self._current += count - seen_count
+            self._video_counts[video_id] = (ordinal, count)
+
+    def advance(self, today: Optional[date] = None) -> None:
+        """Close finished weeks without an event, e.g. before reading the level on a quiet Monday."""
+        with self._lock:
+            self._roll_to(week_index(today or datetime.now(timezone.utc).date()))
+
+    def status(self) -> Dict[str, Any]:
+        limits = get_policy(self.policy_path).thresholds
+        with self._lock:
+            weekly = [count for _, count in self._history]
+            if self._video_counts:
+                latest, streak = self._current, self._streak()
+                weekly.append(latest)
+            else:
+                # Quiet current week: the series ends with the last week that had events.
+                latest, streak = self._previous or 0, self._closed_streak
+            current_week = self._week
+            incident_open = self.incident_open
+            late = self.late_events
+
+        level = "green"
+        reason_codes: List[str] = []
+        if latest >= limits.red_min_warnings and streak >= limits.red_sustained_weeks - 1:
+            level = "red"
+            reason_codes.append("GEO_WARN_RED_THRESHOLD")
+        elif latest >= limits.yellow_min_warnings and streak >= limits.yellow_sustained_weeks - 1:
+            level = "yellow"
+            reason_codes.append("GEO_WARN_YELLOW_THRESHOLD")
+        hold = level in limits.hold_levels
+        if limits.hold_when_incident_open and incident_open:
+            hold = True
+            reason_codes.append("OPEN_INCIDENT_HOLD")
+
+        return {
+            "level": level,
+            "latest_warning_count": latest,
+            "sustained_increase_streak": streak,
+            "incident_required": level in limits.incident_levels,
+            "phase_hold": hold,
+            "reason_codes": sorted(set(reason_codes)),
+            "week_start": week_start(current_week).isoformat() if current_week is not None else None,
+            "weekly_warning_counts": weekly,
+            "late_events": late,
+        }
+
+    def to_state(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "week": self._week,
+                "current": self._current,
+                "video_counts": [[video_id, day, count] for video_id, (day, count) in self._video_counts.items()],
+                "previous": self._previous,
+                "closed_streak": self._closed_streak,
+                "history": [list(item) for item in self._history],
+                "incident_open": self.incident_open,
+                "late_events": self.late_events,
+            }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], **kwargs: Any) -> "GeoReadinessTracker":
+        tracker = cls(**kwargs)
+        tracker._week = state.get("week")
+        # Older state files keyed the week by (video, day); the latest day per video carries over.
+        for video_id, day, count in sorted(state.get("video_counts") or state.get("day_counts", []), key=lambda item: item[1]):
+            tracker._video_counts[video_id] = (day, count)
+        tracker._current = sum(count for _, count in tracker._video_counts.values())
+        tracker._previous = state.get("previous")
+        tracker._closed_streak = state.get("closed_streak", 0)
+        tracker._history.extend((week, count) for week, count in state.get("history", []))
+        tracker.incident_open = bool(state.get("incident_open", False))
+        tracker.late_events = state.get("late_events", 0)
+        return tracker
+
+    @classmethod
+    def load(cls, path: Path = STATE_PATH, **kwargs: Any) -> "GeoReadinessTracker":
+        if not path.exists():
+            return cls(**kwargs)
+        return cls.from_state(json.loads(path.read_text(encoding="utf-8")), **kwargs)
+
+    def save(self, path: Path = STATE_PATH) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(self.to_state(), ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(path)
+        return path
+
+
+_state_lock = threading.Lock()
+
+
+def record_validation_warnings(counts: Dict[str, int], path: Path = STATE_PATH) -> Dict[str, Any]:
+    """Feed per-video warning counts into the persisted tracker and return the updated status.
+
+    The read-modify-write holds the thread lock and ``{state}.lock``, so validation
+    runs in other processes (CLI, daemon workers) do not drop each other's counts.
+    """
+    with _state_lock, file_lock(path.with_suffix(".lock")):
+        tracker = GeoReadinessTracker.load(path)
+        for video_id, count in counts.items():
+            tracker.observe(video_id, count)
+        tracker.save(path)
+    return tracker.status()
+
+
+def current_status(path: Path = STATE_PATH) -> Dict[str, Any]:
+    """Status of the persisted tracker as of today (weeks without validation events are skipped)."""
+    tracker = GeoReadinessTracker.load(path)
+    tracker.advance()
+    return tracker.status()
+
+
+def main() -> int:
+    if len(sys.argv) > 2:
+        print("Usage: python -m lib.geo_readiness_tracker [state.json]", file=sys.stderr)
+        return 1
+    status = current_status(Path(sys.argv[1]) if len(sys.argv) == 2 else STATE_PATH)
+    print(json.dumps(status, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
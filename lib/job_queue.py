@@ -0,0 +1,463 @@
+"""Durable pipeline job queue with lease / heartbeat / ack semantics.
+
+Two interchangeable backends:
+
+- ``SQLiteJobQueue``: single node, ``data/job_queue.sqlite3``.
+- ``SupabaseJobQueue``: many nodes sharing the ``pipeline_jobs`` and
+  ``pipeline_stage_completions`` tables plus the ``lease_pipeline_job`` /
+  ``heartbeat_pipeline_job`` functions in ``spec/schema.sql``.
+
+A worker leases a job for ``lease_seconds`` and must heartbeat before the lease
+expires; an expired lease makes the job visible to other workers again. Jobs are
+unique per video while open, and stage completions are keyed by
+``(video_id, stage)`` so a re-leased job can reuse stages another worker
+already paid for.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from .env_utils import load_project_env
+from .serialization import SerializedPayload, dumps, loads
+
+
+QUEUE_BACKEND_ENV = "JOB_QUEUE_BACKEND"
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_DELAY_SECONDS = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+  job_id TEXT PRIMARY KEY,
+  video_id TEXT NOT NULL,
+  payload TEXT NOT NULL,
+  status TEXT NOT NULL,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  max_attempts INTEGER NOT NULL,
+  lease_owner TEXT,
+  lease_expires_at REAL,
+  available_at REAL NOT NULL,
+  last_error TEXT,
+  created_at REAL NOT NULL,
+  updated_at REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_open_video_key ON jobs (video_id) WHERE status IN ('queued', 'leased');
+CREATE INDEX IF NOT EXISTS jobs_ready_idx ON jobs (status, available_at);
+CREATE TABLE IF NOT EXISTS stage_completions (
+  video_id TEXT NOT NULL,
+  stage TEXT NOT NULL,
+  output_hash TEXT NOT NULL,
+  output TEXT NOT NULL,
+  completed_at REAL NOT NULL,
+  PRIMARY KEY (video_id, stage)
+);
+"""
+
+
+@dataclass
+class Job:
+    job_id: str
+    video_id: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+    attempts: int = 0
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+
+
+class SQLiteJobQueue:
+    def __init__(self, path: Path, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> None:
+        self.path = path
+        self.max_attempts = max_attempts
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(path), isolation_level=None, check_same_thread=False, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def enqueue(self, video_id: str, payload: Optional[Dict[str, Any]] = None) -> str:
+        """Queue a job for the video, or return the id of its already-open job."""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT job_id FROM jobs WHERE video_id = ? AND status IN ('queued', 'leased')", (video_id,)
+            ).fetchone()
+            if row:
+                return row[0]
+            job_id = str(uuid.uuid4())
+            conn.execute(
+                "INSERT INTO jobs (job_id, video_id, payload, status, max_attempts, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, video_id, dumps(payload or {}), self.max_attempts, now, now, now),
+            )
+        return job_id
+
+    def lease(self, worker_id: str, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> Optional[Job]:
+        """Claim the oldest ready job (or one whose lease expired) for ``lease_seconds``."""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'dead', lease_owner = NULL, updated_at = ?, "
+                "last_error = COALESCE(last_error, 'lease expired') "
+                "WHERE attempts >= max_attempts AND "
+                "(status = 'queued' OR (status = 'leased' AND lease_expires_at < ?))",
+                (now, now),
+            )
+            row = conn.execute(
+                "SELECT job_id, video_id, payload, attempts, max_attempts FROM jobs "
+                "WHERE (status = 'queued' AND available_at <= ?) OR (status = 'leased' AND lease_expires_at < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if not row:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires_at = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE job_id = ?",
+                (worker_id, now + lease_seconds, now, row[0]),
+            )
+        return Job(job_id=row[0], video_id=row[1], payload=loads(row[2]), attempts=row[3] + 1, max_attempts=row[4])
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> bool:
+        """Extend the lease; False means the lease was lost and the worker should stop."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_expires_at = ?, updated_at = ? "
+                "WHERE job_id = ? AND lease_owner = ? AND status = 'leased'",
+                (now + lease_seconds, now, job_id, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def ack(self, job_id: str, worker_id: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'done', lease_owner = NULL, updated_at = ? "
+                "WHERE job_id = ? AND lease_owner = ? AND status = 'leased'",
+                (time.time(), job_id, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def nack(
+        self,
+        job_id: str,
+        worker_id: str,
+        error: str,
+        retry_delay_s: int = DEFAULT_RETRY_DELAY_SECONDS,
+    ) -> bool:
+        """Release a failed job; it becomes visible again after ``retry_delay_s`` (or dead once exhausted)."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN 'dead' ELSE 'queued' END, "
+                "lease_owner = NULL, lease_expires_at = NULL, available_at = ?, last_error = ?, updated_at = ? "
+                "WHERE job_id = ? AND lease_owner = ? AND status = 'leased'",
+                (now + retry_delay_s, error[:2000], now, job_id, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def complete_stage(self, video_id: str, stage: str, output: Dict[str, Any]) -> bool:
+        """Record a stage output; returns False when the same output was already recorded."""
+        serialized = SerializedPayload(output)
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT output_hash FROM stage_completions WHERE video_id = ? AND stage = ?", (video_id, stage)
+            ).fetchone()
+            if row and row[0] == serialized.sha256:
+                return False
+            conn.execute(
+                "INSERT INTO stage_completions (video_id, stage, output_hash, output, completed_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(video_id, stage) DO UPDATE SET output_hash = excluded.output_hash, "
+                "output = excluded.output, completed_at = excluded.completed_at",
+                (video_id, stage, serialized.sha256, serialized.text, time.time()),
+            )
+        return True
+
+    def completed_stages(self, video_id: str) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT stage, output FROM stage_completions WHERE video_id = ?", (video_id,)
+            ).fetchall()
+        return {stage: loads(output) for stage, output in rows}
+
+    def reset_stages(self, video_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM stage_completions WHERE video_id = ?", (video_id,))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id, video_id, status, attempts, max_attempts, lease_owner, last_error FROM jobs WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+        keys = ("job_id", "video_id", "status", "attempts", "max_attempts", "lease_owner", "last_error")
+        return dict(zip(keys, row)) if row else None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+
+class SupabaseJobQueue:
+    """Multi-node queue on Postgres; leasing uses ``FOR UPDATE SKIP LOCKED`` inside an RPC."""
+
+    def __init__(self, client: Any = None, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> None:
+        if client is None:
+            from .supabase_client import get_client
+
+            client = get_client()
+        self.client = client
+        self.max_attempts = max_attempts
+
+    def _open_job_id(self, video_id: str) -> Optional[str]:
+        response = (
+            self.client.table("pipeline_jobs")
+            .select("job_id")
+            .eq("video_id", video_id)
+            .in_("status", ["queued", "leased"])
+            .limit(1)
+            .execute()
+        )
+        return response.data[0]["job_id"] if response.data else None
+
+    def enqueue(self, video_id: str, payload: Optional[Dict[str, Any]] = None) -> str:
+        existing = self._open_job_id(video_id)
+        if existing:
+            return existing
+        try:
+            response = (
+                self.client.table("pipeline_jobs")
+                .insert({"video_id": video_id, "payload": payload or {}, "max_attempts": self.max_attempts})
+                .execute()
+            )
+        except Exception:
+            # Lost the race against another producer; the partial unique index kept one open job.
+            existing = self._open_job_id(video_id)
+            if existing:
+                return existing
+            raise
+        return response.data[0]["job_id"]
+
+    def lease(self, worker_id: str, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> Optional[Job]:
+        response = self.client.rpc(
+            "lease_pipeline_job", {"p_worker": worker_id, "p_lease_seconds": lease_seconds}
+        ).execute()
+        if not response.data:
+            return None
+        row = response.data[0]
+        return Job(
+            job_id=row["job_id"],
+            video_id=row["video_id"],
+            payload=row.get("payload") or {},
+            attempts=row.get("attempts", 1),
+            max_attempts=row.get("max_attempts", self.max_attempts),
+        )
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> bool:
+        response = self.client.rpc(
+            "heartbeat_pipeline_job",
+            {"p_job_id": job_id, "p_worker": worker_id, "p_lease_seconds": lease_seconds},
+        ).execute()
+        return bool(response.data)
+
+    def _release(self, job_id: str, worker_id: str, values: Dict[str, Any]) -> bool:
+        response = (
+            self.client.table("pipeline_jobs")
+            .update({**values, "lease_owner": None, "updated_at": _iso_now()})
+            .eq("job_id", job_id)
+            .eq("lease_owner", worker_id)
+            .eq("status", "leased")
+            .execute()
+        )
+        return bool(response.data)
+
+    def ack(self, job_id: str, worker_id: str) -> bool:
+        return self._release(job_id, worker_id, {"status": "done"})
+
+    def nack(
+        self,
+        job_id: str,
+        worker_id: str,
+        error: str,
+        retry_delay_s: int = DEFAULT_RETRY_DELAY_SECONDS,
+    ) -> bool:
+        # Exhausted jobs are moved to 'dead' by lease_pipeline_job on the next lease pass.
+        available_at = (datetime.now(timezone.utc) + timedelta(seconds=retry_delay_s)).isoformat()
+        return self._release(
+            job_id,
+            worker_id,
+            {"status": "queued", "lease_expires_at": None, "available_at": available_at, "last_error": error[:2000]},
+        )
+
+    def complete_stage(self, video_id: str, stage: str, output: Dict[str, Any]) -> bool:
+        serialized = SerializedPayload(output)
+        existing = (
+            self.client.table("pipeline_stage_completions")
+            .select("output_hash")
+            .eq("video_id", video_id)
+            .eq("stage", stage)
+            .limit(1)
+            .execute()
+        )
+        if existing.data and existing.data[0]["output_hash"] == serialized.sha256:
+            return False
+        self.client.table("pipeline_stage_completions").upsert(
+            {
+                "video_id": video_id,
+                "stage": stage,
+                "output_hash": serialized.sha256,
+                "output": output,
+                "completed_at": _iso_now(),
+            },
+            on_conflict="video_id,stage",
+        ).execute()
+        return True
+
+    def completed_stages(self, video_id: str) -> Dict[str, Dict[str, Any]]:
+        response = (
+            self.client.table("pipeline_stage_completions")
+            .select("stage,output")
+            .eq("video_id", video_id)
+            .execute()
+        )
+        return {row["stage"]: row["output"] for row in response.data or []}
+
+    def reset_stages(self, video_id: str) -> None:
+        self.client.table("pipeline_stage_completions").delete().eq("video_id", video_id).execute()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        response = (
+            self.client.table("pipeline_jobs")
+            .select("job_id,video_id,status,attempts,max_attempts,lease_owner,last_error")
+            .eq("job_id", job_id)
+            .limit(1)
+            .execute()
+        )
+        return response.data[0] if response.data else None
+
+    def stats(self) -> Dict[str, int]:
+        response = self.client.table("pipeline_jobs").select("status").in_("status", ["queued", "leased", "dead"]).execute()
+        counts: Dict[str, int] = {}
+        for row in response.data or []:
+            counts[row["status"]] = counts.get(row["status"], 0) + 1
+        return counts
+
+
+def _iso_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class LeaseLost(RuntimeError):
+    """The worker no longer owns the job it is running; stop without acking or nacking."""
+
+
+class LeaseKeeper:
+    """Background heartbeat for a leased job; ``lost`` flips if the lease is taken away."""
+
+    def __init__(self, queue: Any, job: Job, worker_id: str, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> None:
+        self.queue = queue
+        self.job = job
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, name=f"lease-{job.job_id}", daemon=True)
+
+    def _beat(self) -> None:
+        interval = max(1.0, self.lease_seconds / 3)
+        while not self._stop.wait(interval):
+            try:
+                if not self.queue.heartbeat(self.job.job_id, self.worker_id, self.lease_seconds):
+                    self.lost = True
+                    return
+            except Exception as exc:  # Transient backend errors: keep trying until the lease runs out.
+                print(f"Lease heartbeat failed for {self.job.job_id}: {exc}")
+
+    def ensure_held(self) -> None:
+        """Heartbeat now and raise ``LeaseLost`` if another worker owns the job (call before paid work)."""
+        if not self.lost:
+            try:
+                if not self.queue.heartbeat(self.job.job_id, self.worker_id, self.lease_seconds):
+                    self.lost = True
+            except Exception as exc:  # Same policy as the background beat: a transient error is not a lost lease.
+                print(f"Lease heartbeat failed for {self.job.job_id}: {exc}")
+        if self.lost:
+            raise LeaseLost(f"Lease for job {self.job.job_id} was lost; another worker owns it now.")
+
+    def __enter__(self) -> "LeaseKeeper":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def get_job_queue() -> Any:
+    """Return the configured queue backend (``JOB_QUEUE_BACKEND=sqlite|supabase``)."""
+    backend = os.getenv(QUEUE_BACKEND_ENV, "sqlite").strip().lower()
+    if backend == "supabase":
+        return SupabaseJobQueue()
+    from .storage_utils import DATA_DIR
+
+    return SQLiteJobQueue(DATA_DIR / "job_queue.sqlite3")
+
+
+def main() -> int:
+    load_project_env()
+    from .storage_utils import normalize_video_id
+
+    args = sys.argv[1:]
+    if not args or args[0] not in {"enqueue", "status", "stats"} or (args[0] != "stats" and len(args) < 2):
+        print(
+            "Usage: python -m lib.job_queue enqueue <youtube_url_or_id> [--refresh]\n"
+            "       python -m lib.job_queue status <job_id>\n"
+            "       python -m lib.job_queue stats",
+            file=sys.stderr,
+        )
+        return 1
+
+    queue = get_job_queue()
+    if args[0] == "enqueue":
+        payload = {"video": args[1], "refresh": "--refresh" in args[2:]}
+        print(queue.enqueue(normalize_video_id(args[1]), payload))
+    elif args[0] == "status":
+        job = queue.get(args[1])
+        if not job:
+            print(f"Unknown job: {args[1]}", file=sys.stderr)
+            return 1
+        print(json.dumps(job, ensure_ascii=False))
+    else:
+        print(json.dumps(queue.stats(), ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,329 @@
+"""Local columnar store of per-video, per-day KPIs feeding the phase policy.
+
+Each metric is one typed column (stdlib ``array``) saved as a raw binary file
+under ``data/kpi_store/``; missing values are NaN. Rows are keyed by
+(video_id, day) and upserted field by field, so analytics pulls and
+validation warning counts for the same day merge into one row. Rollups walk
+whole columns at once (weekly buckets, rolling windows, relative range over a
+trailing window) and ``phase_input`` returns a ready ``PhaseEvaluationInput``.
+Writers use ``KpiStore.locked()``, which loads, applies the caller's changes
+and saves under ``data/kpi_store/.lock``, so concurrent validation runs and
+daemon jobs never drop each other's updates.
+
+    python -m lib.kpi_store pull [since_date]
+    python -m lib.kpi_store weekly [weeks]
+    python -m lib.kpi_store phase-input --base base.json [--weeks 8] [--end YYYY-MM-DD]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import threading
+from array import array
+from contextlib import contextmanager
+from dataclasses import asdict
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .file_lock import file_lock
+from .policy_engine import PhaseEvaluationInput, _relative_range
+
+
+STORE_DIR = Path(__file__).resolve().parent.parent / "data" / "kpi_store"
+STORE_VERSION = 1
+METRIC_COLUMNS = ["views", "estimated_minutes_watched", "average_view_duration", "impressions_ctr", "geo_warnings"]
+NAN = float("nan")
+_PHASE_FIELDS = {
+    "published_videos",
+    "source_contract_ready",
+    "source_linkage_pass_rate",
+    "research_source_coverage",
+    "incident_open",
+    "override_record",
+}
+
+
+def week_index(day: date) -> int:
+    """Monday-based week number (date.min is a Monday)."""
+    return (day.toordinal() - 1) // 7
+
+
+def week_start(index: int) -> date:
+    return date.fromordinal(index * 7 + 1)
+
+
+def rolling(values: Sequence[float], window: int, fn: Callable[[List[float]], float]) -> List[float]:
+    """Apply ``fn`` to each trailing window of ``values`` (NaNs skipped; NaN when a window is empty)."""
+    out: List[float] = []
+    for end in range(1, len(values) + 1):
+        chunk = [value for value in values[max(0, end - window) : end] if not math.isnan(value)]
+        out.append(fn(chunk) if chunk else NAN)
+    return out
+
+
+def _as_day(value: Any) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def _number(value: Any) -> float:
+    if value is None:
+        return NAN
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return NAN
+
+
+class KpiStore:
+    def __init__(self, path: Path = STORE_DIR) -> None:
+        self.path = path
+        self.videos: List[str] = []
+        self.video_col = array("I")
+        self.day_col = array("q")
+        self.columns: Dict[str, array] = {name: array("d") for name in METRIC_COLUMNS}
+        self._video_index: Dict[str, int] = {}
+        self._row_index: Optional[Dict[Tuple[int, int], int]] = None
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.day_col)
+
+    @classmethod
+    @contextmanager
+    def locked(cls, path: Path = STORE_DIR) -> Iterator["KpiStore"]:
+        """Load, let the caller modify, then save, all under an exclusive lock."""
+        with file_lock(path / ".lock"):
+            store = cls(path)
+            yield store
+            store.save()
+
+    def _load(self) -> None:
+        meta_path = self.path / "meta.json"
+        if not meta_path.exists():
+            return
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        rows = int(meta["rows"])
+        self.videos = list(meta["videos"])
+        self._video_index = {video_id: index for index, video_id in enumerate(self.videos)}
+        for name, column in [("video", self.video_col), ("day", self.day_col), *self.columns.items()]:
+            with (self.path / f"{name}.bin").open("rb") as handle:
+                column.fromfile(handle, rows)
+
+    def save(self) -> Path:
+        self.path.mkdir(parents=True, exist_ok=True)
+        suffix = f"{os.getpid()}.{threading.get_ident()}.tmp"
+        for name, column in [("video", self.video_col), ("day", self.day_col), *self.columns.items()]:
+            tmp_path = self.path / f".{name}.bin.{suffix}"
+            with tmp_path.open("wb") as handle:
+                column.tofile(handle)
+            tmp_path.replace(self.path / f"{name}.bin")
+        # meta.json is written last; its row count bounds what a reader trusts.
+        meta = {"version": STORE_VERSION, "rows": len(self), "videos": self.videos, "columns": METRIC_COLUMNS}
+        tmp_meta = self.path / f".meta.json.{suffix}"
+        tmp_meta.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        tmp_meta.replace(self.path / "meta.json")
+        return self.path
+
+    def _video(self, video_id: str) -> int:
+        index = self._video_index.get(video_id)
+        if index is None:
+            index = self._video_index[video_id] = len(self.videos)
+            self.videos.append(video_id)
+        return index
+
+    def upsert(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Merge rows (``video_id``, ``metric_date`` plus any metric columns); returns rows touched."""
+        if self._row_index is None:
+            self._row_index = {key: row for row, key in enumerate(zip(self.video_col, self.day_col))}
+        touched = 0
+        for item in rows:
+            key = (self._video(str(item["video_id"])), _as_day(item["metric_date"]).toordinal())
+            row = self._row_index.get(key)
+            if row is None:
+                row = self._row_index[key] = len(self.day_col)
+                self.video_col.append(key[0])
+                self.day_col.append(key[1])
+                for column in self.columns.values():
+                    column.append(NAN)
+            for name, column in self.columns.items():
+                if name in item and item[name] is not None:
+                    column[row] = _number(item[name])
+            touched += 1
+        return touched
+
+    def record_geo_warnings(self, video_id: str, day: date, count: int) -> None:
+        self.upsert([{"video_id": video_id, "metric_date": day, "geo_warnings": count}])
+
+    def _mask(self, start: Optional[date], end: Optional[date], video_ids: Optional[Iterable[str]]) -> List[bool]:
+        lo = start.toordinal() if start else -1
+        hi = end.toordinal() if end else 1 << 62
+        if video_ids is None:
+            return [lo <= day <= hi for day in self.day_col]
+        wanted = {self._video_index[vid] for vid in video_ids if vid in self._video_index}
+        return [lo <= day <= hi and video in wanted for video, day in zip(self.video_col, self.day_col)]
+
+    def weekly(
+        self,
+        *,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        video_ids: Optional[Iterable[str]] = None,
+    ) -> Dict[int, Dict[str, float]]:
+        """Channel-level weekly rollup keyed by week index.
+
+        views/minutes are summed, CTR is the mean over rows that report it, and
+        AVD is weighted by views (falling back to a plain mean for weeks without
+        views). geo_warnings sums each video's latest validation of the week, so
+        revalidating a video does not count it twice (the same rule as
+        ``GeoReadinessTracker``); weeks without validations have no value.
+        """
+        mask = self._mask(start, end, video_ids)
+        views, minutes, avd = self.columns["views"], self.columns["estimated_minutes_watched"], self.columns["average_view_duration"]
+        ctr, geo = self.columns["impressions_ctr"], self.columns["geo_warnings"]
+        acc: Dict[int, List[float]] = {}
+        geo_latest: Dict[Tuple[int, int], Tuple[int, float]] = {}
+        for keep, video, day, v, m, a, c, g in zip(mask, self.video_col, self.day_col, views, minutes, avd, ctr, geo):
+            if not keep:
+                continue
+            # x == x is False only for NaN (missing value).
+            bucket = acc.get((day - 1) // 7)
+            if bucket is None:
+                # views, minutes, avd*views, weighted views, avd sum, avd n, ctr sum, ctr n, geo sum, geo n
+                bucket = acc[(day - 1) // 7] = [0.0] * 10
+            if v == v:
+                bucket[0] += v
+            if m == m:
+                bucket[1] += m
+            if a == a:
+                bucket[4] += a
+                bucket[5] += 1
+                if v == v and v > 0:
+                    bucket[2] += a * v
+                    bucket[3] += v
+            if c == c:
+                bucket[6] += c
+                bucket[7] += 1
+            if g == g:
+                key = ((day - 1) // 7, video)
+                if day >= geo_latest.get(key, (day, g))[0]:
+                    geo_latest[key] = (day, g)
+        for (week, _video), (_day, g) in geo_latest.items():
+            acc[week][8] += g
+            acc[week][9] += 1
+        rollup: Dict[int, Dict[str, float]] = {}
+        for week in sorted(acc):
+            b = acc[week]
+            rollup[week] = {
+                "views": b[0],
+                "estimated_minutes_watched": b[1],
+                "average_view_duration": b[2] / b[3] if b[3] else (b[4] / b[5] if b[5] else NAN),
+                "impressions_ctr": b[6] / b[7] if b[7] else NAN,
+                "geo_warnings": b[8] if b[9] else NAN,
+            }
+        return rollup
+
+    def trailing_weeks(self, weeks: int, end: Optional[date] = None, **filters: Any) -> Dict[int, Dict[str, float]]:
+        """Weekly rollup for the ``weeks`` weeks ending with the week containing ``end``."""
+        end = end or date.today()
+        return self.weekly(start=week_start(week_index(end) - weeks + 1), end=end, **filters)
+
+    def weekly_series(self, metric: str, weeks: int, end: Optional[date] = None, **filters: Any) -> List[float]:
+        """One value per week with data (oldest first); weeks without the metric are dropped."""
+        return _series(self.trailing_weeks(weeks, end, **filters), metric)
+
+    def relative_range(self, metric: str, weeks: int, end: Optional[date] = None) -> float:
+        return _relative_range(self.weekly_series(metric, weeks, end))
+
+    def published_videos(self, end: Optional[date] = None) -> int:
+        hi = (end or date.today()).toordinal()
+        return len({video for video, day in zip(self.video_col, self.day_col) if day <= hi})
+
+    def latest(self, metrics: Sequence[str], end: Optional[date] = None) -> Dict[str, Dict[str, float]]:
+        """Most recent stored value of each metric per video on or before ``end`` (NaN when never stored)."""
+        hi = end.toordinal() if end else 1 << 62
+        out: Dict[str, Dict[str, float]] = {}
+        for metric in metrics:
+            seen: Dict[int, int] = {}
+            for video, day, value in zip(self.video_col, self.day_col, self.columns[metric]):
+                if day <= hi and not math.isnan(value) and day >= seen.get(video, -1):
+                    seen[video] = day
+                    out.setdefault(self.videos[video], {})[metric] = value
+        return {video_id: {metric: values.get(metric, NAN) for metric in metrics} for video_id, values in out.items()}
+
+    def phase_input(self, *, weeks: int = 8, end: Optional[date] = None, **fields: Any) -> PhaseEvaluationInput:
+        """Build a ``PhaseEvaluationInput`` from stored KPIs; source/incident fields come from ``fields``."""
+        end = end or date.today()
+        rollup = self.trailing_weeks(weeks, end)
+        published = fields.pop("published_videos", None)
+        return PhaseEvaluationInput(
+            published_videos=published if published is not None else self.published_videos(end),
+            ctr_weekly=_series(rollup, "impressions_ctr"),
+            avd_weekly=_series(rollup, "average_view_duration"),
+            geo_readiness_warning_count_weekly=[int(value) for value in _series(rollup, "geo_warnings")],
+            source_contract_ready=bool(fields.pop("source_contract_ready", False)),
+            source_linkage_pass_rate=float(fields.pop("source_linkage_pass_rate", 0.0)),
+            research_source_coverage=float(fields.pop("research_source_coverage", 0.0)),
+            incident_open=bool(fields.pop("incident_open", False)),
+            override_record=fields.pop("override_record", None),
+        )
+
+
+def _series(rollup: Dict[int, Dict[str, float]], metric: str) -> List[float]:
+    return [row[metric] for row in rollup.values() if not math.isnan(row[metric])]
+
+
+def pull_from_supabase(store: KpiStore, since: Optional[date] = None, page_size: int = 1000) -> int:
+    """Merge ``video_daily_metrics`` rows (see ``lib.analytics_sync``) into the local store."""
+    from .supabase_client import supabase
+
+    pulled = 0
+    offset = 0
+    while True:
+        query = supabase.table("video_daily_metrics").select("*")
+        if since is not None:
+            query = query.gte("metric_date", since.isoformat())
+        rows = query.order("metric_date").range(offset, offset + page_size - 1).execute().data or []
+        pulled += store.upsert(rows)
+        if len(rows) < page_size:
+            return pulled
+        offset += page_size
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local columnar KPI store for phase-policy inputs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    pull = sub.add_parser("pull", help="Merge video_daily_metrics from Supabase into the local store")
+    pull.add_argument("since", nargs="?", help="Only pull days on or after this date (YYYY-MM-DD)")
+    weekly = sub.add_parser("weekly", help="Print the channel weekly rollup")
+    weekly.add_argument("weeks", nargs="?", type=int, default=8)
+    phase = sub.add_parser("phase-input", help="Print a phase_state_report.py input built from stored KPIs")
+    phase.add_argument("--base", help="JSON with source/incident fields to merge (source_contract_ready, ...)")
+    phase.add_argument("--weeks", type=int, default=8)
+    phase.add_argument("--end", help="Last day to include (default: today)")
+    args = parser.parse_args()
+
+    if args.command == "pull":
+        with KpiStore.locked() as store:
+            pulled = pull_from_supabase(store, date.fromisoformat(args.since) if args.since else None)
+        print(f"✅ Merged {pulled} rows; store has {len(store)} rows for {len(store.videos)} videos.")
+        return 0
+    store = KpiStore()
+    if args.command == "weekly":
+        for week, row in store.trailing_weeks(args.weeks).items():
+            print(json.dumps({"week_start": week_start(week).isoformat(), **{k: None if math.isnan(v) else v for k, v in row.items()}}))
+        return 0
+
+    base = json.loads(Path(args.base).read_text(encoding="utf-8")) if args.base else {}
+    end = date.fromisoformat(args.end) if args.end else None
+    data = store.phase_input(weeks=args.weeks, end=end, **{key: value for key, value in base.items() if key in _PHASE_FIELDS})
+    payload = {**base, **asdict(data)}
+    print(json.dumps(payload, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
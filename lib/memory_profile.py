@@ -0,0 +1,176 @@
+"""Opt-in per-stage memory profiling with tracemalloc.
+
+Enable with ``python -m lib.pipeline_runner --url ... --memory-profile
+data/memory.json`` (also accepted with ``--worker``) or by wrapping code in
+``with memory_profiling(): ...``. While active, every ``_run_stage`` attempt
+and the scene/image/motion build record:
+
+- ``peak_bytes``: highest traced memory while the stage ran, relative to its start
+- ``retained_bytes``: traced memory still held after the stage returned
+- ``top_allocations``: allocation sites whose size grew the most during the stage
+
+Peak and retained bytes are also added to the stage's ``pipeline_runs``
+metrics next to ``latency_ms``. tracemalloc is process-wide, so with several
+worker threads running stages at once the per-stage figures overlap; profile
+with a single worker when sizing concurrency. Disabled profiling costs one
+global lookup per stage.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .serialization import dumps
+
+
+_IGNORED_FILES = (tracemalloc.__file__, "<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>", "<unknown>")
+
+
+class MemoryProfiler:
+    def __init__(self, top_n: int = 10) -> None:
+        self.top_n = top_n
+        self.records: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        # tracemalloc peak is global; stages measured concurrently share one reset.
+        self._stage_lock = threading.Lock()
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, pattern) for pattern in _IGNORED_FILES]
+        )
+
+    @contextmanager
+    def stage(self, name: str, **meta: Any) -> Iterator[Dict[str, Any]]:
+        """Measure the block; the yielded record is filled in when the block exits."""
+        record: Dict[str, Any] = {"stage": name, **meta}
+        with self._stage_lock:
+            before = self._snapshot()
+            start_bytes, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        start = time.monotonic()
+        try:
+            yield record
+        finally:
+            current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+            after = self._snapshot()
+            # compare_to orders by absolute change; drop shrinking sites before taking the top N.
+            growing = [stat for stat in after.compare_to(before, "lineno") if stat.size_diff > 0]
+            record.update(
+                latency_ms=int((time.monotonic() - start) * 1000),
+                peak_bytes=max(0, peak_bytes - start_bytes),
+                retained_bytes=current_bytes - start_bytes,
+                top_allocations=[
+                    {
+                        "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                        "size_diff_bytes": stat.size_diff,
+                        "count_diff": stat.count_diff,
+                    }
+                    for stat in growing[: self.top_n]
+                ],
+            )
+            with self._lock:
+                self.records.append(record)
+
+    def record_payloads(self, label: str, payloads: Dict[str, Any]) -> Dict[str, int]:
+        """Record the serialized size of each payload kept in memory (e.g. a run's result dict)."""
+        sizes = {key: len(dumps(value).encode("utf-8")) for key, value in payloads.items() if value is not None}
+        with self._lock:
+            self.records.append({"stage": label, "payload_bytes": dict(sorted(sizes.items(), key=lambda item: -item[1]))})
+        return sizes
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            records = list(self.records)
+        _, process_peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {"traced_peak_bytes": process_peak, "stages": records}
+
+    def export(self, path: Path) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.report(), ensure_ascii=False, indent=2), encoding="utf-8")
+        return path
+
+
+_active: Optional[MemoryProfiler] = None
+
+
+def active_profiler() -> Optional[MemoryProfiler]:
+    return _active
+
+
+@contextmanager
+def stage_memory(name: str, **meta: Any) -> Iterator[Optional[Dict[str, Any]]]:
+    """Profile the block when profiling is active; yields the record or None."""
+    profiler = _active
+    if profiler is None:
+        yield None
+        return
+    with profiler.stage(name, **meta) as record:
+        yield record
+
+
+def memory_metrics(record: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Run-log metric keys for a finished stage record (empty when profiling is off)."""
+    if not record or "peak_bytes" not in record:
+        return {}
+    return {"memory_peak_bytes": record["peak_bytes"], "memory_retained_bytes": record["retained_bytes"]}
+
+
+@contextmanager
+def memory_profiling(path: Optional[Path] = None, top_n: int = 10, frames: int = 1) -> Iterator[MemoryProfiler]:
+    """Start tracemalloc for the block and export the JSON report to ``path`` on exit."""
+    global _active
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(frames)
+    previous = _active
+    profiler = MemoryProfiler(top_n=top_n)
+    _active = profiler
+    try:
+        yield profiler
+    finally:
+        _active = previous
+        if path is not None:
+            profiler.export(path)
+        if started:
+            tracemalloc.stop()
+
+
+def _mib(value: int) -> str:
+    return f"{value / (1024 * 1024):.2f}"
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"{'stage':<24} {'latency_ms':>10} {'peak_MiB':>9} {'retained_MiB':>12}  top allocation site"]
+    payload_lines: List[str] = []
+    for record in report.get("stages", []):
+        if "payload_bytes" in record:
+            payload_lines.append(f"{record['stage']} payload sizes (MiB):")
+            payload_lines.extend(f"  {key:<22} {_mib(size):>9}" for key, size in record["payload_bytes"].items())
+            continue
+        top = record.get("top_allocations") or []
+        site = f"{top[0]['site']} (+{_mib(top[0]['size_diff_bytes'])} MiB)" if top else ""
+        label = record["stage"] + (f"#{record['attempt']}" if record.get("attempt", 1) > 1 else "")
+        lines.append(
+            f"{label[:24]:<24} {record['latency_ms']:>10} {_mib(record['peak_bytes']):>9} {_mib(record['retained_bytes']):>12}  {site}"
+        )
+    lines.append(f"Traced process peak: {_mib(report.get('traced_peak_bytes', 0))} MiB")
+    return "\n".join(lines + payload_lines)
+
+
+def main() -> int:
+    if len(sys.argv) != 2:
+        print("Usage: python -m lib.memory_profile <memory_report.json>", file=sys.stderr)
+        return 1
+    print(format_report(json.loads(Path(sys.argv[1]).read_text(encoding="utf-8"))))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
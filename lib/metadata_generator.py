@@ -8,8 +8,7 @@ import sys
 from pathlib import Path
 from typing import Any, Dict, List
 
-from dotenv import load_dotenv
-
+from .env_utils import load_project_env
 from .json_utils import ensure_schema_version, parse_json_with_repair
 from .model_router import ModelRouter
 from .run_logger import build_metrics, emit_run_log
@@ -157,7 +156,7 @@ def main() -> int:
 
     plan_path = Path(sys.argv[1])
     script_path = Path(sys.argv[2])
-    load_dotenv()
+    load_project_env()
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
         print("Missing GEMINI_API_KEY in environment.", file=sys.stderr)
@@ -0,0 +1,286 @@
+"""In-process metrics registry with OpenMetrics text exposition.
+
+Counters, gauges and histograms live in one process-wide registry fed by
+``_run_stage``, ``ModelRouter``, the run logger and artifact storage. Expose
+them to Prometheus either by scraping:
+
+- ``GET /metrics`` on the pipeline daemon, or
+- ``python -m lib.pipeline_runner --worker --metrics-port 9464``
+
+or through node_exporter's textfile collector by setting
+``METRICS_TEXTFILE=/var/lib/node_exporter/textfile/pipeline.prom``; the file is
+rewritten atomically after every stage attempt and every finished job. Scrapes
+get OpenMetrics; the textfile uses the Prometheus 0.0.4 text format that
+node_exporter parses (counter families named ``*_total``, no ``# EOF``).
+"""
+
+from __future__ import annotations
+
+import math
+from abc import ABC, abstractmethod
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+TEXTFILE_ENV = "METRICS_TEXTFILE"
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    kind = "unknown"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelKey:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {list(self.labelnames)}, got {sorted(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _header(self, family: Optional[str] = None) -> List[str]:
+        family = family or self.name
+        return [f"# TYPE {family} {self.kind}", f"# HELP {family} {_escape(self.help)}"]
+
+    @abstractmethod
+    def render(self, openmetrics: bool = True) -> List[str]:
+        """Exposition lines; ``openmetrics=False`` renders Prometheus text format 0.0.4."""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase.")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self, openmetrics: bool = True) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        # Prometheus 0.0.4 matches TYPE/HELP to the sample name, which carries the _total suffix.
+        lines = self._header() if openmetrics else self._header(f"{self.name}_total")
+        lines.extend(f"{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items)
+        return lines
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    @contextmanager
+    def track_inprogress(self, **labels: Any) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def render(self, openmetrics: bool = True) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = self._header()
+        lines.extend(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items)
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Per label set: [bucket counts (non-cumulative)..., sum, count]
+        self._values: Dict[LabelKey, List[float]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            state = self._values.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - start, **labels)
+
+    def count(self, **labels: Any) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return int(state[-1]) if state else 0
+
+    def render(self, openmetrics: bool = True) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        lines = self._header()
+        for key, state in items:
+            cumulative = 0.0
+            for bound, bucket_count in zip(self.buckets, state):
+                cumulative += bucket_count
+                le = ("le", "+Inf" if math.isinf(bound) else repr(float(bound)))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state[-2])}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered with a different shape.")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self, openmetrics: bool = True) -> str:
+        """OpenMetrics text (``CONTENT_TYPE``), or Prometheus text format 0.0.4 with ``openmetrics=False``."""
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render(openmetrics))
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: Path) -> Path:
+        """Atomically replace ``path`` so the textfile collector never reads a partial file."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(self.render(openmetrics=False), encoding="utf-8")
+        tmp_path.replace(path)
+        return path
+
+
+REGISTRY = Registry()
+
+STAGE_IN_PROGRESS = REGISTRY.gauge("pipeline_stage_in_progress", "Stage attempts currently executing.", ["stage"])
+STAGE_ATTEMPTS = REGISTRY.counter("pipeline_stage_attempts", "Stage attempts by outcome.", ["stage", "status"])
+STAGE_DURATION = REGISTRY.histogram("pipeline_stage_duration_seconds", "Stage attempt latency.", ["stage", "status"])
+LLM_REQUESTS = REGISTRY.counter("llm_requests", "Model calls by outcome (success / unavailable / error).", ["model", "outcome"])
+LLM_DURATION = REGISTRY.histogram("llm_request_duration_seconds", "Model call latency.", ["model"])
+RUN_LOG_RECORDS = REGISTRY.counter("run_log_records", "Run-log records emitted.", ["stage", "status", "cache"])
+RUN_LOG_SPILLS = REGISTRY.counter("run_log_spills", "Run-log records spilled locally after a failed insert.")
+ARTIFACT_WRITES = REGISTRY.counter("artifact_writes", "Artifact saves by result (written / unchanged / stored).", ["kind", "result"])
+ARTIFACT_BYTES = REGISTRY.counter("artifact_written_bytes", "Bytes written for changed artifacts.", ["kind"])
+QUEUE_DEPTH = REGISTRY.gauge("pipeline_job_queue_jobs", "Jobs in the durable queue by status.", ["status"])
+
+
+def flush_textfile() -> Optional[Path]:
+    """Write the registry to ``METRICS_TEXTFILE`` when configured (never raises)."""
+    raw = os.getenv(TEXTFILE_ENV, "").strip()
+    if not raw:
+        return None
+    try:
+        return REGISTRY.write_textfile(Path(raw))
+    except OSError as exc:
+        print(f"Metrics textfile write failed: {exc}", file=sys.stderr)
+        return None
+
+
+def update_queue_depth(stats: Dict[str, int]) -> None:
+    for status in ("queued", "leased", "done", "dead"):
+        QUEUE_DEPTH.set(stats.get(status, 0), status=status)
+
+
+def start_http_server(host: str = "127.0.0.1", port: int = 9464, registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """Serve ``GET /metrics`` from a daemon thread and return the server."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            return
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
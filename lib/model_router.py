@@ -7,7 +7,9 @@ import time
 from dataclasses import dataclass
 from typing import Iterable, List
 
-from google.genai import Client
+from .env_utils import load_project_env
+from .metrics import LLM_DURATION, LLM_REQUESTS
+from .tracing import span
 
 
 DEFAULT_GEMINI_MODELS = [
@@ -28,6 +30,7 @@ class ModelRouter:
 
     @classmethod
     def from_env(cls, api_key_env: str = "GEMINI_API_KEY") -> "ModelRouter":
+        load_project_env()
         api_key = os.getenv(api_key_env)
         if not api_key:
             raise ValueError(f"Missing {api_key_env} in environment.")
@@ -35,6 +38,8 @@ class ModelRouter:
         return cls(api_key=api_key, models=models)
 
     def generate_content(self, prompt: str, preferred_models: Iterable[str] | None = None) -> str:
+        from google.genai import Client
+
         client = Client(api_key=self.api_key)
         last_error: Exception | None = None
         model_sequence: List[str] = []
@@ -47,12 +52,16 @@ class ModelRouter:
                     print(f"⏳ Gemini is busy (503). Retrying in {wait_s} seconds...")
                     time.sleep(wait_s)
                 try:
-                    response = client.models.generate_content(model=model, contents=prompt)
+                    with span(f"llm:{model}", cat="llm", wait_s=wait_s), LLM_DURATION.time(model=model):
+                        response = client.models.generate_content(model=model, contents=prompt)
+                    LLM_REQUESTS.inc(model=model, outcome="success")
                     return response.text
                 except Exception as exc:
                     last_error = exc
                     if _is_503_error(exc):
+                        LLM_REQUESTS.inc(model=model, outcome="unavailable")
                         continue
+                    LLM_REQUESTS.inc(model=model, outcome="error")
                     break
         raise RuntimeError(f"All Gemini models failed. Last error: {last_error}")
 
@@ -8,7 +8,9 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict
 
+from .env_utils import load_project_env
 from .run_logger import build_metrics, emit_run_log
+from .storage_utils import load_json
 from .supabase_client import supabase
 
 
@@ -53,7 +55,7 @@ def publish_video(payload: Dict[str, Any]) -> Dict[str, Any]:
         from .youtube_uploader import upload_video
 
         upload_result = upload_video(
-            metadata=json.loads(Path(payload["metadata_path"]).read_text(encoding="utf-8")),
+            metadata=load_json(Path(payload["metadata_path"])),
             video_path=Path(payload["video_path"]),
             privacy_status=payload.get("privacy_status", "private"),
             notify_subscribers=payload.get("notify_subscribers", False),
@@ -98,6 +100,7 @@ def publish_video(payload: Dict[str, Any]) -> Dict[str, Any]:
 
 
 def main() -> int:
+    load_project_env()
     if len(sys.argv) < 3:
         print(
             "Usage: python -m lib.ops <publish|log_experiment> <json_path>",
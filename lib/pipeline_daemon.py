@@ -0,0 +1,301 @@
+"""Long-lived pipeline worker exposing a local HTTP job API.
+
+Start with ``python -m lib.pipeline_runner --daemon`` (or ``python -m
+lib.pipeline_daemon``). The process imports the pipeline and builds the
+Supabase client, compiled schemas, policy and style config once and keeps them
+warm across jobs, so a scheduler pays import and client start-up cost only when
+the daemon starts. Stage agents hold per-run state and model clients, so each
+worker thread builds its own set on its first job and reuses it afterwards.
+
+Finished jobs stay queryable for ``PIPELINE_DAEMON_JOB_TTL_S`` seconds (default
+3600), and at most ``PIPELINE_DAEMON_MAX_FINISHED`` of them (default 1000) are
+kept, so a long-lived daemon does not grow without bound.
+
+Endpoints (JSON, bound to localhost by default):
+
+- ``POST /jobs`` with ``{"video": "<url or id>", "refresh": false, "render_views": true, "validate": false}``
+- ``GET /jobs`` and ``GET /jobs/<job_id>`` for status
+- ``GET /health``
+- ``GET /geo-readiness`` (current GEO escalation level, see ``lib.geo_readiness_tracker``)
+- ``GET /metrics`` (OpenMetrics text, see ``lib.metrics``)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+from .env_utils import load_project_env
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY
+from .storage_utils import normalize_video_id
+
+
+WORKERS_ENV = "PIPELINE_DAEMON_WORKERS"
+JOB_TTL_ENV = "PIPELINE_DAEMON_JOB_TTL_S"
+MAX_FINISHED_ENV = "PIPELINE_DAEMON_MAX_FINISHED"
+_ACTIVE_STATUSES = {"queued", "running"}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _default_runner(spec: Dict[str, Any]) -> Dict[str, Any]:
+    from .pipeline_runner import PipelineAgents, run_pipeline, write_run_manifest
+    from .validation_runner import _record_geo_warnings, validate_all
+
+    agents = _warm_agents(PipelineAgents.create)
+    result = run_pipeline(
+        spec["video"],
+        refresh=spec.get("refresh", False),
+        render_views=spec.get("render_views", True),
+        agents=agents,
+    )
+    write_run_manifest(result)
+    summary = {"run_id": result.get("run_id"), "video_id": result["video_id"]}
+    if spec.get("validate"):
+        warnings = validate_all(result["video_id"])
+        status = _record_geo_warnings({result["video_id"]: len(warnings)})
+        summary["geo_readiness_level"] = status["level"] if status else None
+    return summary
+
+
+_local = threading.local()
+
+
+def _warm_agents(factory: Callable[[], Any]) -> Any:
+    """Agents for the calling worker thread; agents are never shared between concurrent runs."""
+    agents = getattr(_local, "agents", None)
+    if agents is None:
+        agents = _local.agents = factory()
+    return agents
+
+
+def _env_number(name: str, default: float) -> float:
+    raw = os.getenv(name, "").strip()
+    try:
+        value = float(raw)
+    except ValueError:
+        return default
+    return value if value >= 0 else default
+
+
+class PipelineDaemon:
+    """Job registry plus worker pool; one active job per video at a time."""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        runner: Callable[[Dict[str, Any]], Dict[str, Any]] = _default_runner,
+        *,
+        job_ttl_s: Optional[float] = None,
+        max_finished: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        raw_workers = os.getenv(WORKERS_ENV, "")
+        self.max_workers = max_workers or (int(raw_workers) if raw_workers.isdigit() and int(raw_workers) > 0 else 1)
+        self.runner = runner
+        self.job_ttl_s = job_ttl_s if job_ttl_s is not None else _env_number(JOB_TTL_ENV, 3600.0)
+        self.max_finished = max_finished if max_finished is not None else int(_env_number(MAX_FINISHED_ENV, 1000))
+        self._clock = clock
+        self.started_at = time.monotonic()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        # Finished job IDs in finish order, with the monotonic time they finished.
+        self._finished: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline-worker")
+
+    def submit(self, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a job, or return the active job for the same video instead of duplicating it."""
+        video = str(spec.get("video") or "").strip()
+        if not video:
+            raise ValueError("Job requires a 'video' URL or ID.")
+        video_id = normalize_video_id(video)
+        with self._lock:
+            self._prune_locked()
+            for job in self._jobs.values():
+                if job["video_id"] == video_id and job["status"] in _ACTIVE_STATUSES:
+                    return dict(job)
+            job_id = str(uuid.uuid4())
+            job = {
+                "job_id": job_id,
+                "video_id": video_id,
+                "spec": {
+                    "video": video,
+                    "refresh": bool(spec.get("refresh", False)),
+                    "render_views": bool(spec.get("render_views", True)),
+                    "validate": bool(spec.get("validate", False)),
+                },
+                "status": "queued",
+                "submitted_at": _now(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None,
+            }
+            self._jobs[job_id] = job
+            snapshot = dict(job)
+        self._executor.submit(self._run, job_id)
+        return snapshot
+
+    def _run(self, job_id: str) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job["status"] = "running"
+            job["started_at"] = _now()
+            spec = dict(job["spec"])
+        try:
+            result = self.runner(spec)
+        except BaseException as exc:  # SystemExit from stage code must not kill the worker.
+            traceback.print_exc(file=sys.stderr)
+            with self._lock:
+                job.update(status="failed", error=str(exc) or type(exc).__name__, finished_at=_now())
+                self._finished[job_id] = self._clock()
+            return
+        with self._lock:
+            job.update(status="succeeded", result=result, finished_at=_now())
+            self._finished[job_id] = self._clock()
+
+    def _prune_locked(self) -> None:
+        """Evict finished jobs past the TTL, then the oldest beyond the cap (caller holds the lock)."""
+        cutoff = self._clock() - self.job_ttl_s
+        while self._finished:
+            job_id, finished = next(iter(self._finished.items()))
+            if finished > cutoff and len(self._finished) <= self.max_finished:
+                break
+            del self._finished[job_id]
+            self._jobs.pop(job_id, None)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._prune_locked()
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._prune_locked()
+            return [dict(job) for job in self._jobs.values()]
+
+    def health(self) -> Dict[str, Any]:
+        with self._lock:
+            self._prune_locked()
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {
+            "status": "ok",
+            "uptime_s": round(time.monotonic() - self.started_at, 3),
+            "workers": self.max_workers,
+            "jobs": counts,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+def _make_handler(daemon: PipelineDaemon) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, payload: Any) -> None:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            if self.path == "/metrics":
+                body = REGISTRY.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", METRICS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            elif self.path == "/health":
+                self._send(200, daemon.health())
+            elif self.path == "/geo-readiness":
+                from .geo_readiness_tracker import current_status
+
+                self._send(200, current_status())
+            elif self.path == "/jobs":
+                self._send(200, daemon.list_jobs())
+            elif self.path.startswith("/jobs/"):
+                job = daemon.get(self.path[len("/jobs/"):])
+                self._send(200 if job else 404, job or {"error": "unknown job"})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self) -> None:
+            if self.path != "/jobs":
+                self._send(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                if length < 0:
+                    raise ValueError("Content-Length must not be negative.")
+                spec = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(spec, dict):
+                    raise ValueError("Job body must be a JSON object.")
+                job = daemon.submit(spec)
+            except ValueError as exc:
+                self._send(400, {"error": str(exc)})
+                return
+            self._send(202, job)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            print(f"[daemon] {self.address_string()} {format % args}", file=sys.stderr)
+
+    return Handler
+
+
+def make_server(daemon: PipelineDaemon, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    return ThreadingHTTPServer((host, port), _make_handler(daemon))
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, max_workers: Optional[int] = None) -> int:
+    daemon = PipelineDaemon(max_workers=max_workers)
+    # Warm the expensive state up front so the first job does not pay for it.
+    from .pipeline_runner import PipelineAgents, _load_visual_style_config
+    from .policy_engine import get_policy
+    from .schema_validator import SCHEMA_DIR, get_validator
+
+    # Agents are per worker thread (built on each worker's first job); building one throwaway set here
+    # still pays the SDK imports and env loading up front.
+    PipelineAgents.create()
+    _load_visual_style_config()
+    for schema_path in SCHEMA_DIR.glob("*.schema.json"):
+        get_validator(schema_path.name[: -len(".schema.json")])
+    get_policy()
+    server = make_server(daemon, host, port)
+    print(f"✅ Pipeline daemon listening on http://{host}:{server.server_address[1]} ({daemon.max_workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        daemon.shutdown(wait=True)
+    return 0
+
+
+def main() -> int:
+    load_project_env()
+    args = sys.argv[1:]
+    host = args[0] if len(args) > 0 else "127.0.0.1"
+    port = int(args[1]) if len(args) > 1 and args[1].isdigit() else 8765
+    return serve(host=host, port=port)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,21 +5,50 @@ from __future__ import annotations
 import argparse
 import hashlib
 import json
+import os
 import signal
+import socket
+import threading
 import time
 import re
+from contextlib import ExitStack
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Callable, Dict, Optional, Tuple
+from typing import Any, Callable, Dict, Optional, Set, Tuple
 
+from .env_utils import load_project_env
+from .job_queue import DEFAULT_LEASE_SECONDS, LeaseKeeper, LeaseLost, get_job_queue
 from .json_utils import extract_json_relaxed, recover_script_payload
+from .memory_profile import active_profiler, format_report, memory_metrics, memory_profiling, stage_memory
 from .metadata_generator import generate_metadata
+from .metrics import (
+    STAGE_ATTEMPTS,
+    STAGE_DURATION,
+    STAGE_IN_PROGRESS,
+    flush_textfile,
+    start_http_server as start_metrics_server,
+    update_queue_depth,
+)
 from .planner import ContentPlanner
 from .researcher import VideoResearcher
 from .scripter import ContentScripter
 from .run_logger import build_metrics, emit_run_log
-from .storage_utils import normalize_video_id, save_json, load_json, ensure_data_dir, save_markdown
+from .storage_utils import (
+    artifact_exists,
+    artifact_transaction,
+    delete_artifact,
+    ensure_data_dir,
+    load_json,
+    load_raw,
+    normalize_video_id,
+    save_json,
+    save_markdown,
+)
 from .supabase_client import supabase
 from .schema_validator import validate_payload
+from .run_journal import RunJournal, journal_inputs
+from .serialization import SerializedPayload
+from .tracing import format_summary, span, summarize, traced, tracing
 from .validation_runner import validate_all
 from .validator import ScriptValidator
 from .ops import log_experiment
@@ -230,6 +259,9 @@ def _build_image_prompt(visual_text: str) -> str:
     return _build_image_prompt_with_context(visual_text, {})
 
 
+_visual_style_cache: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
+
 def _load_visual_style_config() -> Dict[str, Any]:
     default = {
         "active_style": "isometric_3d",
@@ -250,8 +282,13 @@ def _load_visual_style_config() -> Dict[str, Any]:
         },
     }
     config_path = Path(__file__).resolve().parent.parent / "config" / "visual_style.json"
-    if not config_path.exists():
+    try:
+        mtime_ns = config_path.stat().st_mtime_ns
+    except OSError:
         return default
+    cached = _visual_style_cache.get(str(config_path))
+    if cached and cached[0] == mtime_ns:
+        return cached[1]
     try:
         loaded = json.loads(config_path.read_text(encoding="utf-8"))
     except Exception:
@@ -259,7 +296,10 @@ def _load_visual_style_config() -> Dict[str, Any]:
     active_style = loaded.get("active_style", default["active_style"])
     styles = loaded.get("styles", {})
     merged_styles = {**default["styles"], **styles}
-    return {"active_style": active_style, "styles": merged_styles}
+    config = {"active_style": active_style, "styles": merged_styles}
+    # Long-lived workers re-read the file only when it changes on disk.
+    _visual_style_cache[str(config_path)] = (mtime_ns, config)
+    return config
 
 
 def _extract_numeric_overlays(research_payload: Dict[str, Any], narration_text: str = "", limit: int = 3) -> list[str]:
@@ -324,11 +364,13 @@ def _build_image_prompt_with_context(visual_text: str, research_payload: Dict[st
     return f"{style_prompt}. {base}. minimalist professional finance aesthetic.".strip()
 
 
+@traced()
 def _scene_hash(script_payload: Dict[str, Any], style_key: str) -> str:
     base = f"{_normalize_script_text(script_payload)}::{style_key}::{SCENE_ENGINE_VERSION}"
     return hashlib.sha256(base.encode("utf-8")).hexdigest()
 
 
+@traced()
 def _build_scene_output_from_script(
     script_payload: Dict[str, Any],
     research_payload: Dict[str, Any] | None = None,
@@ -601,6 +643,7 @@ def _extract_section_beats(script_payload: Dict[str, Any]) -> list[Dict[str, str
     return beats
 
 
+@traced()
 def _ensure_scene_granularity(
     scene_output: Dict[str, Any],
     script_payload: Dict[str, Any],
@@ -646,6 +689,7 @@ def _ensure_scene_granularity(
     return scene_output
 
 
+@traced()
 def _render_research_markdown(research_payload: Dict[str, Any]) -> str:
     key_facts = research_payload.get("key_facts", [])
     key_fact_sources = research_payload.get("key_fact_sources", [])
@@ -688,6 +732,7 @@ def _render_research_markdown(research_payload: Dict[str, Any]) -> str:
     return "\n".join(lines)
 
 
+@traced()
 def _render_plan_markdown(plan_payload: Dict[str, Any]) -> str:
     lines = ["# Plan Summary", ""]
     lines.append(f"**Topic:** {plan_payload.get('topic', '')}")
@@ -718,6 +763,7 @@ def _render_plan_markdown(plan_payload: Dict[str, Any]) -> str:
     return "\n".join(lines)
 
 
+@traced()
 def _render_scenes_markdown(scene_output: Dict[str, Any]) -> str:
     lines = ["# Scene Structure", ""]
     lines.append("| Scene ID | Start (sec) | End (sec) | Objective | Script Refs | Transition |")
@@ -735,6 +781,7 @@ def _render_scenes_markdown(scene_output: Dict[str, Any]) -> str:
     return "\n".join(lines)
 
 
+@traced()
 def _render_script_markdown(script_payload: Dict[str, Any], shorts_payload: Dict[str, Any] | None) -> str:
     shorts_script = ""
     if shorts_payload:
@@ -747,6 +794,7 @@ def _render_script_markdown(script_payload: Dict[str, Any], shorts_payload: Dict
     )
 
 
+@traced()
 def _canonicalize_research_payload(research_payload: Dict[str, Any]) -> Dict[str, Any]:
     key_facts = research_payload.get("key_facts", [])
     key_fact_sources = research_payload.get("key_fact_sources", [])
@@ -770,10 +818,11 @@ def _is_placeholder_script(script_payload: Dict[str, Any]) -> bool:
 def _should_regenerate_scenes(
     cached_scene: Dict[str, Any] | None,
     script_payload: Dict[str, Any],
+    expected_hash: str | None = None,
 ) -> bool:
     if not cached_scene:
         return True
-    expected_hash = _scene_hash(script_payload, "scene-structure")
+    expected_hash = expected_hash or _scene_hash(script_payload, "scene-structure")
     cached_hash = str(cached_scene.get("source_script_hash", ""))
     cached_version = str(cached_scene.get("scene_engine_version", ""))
     runtime_sec = _estimate_runtime_seconds_from_script(script_payload)
@@ -794,6 +843,12 @@ def _log_run_id(root_run_id: str, stage: str, attempt: int) -> str:
     return f"{root_run_id}:{stage}:{attempt}"
 
 
+def _record_stage_metrics(stage: str, status: str, latency_ms: int) -> None:
+    STAGE_ATTEMPTS.inc(stage=stage, status=status)
+    STAGE_DURATION.observe(latency_ms / 1000, stage=stage, status=status)
+    flush_textfile()
+
+
 def _run_stage(
     *,
     stage: str,
@@ -806,19 +861,29 @@ def _run_stage(
     last_error: Optional[Exception] = None
     for attempt in range(1, max_retries + 1):
         start_time = time.monotonic()
+        memory_record: Optional[Dict[str, Any]] = None
         try:
-            result = action()
+            with (
+                span(f"stage:{stage}", cat="llm_stage", attempt=attempt),
+                STAGE_IN_PROGRESS.track_inprogress(stage=stage),
+                stage_memory(stage, attempt=attempt) as memory_record,
+            ):
+                result = action()
             latency_ms = int((time.monotonic() - start_time) * 1000)
+            _record_stage_metrics(stage, "success", latency_ms)
             emit_run_log(
                 stage=stage,
                 status="success",
                 input_refs={**input_refs, "root_run_id": run_id},
                 output_refs={"status": "completed"},
-                metrics=build_metrics(
-                    latency_ms=latency_ms,
-                    cache_hit=False,
-                    retry_count=attempt - 1,
-                ),
+                metrics={
+                    **build_metrics(
+                        latency_ms=latency_ms,
+                        cache_hit=False,
+                        retry_count=attempt - 1,
+                    ),
+                    **memory_metrics(memory_record),
+                },
                 attempts=attempt,
                 run_id=_log_run_id(run_id, stage, attempt),
             )
@@ -826,16 +891,20 @@ def _run_stage(
         except Exception as exc:
             last_error = exc
             latency_ms = int((time.monotonic() - start_time) * 1000)
+            _record_stage_metrics(stage, "failure", latency_ms)
             emit_run_log(
                 stage=stage,
                 status="failure",
                 input_refs={**input_refs, "root_run_id": run_id},
                 error_summary=str(exc),
-                metrics=build_metrics(
-                    latency_ms=latency_ms,
-                    cache_hit=False,
-                    retry_count=attempt - 1,
-                ),
+                metrics={
+                    **build_metrics(
+                        latency_ms=latency_ms,
+                        cache_hit=False,
+                        retry_count=attempt - 1,
+                    ),
+                    **memory_metrics(memory_record),
+                },
                 attempts=attempt,
                 run_id=_log_run_id(run_id, stage, attempt),
             )
@@ -858,15 +927,16 @@ _STAGE_SCHEMA = {
 }
 
 
+@traced()
 def _load_stage_payload(stage: str, video_id: str) -> Optional[Dict[str, Any]]:
     data_dir = ensure_data_dir()
     path = data_dir / f"{video_id}_{stage}.json"
-    if path.exists():
+    if artifact_exists(path):
         try:
             payload = load_json(path)
         except json.JSONDecodeError:
             print(f"⚠️ Corrupted JSON detected for {stage}. Regenerating.")
-            path.unlink(missing_ok=True)
+            delete_artifact(path)
             return None
         schema_name = _STAGE_SCHEMA.get(stage)
         if schema_name:
@@ -874,57 +944,120 @@ def _load_stage_payload(stage: str, video_id: str) -> Optional[Dict[str, Any]]:
                 scenes = payload.get("scenes", [])
                 if not scenes:
                     print(f"⚠️ Invalid scene payload for {stage}. Regenerating.")
-                    path.unlink(missing_ok=True)
+                    delete_artifact(path)
                     return None
                 try:
                     for scene in scenes:
                         validate_payload(schema_name, scene)
                 except Exception:
                     print(f"⚠️ Schema validation failed for {stage}. Regenerating.")
-                    path.unlink(missing_ok=True)
+                    delete_artifact(path)
                     return None
             elif stage == "image":
                 images = payload.get("images", [])
                 if not images:
                     print(f"⚠️ Invalid image payload for {stage}. Regenerating.")
-                    path.unlink(missing_ok=True)
+                    delete_artifact(path)
                     return None
                 try:
                     for image in images:
                         validate_payload(schema_name, image)
                 except Exception:
                     print(f"⚠️ Schema validation failed for {stage}. Regenerating.")
-                    path.unlink(missing_ok=True)
+                    delete_artifact(path)
                     return None
             elif stage == "motion":
                 motions = payload.get("motions", [])
                 if not motions:
                     print(f"⚠️ Invalid motion payload for {stage}. Regenerating.")
-                    path.unlink(missing_ok=True)
+                    delete_artifact(path)
                     return None
                 try:
                     for motion in motions:
                         validate_payload(schema_name, motion)
                 except Exception:
                     print(f"⚠️ Schema validation failed for {stage}. Regenerating.")
-                    path.unlink(missing_ok=True)
+                    delete_artifact(path)
                     return None
             else:
                 try:
                     validate_payload(schema_name, payload)
                 except Exception:
                     print(f"⚠️ Schema validation failed for {stage}. Regenerating.")
-                    path.unlink(missing_ok=True)
+                    delete_artifact(path)
                     return None
         return payload
     return None
 
 
-def run_pipeline(video_input: str, refresh: bool = False) -> Dict[str, Any]:
+@traced()
+def _flush_markdown_views(video_id: str, views: Dict[str, Callable[[], str]]) -> None:
+    """Render queued markdown views once, off the stage critical path."""
+    if not views:
+        return
+    with artifact_transaction():
+        for stage, render in views.items():
+            save_markdown(stage, video_id, render())
+    views.clear()
+
+
+def render_markdown_views(video_id: str) -> list[str]:
+    """Rebuild markdown views on demand from the stored stage JSON artifacts."""
+    data_dir = ensure_data_dir()
+
+    def _stored(stage: str) -> Optional[Dict[str, Any]]:
+        path = data_dir / f"{video_id}_{stage}.json"
+        return load_json(path) if artifact_exists(path) else None
+
+    views: Dict[str, Callable[[], str]] = {}
+    research_payload = _stored("research")
+    if research_payload:
+        views["research"] = lambda: _render_research_markdown(research_payload)
+    plan_payload = _stored("plan")
+    if plan_payload:
+        views["plan"] = lambda: _render_plan_markdown(plan_payload)
+    script_payload = _stored("script_long") or _stored("script")
+    if script_payload:
+        shorts_payload = _stored("script_shorts")
+        views["script"] = lambda: _render_script_markdown(script_payload, shorts_payload)
+    scene_output = _stored("scenes")
+    if scene_output:
+        views["scenes"] = lambda: _render_scenes_markdown(scene_output)
+    rendered = list(views)
+    _flush_markdown_views(video_id, views)
+    return rendered
+
+
+@dataclass
+class PipelineAgents:
+    """Model-backed stage agents; build once and reuse across runs in long-lived workers."""
+
+    researcher: VideoResearcher
+    planner: ContentPlanner
+    scripter: ContentScripter
+
+    @classmethod
+    def create(cls) -> "PipelineAgents":
+        return cls(researcher=VideoResearcher(), planner=ContentPlanner(), scripter=ContentScripter())
+
+
+@traced("run_pipeline", cat="pipeline")
+def run_pipeline(
+    video_input: str,
+    refresh: bool = False,
+    render_views: bool = True,
+    agents: Optional[PipelineAgents] = None,
+    stage_listener: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Run every stage for one video.
+
+    ``stage_listener(stage, payload)`` is called as each stage output becomes final.
+    """
     video_id = normalize_video_id(video_input)
-    researcher = VideoResearcher()
-    planner = ContentPlanner()
-    scripter = ContentScripter()
+    agents = agents or PipelineAgents.create()
+    researcher = agents.researcher
+    planner = agents.planner
+    scripter = agents.scripter
     run_id = emit_run_log(
         stage="orchestrator",
         status="success",
@@ -935,39 +1068,101 @@ def run_pipeline(video_input: str, refresh: bool = False) -> Dict[str, Any]:
 
     validation_report = None
     state: Dict[str, Any] = {}
+    # Markdown views are queued per stage and rendered once when the run settles.
+    views: Dict[str, Callable[[], str]] = {}
+    data_dir = ensure_data_dir()
+    journal = RunJournal(data_dir, video_id)
+    if refresh:
+        journal.reset(run_id)
+
+    # Stages this run did not produce: resumed artifacts, and research a background refresh may rewrite.
+    reused: Set[str] = set()
+
+    def _load_verified(
+        stage: str,
+        input_hash: str,
+        legacy: Optional[Callable[[], Optional[Dict[str, Any]]]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        if refresh:
+            return None
+        with span(f"resume:{stage}", cat="io"):
+            if journal.latest(stage) is None:
+                # Never journaled (older runs): fall back to the artifact cache heuristics.
+                return (legacy or (lambda: _load_stage_payload(stage, video_id)))()
+            path = data_dir / f"{video_id}_{stage}.json"
+            if not artifact_exists(path):
+                return None
+            try:
+                payload = load_json(path)
+            except json.JSONDecodeError:
+                return None
+            return payload if journal.verify(stage, input_hash, payload) else None
+
+    def _resume(
+        stage: str,
+        input_hash: str,
+        legacy: Optional[Callable[[], Optional[Dict[str, Any]]]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Return the stored artifact only if the journal verifies it for these inputs."""
+        payload = _load_verified(stage, input_hash, legacy)
+        if payload is not None:
+            reused.add(stage)
+        return payload
+
+    stage_inputs: Dict[str, str] = {}
+
+    def _persist(stage: str, payload: Dict[str, Any], serialized: Optional[SerializedPayload] = None) -> None:
+        """Save a stage artifact, then journal it (artifact first, so the journal never runs ahead)."""
+        serialized = serialized or SerializedPayload(payload)
+        with span(f"persist:{stage}", cat="io"), artifact_transaction():
+            if stage == "script_long":
+                save_json("script", video_id, serialized)
+            save_json(stage, video_id, serialized)
+        entry = journal.latest(stage)
+        if not entry or entry["output_hash"] != serialized.sha256 or entry["input_hash"] != stage_inputs[stage]:
+            journal.record(stage, run_id=run_id, input_hash=stage_inputs[stage], output_hash=serialized.sha256)
+
+    def _complete(
+        stage: str,
+        payload: Dict[str, Any],
+        input_hash: str,
+        serialized: Optional[SerializedPayload] = None,
+    ) -> None:
+        stage_inputs[stage] = input_hash
+        _persist(stage, payload, serialized)
+        state[stage] = payload
+        if stage_listener:
+            stage_listener(stage, payload)
+
+    def _settle_views() -> None:
+        if render_views:
+            _flush_markdown_views(video_id, views)
 
     def _checkpoint_state() -> None:
-        if state.get("research"):
-            save_json("research", video_id, state["research"])
-        if state.get("plan"):
-            save_json("plan", video_id, state["plan"])
-        if state.get("scenes"):
-            save_json("scenes", video_id, state["scenes"])
-        if state.get("image"):
-            save_json("image", video_id, state["image"])
-        if state.get("motion"):
-            save_json("motion", video_id, state["motion"])
-        if state.get("script_long"):
-            save_json("script", video_id, state["script_long"])
-            save_json("script_long", video_id, state["script_long"])
-        if state.get("script_shorts"):
-            save_json("script_shorts", video_id, state["script_shorts"])
-        if state.get("metadata"):
-            save_json("metadata", video_id, state["metadata"])
+        # Later stages may normalize payloads this run produced in place; re-journal anything that changed.
+        # Reused stages are left alone so a stale copy never overwrites a newer artifact (e.g. refreshed research).
+        with artifact_transaction():
+            for stage, payload in state.items():
+                if payload and stage not in reused:
+                    _persist(stage, payload)
 
     def _handle_signal(_signum, _frame) -> None:
         _checkpoint_state()
+        _settle_views()
         raise SystemExit("Graceful shutdown: checkpoints saved.")
 
-    signal.signal(signal.SIGINT, _handle_signal)
-    signal.signal(signal.SIGTERM, _handle_signal)
+    # Daemon workers run on pool threads, where signal handlers cannot be installed.
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGINT, _handle_signal)
+        signal.signal(signal.SIGTERM, _handle_signal)
     try:
         script_updated = False
-        cached_research = None if refresh else _load_stage_payload("research", video_id)
+        research_inputs = journal_inputs(video_id=video_id)
+        cached_research = _resume("research", research_inputs)
         if cached_research:
             research_payload = cached_research
             research_payload = _canonicalize_research_payload(research_payload)
-            save_markdown("research", video_id, _render_research_markdown(research_payload))
+            views["research"] = lambda payload=research_payload: _render_research_markdown(payload)
         else:
             research_text, _ = _run_stage(
                 stage="research",
@@ -977,14 +1172,19 @@ def run_pipeline(video_input: str, refresh: bool = False) -> Dict[str, Any]:
             )
             research_payload = _parse_payload(research_text)
             research_payload = _canonicalize_research_payload(research_payload)
-            save_json("research", video_id, research_payload)
-            save_markdown("research", video_id, _render_research_markdown(research_payload))
-        state["research"] = research_payload
-
-        cached_plan = None if refresh else _load_stage_payload("plan", video_id)
+            views["research"] = lambda payload=research_payload: _render_research_markdown(payload)
+        _complete("research", research_payload, research_inputs)
+        # Stale research is served now; a material refresh rewrites the artifact, so the next run rebuilds downstream.
+        if cached_research and researcher.revalidate_if_stale(video_id):
+            print(f"♻️ Research for {video_id} is stale; refreshing in the background.")
+        if researcher.refresh_pending(video_id):
+            reused.add("research")
+
+        plan_inputs = journal_inputs(research=research_payload)
+        cached_plan = _resume("plan", plan_inputs)
         if cached_plan:
             plan_payload = cached_plan
-            save_markdown("plan", video_id, _render_plan_markdown(plan_payload))
+            views["plan"] = lambda payload=plan_payload: _render_plan_markdown(payload)
         else:
             plan_result, _ = _run_stage(
                 stage="planner",
@@ -1000,15 +1200,16 @@ def run_pipeline(video_input: str, refresh: bool = False) -> Dict[str, Any]:
                     f"Got type={type(plan_result).__name__}"
                 )
             plan_payload = plan_result
-            save_json("plan", video_id, plan_payload)
-            save_markdown("plan", video_id, _render_plan_markdown(plan_payload))
-        state["plan"] = plan_payload
+            views["plan"] = lambda payload=plan_payload: _render_plan_markdown(payload)
+        _complete("plan", plan_payload, plan_inputs)
 
         source_ids = [source.get("source_id") for source in research_payload.get("sources", []) if source.get("source_id")]
         shorts_payload: Dict[str, Any] | None = None
-        cached_script = None if refresh else _load_stage_payload("script_long", video_id)
+        script_inputs = journal_inputs(research=research_payload, plan=plan_payload)
+        cached_script = _resume("script_long", script_inputs)
         if cached_script:
             script_payload = cached_script
+            script_serialized = SerializedPayload(script_payload)
         else:
             script_text, _ = _run_stage(
                 stage="script",
@@ -1021,10 +1222,9 @@ def run_pipeline(video_input: str, refresh: bool = False) -> Dict[str, Any]:
                 ),
             )
             if script_text.startswith("❌"):
-                raw_path = ensure_data_dir() / f"{video_id}_script_long_raw.json"
-                if raw_path.exists():
-                    raw_payload = load_json(raw_path)
-                    script_text = raw_payload.get("raw_text", script_text)
+                raw_text = load_raw("script_long_raw", video_id)
+                if raw_text is not None:
+                    script_text = raw_text
                 else:
                     raise ValueError(script_text)
             try:
@@ -1035,17 +1235,15 @@ def run_pipeline(video_input: str, refresh: bool = False) -> Dict[str, Any]:
                 raise ValueError("Script generation returned placeholder content for long-form script.")
             script_payload["video_id"] = video_id
             script_payload["mode"] = "long"
-            supabase.table("scripts").insert(
-                {"content": json.dumps(script_payload, ensure_ascii=False)}
-            ).execute()
-            save_json("script", video_id, script_payload)
-            save_json("script_long", video_id, script_payload)
+            script_serialized = SerializedPayload(script_payload)
+            supabase.table("scripts").insert({"content": script_serialized.text}).execute()
             script_updated = True
-        state["script_long"] = script_payload
+        _complete("script_long", script_payload, script_inputs, script_serialized)
 
-        cached_shorts = None if refresh else _load_stage_payload("script_shorts", video_id)
+        cached_shorts = _resume("script_shorts", script_inputs)
         if cached_shorts:
             shorts_payload = cached_shorts
+            shorts_serialized = SerializedPayload(shorts_payload)
         else:
             shorts_text, _ = _run_stage(
                 stage="script_shorts",
@@ -1058,10 +1256,9 @@ def run_pipeline(video_input: str, refresh: bool = False) -> Dict[str, Any]:
                 ),
             )
             if shorts_text.startswith("❌"):
-                raw_path = ensure_data_dir() / f"{video_id}_script_shorts_raw.json"
-                if raw_path.exists():
-                    raw_payload = load_json(raw_path)
-                    shorts_text = raw_payload.get("raw_text", shorts_text)
+                raw_text = load_raw("script_shorts_raw", video_id)
+                if raw_text is not None:
+                    shorts_text = raw_text
                 else:
                     raise ValueError(shorts_text)
             try:
@@ -1072,24 +1269,23 @@ def run_pipeline(video_input: str, refresh: bool = False) -> Dict[str, Any]:
                 raise ValueError("Script generation returned placeholder content for shorts script.")
             shorts_payload["video_id"] = video_id
             shorts_payload["mode"] = "shorts"
-            supabase.table("scripts").insert(
-                {"content": json.dumps(shorts_payload, ensure_ascii=False)}
-            ).execute()
-            save_json("script_shorts", video_id, shorts_payload)
+            shorts_serialized = SerializedPayload(shorts_payload)
+            supabase.table("scripts").insert({"content": shorts_serialized.text}).execute()
             script_updated = True
-        state["script_shorts"] = shorts_payload
-        save_markdown("script", video_id, _render_script_markdown(script_payload, shorts_payload))
+        _complete("script_shorts", shorts_payload, script_inputs, shorts_serialized)
+        views["script"] = lambda long=script_payload, shorts=shorts_payload: _render_script_markdown(long, shorts)
         supabase.table("video_scripts").upsert(
             {
                 "video_id": video_id,
-                "long_script": json.dumps(script_payload, ensure_ascii=False),
-                "shorts_script": json.dumps(shorts_payload, ensure_ascii=False),
+                "long_script": script_serialized.text,
+                "shorts_script": shorts_serialized.text,
             },
             on_conflict="video_id",
         ).execute()
 
         validator = ScriptValidator(research_payload, script_payload)
-        verification_result = validator.validate()
+        with span("validator.validate", cat="validate"):
+            verification_result = validator.validate()
         validation_report = {
             "status": verification_result.status,
             "errors": verification_result.errors,
@@ -1106,7 +1302,10 @@ def run_pipeline(video_input: str, refresh: bool = False) -> Dict[str, Any]:
             run_id=_log_run_id(run_id, "validator", 1),
         )
 
-        if verification_result.status != "pass":
+        # A resumed script that already went through validator repair for these inputs is not repaired again.
+        repair_entry = journal.latest("script_repair")
+        already_repaired = not script_updated and bool(repair_entry) and repair_entry["input_hash"] == script_inputs
+        if verification_result.status != "pass" and not already_repaired:
             feedback = "; ".join(verification_result.errors)
             script_text, _ = _run_stage(
                 stage="script_repair",
@@ -1120,10 +1319,9 @@ def run_pipeline(video_input: str, refresh: bool = False) -> Dict[str, Any]:
                 ),
             )
             if script_text.startswith("❌"):
-                raw_path = ensure_data_dir() / f"{video_id}_script_long_raw.json"
-                if raw_path.exists():
-                    raw_payload = load_json(raw_path)
-                    script_text = raw_payload.get("raw_text", script_text)
+                raw_text = load_raw("script_long_raw", video_id)
+                if raw_text is not None:
+                    script_text = raw_text
                 else:
                     raise ValueError(script_text)
             try:
@@ -1134,16 +1332,21 @@ def run_pipeline(video_input: str, refresh: bool = False) -> Dict[str, Any]:
                 raise ValueError("Script repair still returned placeholder content.")
             script_payload["video_id"] = video_id
             script_payload["mode"] = "long"
-            supabase.table("scripts").insert(
-                {"content": json.dumps(script_payload, ensure_ascii=False)}
-            ).execute()
-            save_json("script", video_id, script_payload)
-            save_json("script_long", video_id, script_payload)
+            script_serialized = SerializedPayload(script_payload)
+            supabase.table("scripts").insert({"content": script_serialized.text}).execute()
+            views["script"] = lambda long=script_payload, shorts=shorts_payload: _render_script_markdown(long, shorts)
+            _complete("script_long", script_payload, script_inputs, script_serialized)
+            journal.record(
+                "script_repair",
+                run_id=run_id,
+                input_hash=script_inputs,
+                output_hash=script_serialized.sha256,
+            )
             script_updated = True
-            save_markdown("script", video_id, _render_script_markdown(script_payload, shorts_payload))
 
             validator = ScriptValidator(research_payload, script_payload)
-            verification_result = validator.validate()
+            with span("validator.validate", cat="validate"):
+                verification_result = validator.validate()
             validation_report = {
                 "status": verification_result.status,
                 "errors": verification_result.errors,
@@ -1173,34 +1376,45 @@ def run_pipeline(video_input: str, refresh: bool = False) -> Dict[str, Any]:
                     run_id=_log_run_id(run_id, "validator", 3),
                 )
 
-        cached_scene = None if refresh or script_updated else _load_stage_payload("scenes", video_id)
-        if cached_scene and not script_updated and not _should_regenerate_scenes(cached_scene, script_payload):
+        scene_inputs = journal_inputs(research=research_payload, script_long=script_payload)
+        cached_scene = _resume(
+            "scenes",
+            scene_inputs,
+            legacy=lambda: None if script_updated else _load_stage_payload("scenes", video_id),
+        )
+        script_scene_hash = _scene_hash(script_payload, "scene-structure")
+        if cached_scene and not _should_regenerate_scenes(
+            cached_scene, script_payload, expected_hash=script_scene_hash
+        ):
             raw_scene_output = cached_scene
         else:
-            raw_scene_output = _build_scene_output_from_script(script_payload, research_payload)
-            raw_scene_output["scene_engine_version"] = SCENE_ENGINE_VERSION
-            raw_scene_output["source_script_hash"] = _scene_hash(script_payload, "scene-structure")
-            raw_scene_output = _ensure_scene_granularity(raw_scene_output, script_payload, research_payload, min_scenes=10)
+            with stage_memory("scenes"):
+                raw_scene_output = _build_scene_output_from_script(script_payload, research_payload)
+                raw_scene_output["scene_engine_version"] = SCENE_ENGINE_VERSION
+                raw_scene_output["source_script_hash"] = script_scene_hash
+                raw_scene_output = _ensure_scene_granularity(raw_scene_output, script_payload, research_payload, min_scenes=10)
 
         scene_output = raw_scene_output
-        image_output = build_image_contract(scene_output, research_payload)
-        motion_output = build_motion_contract(image_output)
-        save_json("scenes", video_id, scene_output)
-        save_json("image", video_id, image_output)
-        save_json("motion", video_id, motion_output)
-        save_markdown("scenes", video_id, _render_scenes_markdown(scene_output))
-        state["scenes"] = scene_output
-        state["image"] = image_output
-        state["motion"] = motion_output
+        scene_serialized = SerializedPayload(scene_output)
+        with span("build_image_contract"), stage_memory("image"):
+            image_output = build_image_contract(scene_output, research_payload)
+        with span("build_motion_contract"), stage_memory("motion"):
+            motion_output = build_motion_contract(image_output)
+        with artifact_transaction():
+            _complete("scenes", scene_output, scene_inputs, scene_serialized)
+            _complete("image", image_output, journal_inputs(scenes=scene_output, research=research_payload))
+            _complete("motion", motion_output, journal_inputs(image=image_output))
+        views["scenes"] = lambda payload=scene_output: _render_scenes_markdown(payload)
         supabase.table("video_scenes").upsert(
             {
                 "video_id": video_id,
-                "content": json.dumps(scene_output, ensure_ascii=False),
+                "content": scene_serialized.text,
             },
             on_conflict="video_id",
         ).execute()
 
-        cached_metadata = None if refresh else _load_stage_payload("metadata", video_id)
+        metadata_inputs = journal_inputs(plan=plan_payload, script_long=script_payload)
+        cached_metadata = _resume("metadata", metadata_inputs)
         if cached_metadata:
             metadata_payload = cached_metadata
         else:
@@ -1213,13 +1427,13 @@ def run_pipeline(video_input: str, refresh: bool = False) -> Dict[str, Any]:
                     script_payload=script_payload,
                 ),
             )
-            save_json("metadata", video_id, metadata_payload)
-        state["metadata"] = metadata_payload
+        _complete("metadata", metadata_payload, metadata_inputs)
 
-        semantic_result = validator.semantic_consistency_check(
-            metadata_payload=metadata_payload,
-            scene_output=scene_output,
-        )
+        with span("validator.semantic_consistency_check", cat="validate"):
+            semantic_result = validator.semantic_consistency_check(
+                metadata_payload=metadata_payload,
+                scene_output=scene_output,
+            )
         if semantic_result["status"] != "pass":
             emit_run_log(
                 stage="semantic_validator",
@@ -1265,8 +1479,15 @@ def run_pipeline(video_input: str, refresh: bool = False) -> Dict[str, Any]:
                 metrics=build_metrics(cache_hit=False),
                 run_id=_log_run_id(run_id, "ops", 1),
             )
+        _settle_views()
+    except LeaseLost:
+        # Another worker owns the job now; keep the artifacts but leave its upload status alone.
+        _checkpoint_state()
+        _settle_views()
+        raise
     except Exception as exc:
         _checkpoint_state()
+        _settle_views()
         failure_payload = {
             "video_id": video_id,
             "status": "failed",
@@ -1290,7 +1511,7 @@ def run_pipeline(video_input: str, refresh: bool = False) -> Dict[str, Any]:
                 raise
         raise exc
 
-    return {
+    result = {
         "run_id": run_id,
         "video_id": video_id,
         "research": research_payload,
@@ -1304,11 +1525,150 @@ def run_pipeline(video_input: str, refresh: bool = False) -> Dict[str, Any]:
         "verification_report": validation_report,
         "metadata": metadata_payload,
     }
+    profiler = active_profiler()
+    if profiler is not None:
+        profiler.record_payloads(f"result:{video_id}", {key: value for key, value in result.items() if isinstance(value, dict)})
+    return result
+
+
+@traced()
+def write_run_manifest(result: Dict[str, Any]) -> None:
+    """Persist the validation/verification reports and the artifact manifest for a finished run."""
+    manifest = {
+        "video_id": result["video_id"],
+        "files": {
+            "research": f"data/{result['video_id']}_research.json",
+            "plan": f"data/{result['video_id']}_plan.json",
+            "scenes": f"data/{result['video_id']}_scenes.json",
+            "image": f"data/{result['video_id']}_image.json",
+            "motion": f"data/{result['video_id']}_motion.json",
+            "script": f"data/{result['video_id']}_script.json",
+            "metadata": f"data/{result['video_id']}_metadata.json",
+            "validation_report": f"data/{result['video_id']}_validation_report.json",
+            "verification_report": f"data/{result['video_id']}_verification_report.json",
+        },
+    }
+    with artifact_transaction():
+        save_json("validation_report", result["video_id"], result.get("validation_report") or {"status": "n/a", "errors": [], "sentence_map": []})
+        save_json("verification_report", result["video_id"], result.get("validation_report") or {"status": "n/a", "errors": [], "sentence_map": []})
+        save_json("pipeline", result["video_id"], manifest)
+
+
+@traced()
+def _hydrate_completed_stages(video_id: str, completed: Dict[str, Dict[str, Any]]) -> list[str]:
+    """Materialize stage outputs recorded by other workers so cached-stage checks reuse them."""
+    data_dir = ensure_data_dir()
+    hydrated: list[str] = []
+    with artifact_transaction():
+        for stage, payload in completed.items():
+            artifact_stages = ("script", "script_long") if stage == "script_long" else (stage,)
+            for artifact_stage in artifact_stages:
+                if not artifact_exists(data_dir / f"{video_id}_{artifact_stage}.json"):
+                    save_json(artifact_stage, video_id, payload)
+                    hydrated.append(artifact_stage)
+    return hydrated
+
+
+def consume_jobs(
+    queue: Any = None,
+    worker_id: Optional[str] = None,
+    *,
+    once: bool = False,
+    poll_interval_s: float = 5.0,
+    lease_seconds: int = DEFAULT_LEASE_SECONDS,
+    agents: Optional[PipelineAgents] = None,
+) -> int:
+    """Lease jobs from the durable queue and run them; returns the number of jobs processed."""
+    queue = queue or get_job_queue()
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    processed = 0
+    while True:
+        _publish_queue_depth(queue)
+        job = queue.lease(worker_id, lease_seconds)
+        if job is None:
+            if once:
+                return processed
+            time.sleep(poll_interval_s)
+            continue
+        print(f"▶️ Leased job {job.job_id} for {job.video_id} (attempt {job.attempts}/{job.max_attempts})")
+        refresh = bool(job.payload.get("refresh", False))
+        with LeaseKeeper(queue, job, worker_id, lease_seconds) as keeper:
+
+            def on_stage(stage: str, payload: Dict[str, Any]) -> None:
+                # Every stage boundary re-checks the lease, so a worker that lost its job stops before the next paid stage.
+                keeper.ensure_held()
+                queue.complete_stage(job.video_id, stage, payload)
+
+            try:
+                if refresh:
+                    queue.reset_stages(job.video_id)
+                else:
+                    _hydrate_completed_stages(job.video_id, queue.completed_stages(job.video_id))
+                result = run_pipeline(
+                    job.payload.get("video") or job.video_id,
+                    refresh=refresh,
+                    render_views=bool(job.payload.get("render_views", True)),
+                    agents=agents,
+                    stage_listener=on_stage,
+                )
+                write_run_manifest(result)
+            except LeaseLost as exc:
+                print(f"⚠️ {exc} Aborted the run.")
+            except Exception as exc:
+                if not keeper.lost:
+                    queue.nack(job.job_id, worker_id, str(exc))
+                print(f"❌ Job {job.job_id} failed: {exc}")
+            else:
+                if keeper.lost or not queue.ack(job.job_id, worker_id):
+                    print(f"⚠️ Lease for job {job.job_id} was lost before ack; another worker owns it now.")
+        processed += 1
+        _publish_queue_depth(queue)
+        if once:
+            return processed
+
+
+def _publish_queue_depth(queue: Any) -> None:
+    try:
+        update_queue_depth(queue.stats())
+    except Exception as exc:  # Metrics must never stop the worker.
+        print(f"⚠️ Queue stats unavailable: {exc}")
+    flush_textfile()
 
 
 def main() -> int:
+    load_project_env()
     parser = argparse.ArgumentParser(description="Run the full pipeline end-to-end.")
-    parser.add_argument("--url", required=True, help="YouTube URL or video ID")
+    parser.add_argument("--url", help="YouTube URL or video ID")
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Serve the local job API with warm clients instead of running one video (see lib.pipeline_daemon)",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Daemon bind address")
+    parser.add_argument("--port", type=int, default=8765, help="Daemon port")
+    parser.add_argument("--workers", type=int, default=None, help="Daemon worker threads")
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="Consume jobs from the durable job queue (JOB_QUEUE_BACKEND) instead of running one video",
+    )
+    parser.add_argument("--once", action="store_true", help="With --worker: process at most one job and exit")
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="With --worker: serve OpenMetrics text on http://<host>:<port>/metrics",
+    )
+    parser.add_argument(
+        "--no-views",
+        action="store_true",
+        help="Skip markdown view rendering during the run (render later with --render-views)",
+    )
+    parser.add_argument(
+        "--render-views",
+        action="store_true",
+        help="Only rebuild markdown views from stored stage JSON and exit",
+    )
     parser.add_argument(
         "--refresh",
         action="store_true",
@@ -1333,6 +1693,16 @@ def main() -> int:
         action="store_true",
         help="Notify subscribers on upload",
     )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="Record nested timing spans and write a Chrome trace-event JSON file",
+    )
+    parser.add_argument(
+        "--memory-profile",
+        metavar="PATH",
+        help="Record per-stage peak/retained memory with tracemalloc and write a JSON report (slows the run)",
+    )
     parser.add_argument(
         "--print-result",
         action="store_true",
@@ -1340,30 +1710,46 @@ def main() -> int:
     )
     args = parser.parse_args()
 
-    result = run_pipeline(args.url, refresh=args.refresh)
+    if args.daemon:
+        from .pipeline_daemon import serve
+
+        return serve(host=args.host, port=args.port, max_workers=args.workers)
+    if not args.worker and not args.url:
+        parser.error("--url is required unless --daemon or --worker is set")
+    if args.render_views and not args.worker:
+        video_id = normalize_video_id(args.url)
+        rendered = render_markdown_views(video_id)
+        print(f"✅ Rendered views for {video_id}: {', '.join(rendered) or 'none'}")
+        return 0
+
+    with ExitStack() as stack:
+        tracer = stack.enter_context(tracing(Path(args.trace))) if args.trace else None
+        profiler = stack.enter_context(memory_profiling(Path(args.memory_profile))) if args.memory_profile else None
+        if args.worker:
+            if args.metrics_port is not None:
+                start_metrics_server(args.host, args.metrics_port)
+            consume_jobs(once=args.once)
+            exit_code = 0
+        else:
+            exit_code = _run_cli(args)
+        memory_report = profiler.report() if profiler else None
+    if tracer is not None:
+        print(format_summary(summarize(tracer.events)))
+        print(f"Trace written to {args.trace} (open in chrome://tracing or ui.perfetto.dev)")
+    if memory_report is not None:
+        print(format_report(memory_report))
+        print(f"Memory profile written to {args.memory_profile}")
+    return exit_code
+
+
+def _run_cli(args: argparse.Namespace) -> int:
+    result = run_pipeline(args.url, refresh=args.refresh, render_views=not args.no_views)
     if args.print_result:
         print(json.dumps(result, ensure_ascii=False, indent=2))
     else:
         print(f"✅ Pipeline completed: {result['video_id']}")
         print("Artifacts: data/{video_id}_{research|plan|script|script_long|script_shorts|scenes|image|motion|metadata}.{json|md}")
-    save_json("validation_report", result["video_id"], result.get("validation_report") or {"status": "n/a", "errors": [], "sentence_map": []})
-    save_json("verification_report", result["video_id"], result.get("validation_report") or {"status": "n/a", "errors": [], "sentence_map": []})
-    manifest_path = Path(__file__).resolve().parent.parent / "data" / f"{result['video_id']}_pipeline.json"
-    manifest = {
-        "video_id": result["video_id"],
-        "files": {
-            "research": f"data/{result['video_id']}_research.json",
-            "plan": f"data/{result['video_id']}_plan.json",
-            "scenes": f"data/{result['video_id']}_scenes.json",
-            "image": f"data/{result['video_id']}_image.json",
-            "motion": f"data/{result['video_id']}_motion.json",
-            "script": f"data/{result['video_id']}_script.json",
-            "metadata": f"data/{result['video_id']}_metadata.json",
-            "validation_report": f"data/{result['video_id']}_validation_report.json",
-            "verification_report": f"data/{result['video_id']}_verification_report.json",
-        },
-    }
-    manifest_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    write_run_manifest(result)
 
     if args.validate:
         validate_all(normalize_video_id(args.url))
@@ -1,11 +1,5 @@
 import json
 import os
-import sys
-from pathlib import Path
-
-# Keep virtual environment path if used locally.
-venv_path = Path(__file__).resolve().parent.parent / ".venv" / "Lib" / "site-packages"
-sys.path.append(str(venv_path))
 
 from .supabase_client import supabase
 from .json_utils import ensure_schema_version, extract_json_relaxed, parse_json_with_repair
@@ -14,9 +8,7 @@ from .schema_validator import validate_payload
 from .storage_utils import normalize_video_id, save_json, save_raw
 from .model_router import ModelRouter
 from .benchmarking import build_planner_context
-from dotenv import load_dotenv
 
-load_dotenv()
 
 class ContentPlanner:
     def __init__(self):
@@ -156,7 +148,6 @@ class ContentPlanner:
             return self._parse_with_retry(prompt_text, retry_text, topic, max_attempts=max_attempts - 1)
 
 
-
 # --- CLI entrypoint ---
 if __name__ == "__main__":
     planner = ContentPlanner()
@@ -0,0 +1,274 @@
+"""Batch backtesting of GEO phase policies against historical KPI series.
+
+Replays labelled historical cases (or a weekly KPI series, one case per week
+using the trailing weeks as history) against one or more policy variants and
+reports promote / hold decisions, false-hold and false-promote rates and hold
+reason counts per variant. The per-case features (relative ranges, warning
+streaks, data-point counts) are computed once per stability window and the
+threshold checks run column-wise against each variant's compiled thresholds
+(``CompiledPolicy``), so thousands of evaluations skip the explanation payload
+and decision hash of ``evaluate_phase_state``. Decisions match ``can_promote`` from
+``evaluate_phase_state``; override records are not replayed.
+
+History file format::
+
+    {"cases": [{<PhaseEvaluationInput fields>, "expected": "promote" | "hold"}, ...]}
+    {"weekly": [{"ctr": .., "avd": .., "geo_warnings": .., "published_videos": ..,
+                 "source_contract_ready": .., "source_linkage_pass_rate": ..,
+                 "research_source_coverage": .., "incident_open": .., "expected": ..}, ...]}
+
+Variants are full policy files or partial overrides deep-merged onto the base
+policy::
+
+    python -m lib.policy_backtest history.json [--variant loose=variant.json ...] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .policy_engine import (
+    DEFAULT_POLICY_PATH,
+    PolicyLike,
+    _relative_range,
+    _sustained_increase_streak,
+    compile_policy,
+    load_policy,
+)
+
+
+@dataclass
+class BacktestCases:
+    """Column-oriented view of the cases being replayed."""
+
+    published_videos: List[int]
+    ctr_weekly: List[List[float]]
+    avd_weekly: List[List[float]]
+    geo_weekly: List[List[int]]
+    source_contract_ready: List[bool]
+    source_linkage_pass_rate: List[float]
+    research_source_coverage: List[float]
+    incident_open: List[bool]
+    expected: List[Optional[bool]]
+    _range_cache: Dict[Tuple[str, int], List[float]] = field(default_factory=dict, repr=False)
+    _geo_cache: Optional[Tuple[List[int], List[int]]] = field(default=None, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.published_videos)
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]]) -> "BacktestCases":
+        return cls(
+            published_videos=[int(item["published_videos"]) for item in records],
+            ctr_weekly=[list(item["ctr_weekly"]) for item in records],
+            avd_weekly=[list(item["avd_weekly"]) for item in records],
+            geo_weekly=[list(item["geo_readiness_warning_count_weekly"]) for item in records],
+            source_contract_ready=[bool(item["source_contract_ready"]) for item in records],
+            source_linkage_pass_rate=[float(item["source_linkage_pass_rate"]) for item in records],
+            research_source_coverage=[float(item["research_source_coverage"]) for item in records],
+            incident_open=[bool(item.get("incident_open", False)) for item in records],
+            expected=[_expected(item.get("expected")) for item in records],
+        )
+
+    @classmethod
+    def from_weekly(cls, weeks: Sequence[Dict[str, Any]], history_weeks: int = 12) -> "BacktestCases":
+        """One case per week, using up to ``history_weeks`` trailing weeks as the KPI history."""
+        records = []
+        for index, week in enumerate(weeks):
+            window = weeks[max(0, index - history_weeks + 1) : index + 1]
+            records.append(
+                {
+                    **week,
+                    "ctr_weekly": [row["ctr"] for row in window if row.get("ctr") is not None],
+                    "avd_weekly": [row["avd"] for row in window if row.get("avd") is not None],
+                    "geo_readiness_warning_count_weekly": [
+                        int(row["geo_warnings"]) for row in window if row.get("geo_warnings") is not None
+                    ],
+                }
+            )
+        return cls.from_records(records)
+
+    def relative_ranges(self, series: str, window: int) -> List[float]:
+        key = (series, window)
+        if key not in self._range_cache:
+            values = self.ctr_weekly if series == "ctr" else self.avd_weekly
+            self._range_cache[key] = [_relative_range(items[-window:]) for items in values]
+        return self._range_cache[key]
+
+    def geo_features(self) -> Tuple[List[int], List[int]]:
+        if self._geo_cache is None:
+            self._geo_cache = (
+                [items[-1] if items else 0 for items in self.geo_weekly],
+                [_sustained_increase_streak(items) for items in self.geo_weekly],
+            )
+        return self._geo_cache
+
+
+def _expected(value: Any) -> Optional[bool]:
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in {"promote", "correct_promote", "false_hold"}:
+        return True
+    if text in {"hold", "correct_hold", "false_promote"}:
+        return False
+    raise ValueError(f"Unknown expected outcome: {value}")
+
+
+def deep_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def decide(cases: BacktestCases, policy: PolicyLike) -> Dict[str, List[bool]]:
+    """Evaluate every case against ``policy``; returns ``can_promote`` plus one failure column per reason code."""
+    n = len(cases)
+    limits = compile_policy(policy).thresholds
+    latest, streak = cases.geo_features()
+    is_red = [
+        lat >= limits.red_min_warnings and stk >= limits.red_sustained_weeks - 1 for lat, stk in zip(latest, streak)
+    ]
+    is_yellow = [
+        not r and lat >= limits.yellow_min_warnings and stk >= limits.yellow_sustained_weeks - 1
+        for r, lat, stk in zip(is_red, latest, streak)
+    ]
+    hold_levels = limits.hold_levels
+    geo_hold = [
+        (r and "red" in hold_levels) or (y and "yellow" in hold_levels) or (not r and not y and "green" in hold_levels)
+        or (limits.hold_when_incident_open and inc)
+        for r, y, inc in zip(is_red, is_yellow, cases.incident_open)
+    ]
+
+    window = limits.stability_window_weeks
+    ctr_short = [len(items) < limits.ctr_min_data_points for items in cases.ctr_weekly]
+    avd_short = [len(items) < limits.avd_min_data_points for items in cases.avd_weekly]
+    ctr_ranges = cases.relative_ranges("ctr", window)
+    avd_ranges = cases.relative_ranges("avd", window)
+    failures = {
+        "VIDEO_COUNT_BELOW_MINIMUM": [count < limits.min_published_videos for count in cases.published_videos],
+        "VIDEO_COUNT_ABOVE_PHASE_B_WINDOW": [count > limits.max_published_videos for count in cases.published_videos],
+        "CTR_DATA_INSUFFICIENT": ctr_short,
+        "CTR_STABILITY_FAIL": [not short and rr > limits.ctr_max_relative_range for short, rr in zip(ctr_short, ctr_ranges)],
+        "AVD_DATA_INSUFFICIENT": avd_short,
+        "AVD_STABILITY_FAIL": [not short and rr > limits.avd_max_relative_range for short, rr in zip(avd_short, avd_ranges)],
+        "SOURCE_CONTRACT_NOT_READY": [limits.require_contract_ready and not ok for ok in cases.source_contract_ready],
+        "SOURCE_LINKAGE_PASS_RATE_FAIL": [rate < limits.min_linkage_pass_rate for rate in cases.source_linkage_pass_rate],
+        "RESEARCH_SOURCE_COVERAGE_FAIL": [cov < limits.min_research_source_coverage for cov in cases.research_source_coverage],
+        "OPEN_INCIDENT_HOLD": list(cases.incident_open),
+        "GEO_WARN_RED_THRESHOLD": is_red,
+        "GEO_WARN_YELLOW_THRESHOLD": is_yellow,
+    }
+    transition_blockers = [name for name in failures if not name.startswith("GEO_WARN")]
+    can_promote = [
+        not geo_hold[i] and not any(failures[name][i] for name in transition_blockers) for i in range(n)
+    ]
+    return {"can_promote": can_promote, "geo_hold": geo_hold, **failures}
+
+
+def score(cases: BacktestCases, decisions: Dict[str, List[bool]]) -> Dict[str, Any]:
+    promote = decisions["can_promote"]
+    labelled = [(decided, expected) for decided, expected in zip(promote, cases.expected) if expected is not None]
+    counts = {"correct_promote": 0, "false_promote": 0, "correct_hold": 0, "false_hold": 0}
+    for decided, expected in labelled:
+        if decided:
+            counts["correct_promote" if expected else "false_promote"] += 1
+        else:
+            counts["false_hold" if expected else "correct_hold"] += 1
+    total = len(labelled) or 1
+    hold_reasons = {
+        name: sum(column)
+        for name, column in decisions.items()
+        if name not in {"can_promote", "geo_hold"} and any(column)
+    }
+    return {
+        "cases": len(cases),
+        "labelled": len(labelled),
+        "promote_rate": sum(promote) / len(promote) if promote else 0.0,
+        **{f"{label}_rate": count / total for label, count in counts.items()},
+        "counts": counts,
+        "reason_counts": dict(sorted(hold_reasons.items(), key=lambda item: -item[1])),
+    }
+
+
+def backtest(cases: BacktestCases, variants: Dict[str, PolicyLike]) -> List[Dict[str, Any]]:
+    """Score each named policy variant over the same cases; every variant is schema-checked once."""
+    results = []
+    for name, policy in variants.items():
+        compiled = compile_policy(policy)
+        results.append({"variant": name, "policy_version": compiled.version, **score(cases, decide(cases, compiled))})
+    return results
+
+
+def load_cases(path: Path, history_weeks: int = 12) -> BacktestCases:
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    if isinstance(payload, list):
+        return BacktestCases.from_records(payload)
+    if "weekly" in payload:
+        return BacktestCases.from_weekly(payload["weekly"], history_weeks=history_weeks)
+    return BacktestCases.from_records(payload["cases"])
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    lines = [f"{'variant':<20} {'version':<8} {'cases':>7} {'promote%':>9} {'false_hold%':>12} {'false_promote%':>15}  top hold reason"]
+    for row in results:
+        top = next(iter(row["reason_counts"].items()), None)
+        lines.append(
+            f"{row['variant'][:20]:<20} {str(row['policy_version'])[:8]:<8} {row['cases']:>7} "
+            f"{row['promote_rate'] * 100:>8.1f}% {row['false_hold_rate'] * 100:>11.1f}% {row['false_promote_rate'] * 100:>14.1f}%  "
+            + (f"{top[0]} (x{top[1]})" if top else "")
+        )
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Backtest GEO phase policy variants against historical KPI cases.")
+    parser.add_argument("history", help="JSON file with 'cases' or 'weekly' records")
+    parser.add_argument("--policy", default=str(DEFAULT_POLICY_PATH), help="Base policy file")
+    parser.add_argument(
+        "--variant",
+        action="append",
+        default=[],
+        metavar="NAME=PATH",
+        help="Policy variant (full policy or partial override merged onto the base); repeatable",
+    )
+    parser.add_argument("--history-weeks", type=int, default=12, help="Trailing weeks per case for 'weekly' input")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    base = load_policy(Path(args.policy))
+    variants: Dict[str, Dict[str, Any]] = {"base": base}
+    for spec in args.variant:
+        name, sep, path = spec.partition("=")
+        if not sep:
+            name, path = Path(spec).stem, spec
+        variants[name] = deep_merge(base, json.loads(Path(path).read_text(encoding="utf-8")))
+
+    try:
+        cases = load_cases(Path(args.history), history_weeks=args.history_weeks)
+    except (KeyError, ValueError) as exc:
+        print(f"Invalid history file: {exc}", file=sys.stderr)
+        return 1
+    try:
+        results = backtest(cases, variants)
+    except ValueError as exc:
+        print(f"Invalid policy variant: {exc}", file=sys.stderr)
+        return 1
+    print(json.dumps(results, indent=2) if args.json else format_results(results))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
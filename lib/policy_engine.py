@@ -1,14 +1,22 @@
-"""Deterministic policy evaluator for GEO readiness and phase transitions."""
+"""Deterministic policy evaluator for GEO readiness and phase transitions.
+
+The policy file is compiled once into a ``CompiledPolicy`` (schema-checked,
+with flat thresholds and the reason-code action table precomputed) and cached
+per path; ``get_policy`` only stats the file and recompiles when its mtime or
+size changes, so long-lived processes pick up edits without a restart.
+"""
 
 from __future__ import annotations
 
+import copy
 import hashlib
 import json
+import threading
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Tuple, Union
 
 ROOT = Path(__file__).resolve().parent.parent
 DEFAULT_POLICY_PATH = ROOT / "config" / "geo_phase_policy.json"
@@ -27,10 +35,113 @@ class PhaseEvaluationInput:
     override_record: Optional[Dict[str, Any]] = None
 
 
+@dataclass(frozen=True)
+class PolicyThresholds:
+    yellow_min_warnings: int
+    yellow_sustained_weeks: int
+    red_min_warnings: int
+    red_sustained_weeks: int
+    incident_levels: FrozenSet[str]
+    hold_levels: FrozenSet[str]
+    hold_when_incident_open: bool
+    min_published_videos: int
+    max_published_videos: int
+    stability_window_weeks: int
+    ctr_max_relative_range: float
+    ctr_min_data_points: int
+    avd_max_relative_range: float
+    avd_min_data_points: int
+    require_contract_ready: bool
+    min_linkage_pass_rate: float
+    min_research_source_coverage: float
+
+
+@dataclass(frozen=True)
+class CompiledPolicy:
+    raw: Mapping[str, Any]
+    version: str
+    thresholds: PolicyThresholds
+    reason_code_actions: Mapping[str, str]
+    override_allowed: bool
+    override_required_fields: Tuple[str, ...]
+    override_max_ttl: timedelta
+    manual_override_allowed: bool
+    require_action_or_signed_override: bool
+    source_stamp: Optional[Tuple[int, int]] = None
+
+    def __getitem__(self, key: str) -> Any:
+        return self.raw[key]
+
+    @classmethod
+    def compile(cls, raw: Dict[str, Any], source_stamp: Optional[Tuple[int, int]] = None) -> "CompiledPolicy":
+        from .schema_validator import validate_payload
+
+        validate_payload("geo_phase_policy", raw)
+        geo = raw["geo_readiness"]
+        rules = raw["phase_b_transition"]
+        enforcement = raw["decision_enforcement"]
+        override = enforcement["override"]
+        thresholds = PolicyThresholds(
+            yellow_min_warnings=geo["escalation"]["yellow"]["min_weekly_warning_count"],
+            yellow_sustained_weeks=geo["escalation"]["yellow"]["sustained_increase_weeks"],
+            red_min_warnings=geo["escalation"]["red"]["min_weekly_warning_count"],
+            red_sustained_weeks=geo["escalation"]["red"]["sustained_increase_weeks"],
+            incident_levels=frozenset(geo["incident_rules"]["create_incident_on_level"]),
+            hold_levels=frozenset(geo["incident_rules"]["auto_hold_on_level"]),
+            hold_when_incident_open=bool(geo["incident_rules"]["auto_hold_when_incident_open"]),
+            min_published_videos=rules["minimum_published_videos"],
+            max_published_videos=rules["maximum_published_videos"],
+            stability_window_weeks=rules["stability_window_weeks"],
+            ctr_max_relative_range=rules["ctr"]["max_relative_range"],
+            ctr_min_data_points=rules["ctr"]["min_data_points"],
+            avd_max_relative_range=rules["avd"]["max_relative_range"],
+            avd_min_data_points=rules["avd"]["min_data_points"],
+            require_contract_ready=bool(rules["source_evidence"]["require_contract_ready"]),
+            min_linkage_pass_rate=rules["source_evidence"]["minimum_linkage_pass_rate"],
+            min_research_source_coverage=rules["source_evidence"]["minimum_research_source_coverage"],
+        )
+        return cls(
+            raw=MappingProxyType(raw),
+            version=raw["policy_version"],
+            thresholds=thresholds,
+            reason_code_actions=MappingProxyType(dict(enforcement["reason_code_actions"])),
+            override_allowed=bool(override["allowed"]),
+            override_required_fields=tuple(override["required_fields"]),
+            override_max_ttl=timedelta(hours=override["max_ttl_hours"]),
+            manual_override_allowed=bool(rules["exceptions"].get("manual_override_allowed")),
+            require_action_or_signed_override=bool(enforcement["require_action_or_signed_override"]),
+            source_stamp=source_stamp,
+        )
+
+
+PolicyLike = Union[CompiledPolicy, Dict[str, Any]]
+
+_policy_cache: Dict[Path, CompiledPolicy] = {}
+_policy_lock = threading.Lock()
+
+
 def load_policy(path: Path = DEFAULT_POLICY_PATH) -> Dict[str, Any]:
     return json.loads(path.read_text(encoding="utf-8"))
 
 
+def get_policy(path: Path = DEFAULT_POLICY_PATH) -> CompiledPolicy:
+    """Return the compiled policy for ``path``, recompiling only when the file's mtime or size changed."""
+    stat = path.stat()
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _policy_cache.get(path)
+    if cached is not None and cached.source_stamp == stamp:
+        return cached
+    with _policy_lock:
+        cached = _policy_cache.get(path)
+        if cached is None or cached.source_stamp != stamp:
+            cached = _policy_cache[path] = CompiledPolicy.compile(load_policy(path), source_stamp=stamp)
+        return cached
+
+
+def compile_policy(policy: PolicyLike) -> CompiledPolicy:
+    return policy if isinstance(policy, CompiledPolicy) else CompiledPolicy.compile(policy)
+
+
 def _now_utc() -> datetime:
     return datetime.now(timezone.utc)
 
@@ -56,12 +167,7 @@ def _relative_range(values: List[float]) -> float:
     return (max(values) - min(values)) / mean
 
 
-def _validate_override_record(
-    override: Optional[Dict[str, Any]], policy: Dict[str, Any]
-) -> Dict[str, Any]:
-    enforcement = policy["decision_enforcement"]
-    override_policy = enforcement["override"]
-
+def _validate_override_record(override: Optional[Dict[str, Any]], policy: CompiledPolicy) -> Dict[str, Any]:
     if not override:
         return {
             "present": False,
@@ -70,8 +176,7 @@ def _validate_override_record(
             "reason": "NO_OVERRIDE",
         }
 
-    required = override_policy["required_fields"]
-    missing = [field for field in required if field not in override or not override[field]]
+    missing = [field for field in policy.override_required_fields if field not in override or not override[field]]
     if missing:
         return {
             "present": True,
@@ -104,8 +209,7 @@ def _validate_override_record(
             "reason": "INVALID_OVERRIDE_TTL_ORDER",
         }
 
-    ttl_limit = timedelta(hours=override_policy["max_ttl_hours"])
-    if expires_at - created_at > ttl_limit:
+    if expires_at - created_at > policy.override_max_ttl:
         return {
             "present": True,
             "valid": False,
@@ -121,7 +225,7 @@ def _validate_override_record(
             "reason": "OVERRIDE_EXPIRED",
         }
 
-    if not enforcement["override"]["allowed"]:
+    if not policy.override_allowed:
         return {
             "present": True,
             "valid": False,
@@ -137,11 +241,8 @@ def _validate_override_record(
     }
 
 
-def evaluate_geo_readiness(
-    input_data: PhaseEvaluationInput, policy: Dict[str, Any]
-) -> Dict[str, Any]:
-    settings = policy["geo_readiness"]
-    escalation = settings["escalation"]
+def evaluate_geo_readiness(input_data: PhaseEvaluationInput, policy: PolicyLike) -> Dict[str, Any]:
+    limits = compile_policy(policy).thresholds
     warnings = input_data.geo_readiness_warning_count_weekly
     latest = warnings[-1] if warnings else 0
     streak = _sustained_increase_streak(warnings)
@@ -149,20 +250,16 @@ def evaluate_geo_readiness(
     level = "green"
     reason_codes: List[str] = []
 
-    red = escalation["red"]
-    if latest >= red["min_weekly_warning_count"] and streak >= red["sustained_increase_weeks"] - 1:
+    if latest >= limits.red_min_warnings and streak >= limits.red_sustained_weeks - 1:
         level = "red"
         reason_codes.append("GEO_WARN_RED_THRESHOLD")
-    else:
-        yellow = escalation["yellow"]
-        if latest >= yellow["min_weekly_warning_count"] and streak >= yellow["sustained_increase_weeks"] - 1:
-            level = "yellow"
-            reason_codes.append("GEO_WARN_YELLOW_THRESHOLD")
-
-    incident_rules = settings["incident_rules"]
-    incident_required = level in incident_rules["create_incident_on_level"]
-    hold = level in incident_rules["auto_hold_on_level"]
-    if incident_rules["auto_hold_when_incident_open"] and input_data.incident_open:
+    elif latest >= limits.yellow_min_warnings and streak >= limits.yellow_sustained_weeks - 1:
+        level = "yellow"
+        reason_codes.append("GEO_WARN_YELLOW_THRESHOLD")
+
+    incident_required = level in limits.incident_levels
+    hold = level in limits.hold_levels
+    if limits.hold_when_incident_open and input_data.incident_open:
         hold = True
         reason_codes.append("OPEN_INCIDENT_HOLD")
 
@@ -176,49 +273,42 @@ def evaluate_geo_readiness(
     }
 
 
-def evaluate_phase_b_transition(
-    input_data: PhaseEvaluationInput, policy: Dict[str, Any]
-) -> Dict[str, Any]:
-    rules = policy["phase_b_transition"]
+def evaluate_phase_b_transition(input_data: PhaseEvaluationInput, policy: PolicyLike) -> Dict[str, Any]:
+    compiled = compile_policy(policy)
+    limits = compiled.thresholds
+    rules = compiled["phase_b_transition"]
     reasons: List[str] = []
     promotable = True
 
-    if input_data.published_videos < rules["minimum_published_videos"]:
+    if input_data.published_videos < limits.min_published_videos:
         promotable = False
         reasons.append("VIDEO_COUNT_BELOW_MINIMUM")
-    if input_data.published_videos > rules["maximum_published_videos"]:
+    if input_data.published_videos > limits.max_published_videos:
         promotable = False
         reasons.append("VIDEO_COUNT_ABOVE_PHASE_B_WINDOW")
 
-    ctr_cfg = rules["ctr"]
-    avd_cfg = rules["avd"]
-
-    if len(input_data.ctr_weekly) < ctr_cfg["min_data_points"]:
+    window = limits.stability_window_weeks
+    if len(input_data.ctr_weekly) < limits.ctr_min_data_points:
         promotable = False
         reasons.extend(["CTR_DATA_INSUFFICIENT", "decision_hold_pending_info"])
-    else:
-        ctr_range = _relative_range(input_data.ctr_weekly[-rules["stability_window_weeks"] :])
-        if ctr_range > ctr_cfg["max_relative_range"]:
-            promotable = False
-            reasons.append("CTR_STABILITY_FAIL")
+    elif _relative_range(input_data.ctr_weekly[-window:]) > limits.ctr_max_relative_range:
+        promotable = False
+        reasons.append("CTR_STABILITY_FAIL")
 
-    if len(input_data.avd_weekly) < avd_cfg["min_data_points"]:
+    if len(input_data.avd_weekly) < limits.avd_min_data_points:
         promotable = False
         reasons.extend(["AVD_DATA_INSUFFICIENT", "decision_hold_pending_info"])
-    else:
-        avd_range = _relative_range(input_data.avd_weekly[-rules["stability_window_weeks"] :])
-        if avd_range > avd_cfg["max_relative_range"]:
-            promotable = False
-            reasons.append("AVD_STABILITY_FAIL")
-
-    src_cfg = rules["source_evidence"]
-    if src_cfg["require_contract_ready"] and not input_data.source_contract_ready:
+    elif _relative_range(input_data.avd_weekly[-window:]) > limits.avd_max_relative_range:
+        promotable = False
+        reasons.append("AVD_STABILITY_FAIL")
+
+    if limits.require_contract_ready and not input_data.source_contract_ready:
         promotable = False
         reasons.append("SOURCE_CONTRACT_NOT_READY")
-    if input_data.source_linkage_pass_rate < src_cfg["minimum_linkage_pass_rate"]:
+    if input_data.source_linkage_pass_rate < limits.min_linkage_pass_rate:
         promotable = False
         reasons.append("SOURCE_LINKAGE_PASS_RATE_FAIL")
-    if input_data.research_source_coverage < src_cfg["minimum_research_source_coverage"]:
+    if input_data.research_source_coverage < limits.min_research_source_coverage:
         promotable = False
         reasons.append("RESEARCH_SOURCE_COVERAGE_FAIL")
 
@@ -231,13 +321,13 @@ def evaluate_phase_b_transition(
         "to_phase": rules["to_phase"],
         "promotable": promotable,
         "reason_codes": sorted(set(reasons)),
-        "exceptions": rules["exceptions"],
-        "rollback": rules["rollback"],
+        "exceptions": copy.deepcopy(rules["exceptions"]),
+        "rollback": copy.deepcopy(rules["rollback"]),
     }
 
 
-def _map_reason_codes_to_actions(reason_codes: List[str], policy: Dict[str, Any]) -> List[str]:
-    mapping = policy["decision_enforcement"]["reason_code_actions"]
+def _map_reason_codes_to_actions(reason_codes: List[str], policy: CompiledPolicy) -> List[str]:
+    mapping = policy.reason_code_actions
     unknown = sorted(code for code in reason_codes if code not in mapping)
     if unknown:
         raise ValueError(f"Unknown reason codes for mandatory action mapping: {unknown}")
@@ -257,6 +347,8 @@ def _build_human_summary(can_promote: bool, reason_codes: List[str], actions: Li
 
 
 def _decision_hash(payload: Dict[str, Any]) -> str:
+    # Stored decision hashes were computed with stdlib json (ASCII-escaped, NaN kept); keep that encoding
+    # rather than the orjson-backed canonical_hash so old and new hashes stay comparable.
     packed = json.dumps(payload, sort_keys=True, separators=(",", ":"))
     return hashlib.sha256(packed.encode("utf-8")).hexdigest()
 
@@ -272,9 +364,11 @@ def _compute_false_decision_metrics(outcomes: List[Dict[str, Any]]) -> Dict[str,
 
 
 def evaluate_phase_state(
-    input_data: PhaseEvaluationInput, historical_outcomes: Optional[List[Dict[str, Any]]] = None
+    input_data: PhaseEvaluationInput,
+    historical_outcomes: Optional[List[Dict[str, Any]]] = None,
+    policy: Optional[PolicyLike] = None,
 ) -> Dict[str, Any]:
-    policy = load_policy()
+    policy = compile_policy(policy) if policy is not None else get_policy()
     geo = evaluate_geo_readiness(input_data, policy)
     transition = evaluate_phase_b_transition(input_data, policy)
 
@@ -284,10 +378,9 @@ def evaluate_phase_state(
     can_promote = transition["promotable"] and not geo["phase_hold"]
 
     override_status = _validate_override_record(input_data.override_record, policy)
-    manual_override_allowed = bool(policy["phase_b_transition"]["exceptions"].get("manual_override_allowed"))
 
     override_applied = False
-    if override_status["valid"] and manual_override_allowed:
+    if override_status["valid"] and policy.manual_override_allowed:
         override_applied = True
         can_promote = True
         final_hold = False
@@ -299,12 +392,12 @@ def evaluate_phase_state(
     all_reason_codes = sorted(set(all_reason_codes))
     mandatory_actions = _map_reason_codes_to_actions(all_reason_codes, policy) if all_reason_codes else ["PROMOTION_ALLOWED"]
 
-    if policy["decision_enforcement"]["require_action_or_signed_override"]:
+    if policy.require_action_or_signed_override:
         if not mandatory_actions and not (override_status["present"] and override_status["valid"]):
             raise ValueError("Policy decision generated no mandatory actions and no valid signed override.")
 
     explanation_payload = {
-        "policy_version": policy["policy_version"],
+        "policy_version": policy.version,
         "reason_codes": all_reason_codes,
         "mandatory_actions": mandatory_actions,
         "can_promote": can_promote,
@@ -316,7 +409,7 @@ def evaluate_phase_state(
     }
 
     provenance = {
-        "policy_version": policy["policy_version"],
+        "policy_version": policy.version,
         "evaluated_at": _now_utc().isoformat(),
         "input_snapshot": {
             "published_videos": input_data.published_videos,
@@ -334,7 +427,7 @@ def evaluate_phase_state(
     metrics = _compute_false_decision_metrics(historical_outcomes or [])
 
     return {
-        "policy_version": policy["policy_version"],
+        "policy_version": policy.version,
         "current_phase": policy["phase"]["current"],
         "promotion_target": transition["to_phase"],
         "phase_hold": final_hold,
@@ -1,11 +1,33 @@
-"""QA gate evaluation for CTR/AVD/30s retention metrics."""
+"""QA gate evaluation for CTR/AVD/30s retention metrics.
+
+Single video::
+
+    python -m lib.qa_gate <metrics_json_path>
+
+Bulk portfolio review: every video's latest snapshot, from the
+``analytics_snapshot`` rows in ``metadata_experiments``, the local KPI store
+or a JSON file, is evaluated in one column-wise pass over the
+``THRESHOLDS``/``GOVERNANCE`` tables. The decisions are optionally upserted
+into ``qa_gate_decisions`` in batches, with one run log for the whole review::
+
+    python -m lib.qa_gate bulk [--source supabase|kpi|file] [--path snapshots.json]
+        [--channel-type finance] [--channel-map channels.json] [--write] [--json]
+
+A snapshot without CTR or AVD is held with a ``<metric>_missing`` flag;
+retention is not stored by the analytics snapshots, so it is flagged missing
+unless the file source provides it.
+"""
 
 from __future__ import annotations
 
+import argparse
 import json
+import math
 import sys
+from array import array
+from datetime import date
 from pathlib import Path
-from typing import Dict
+from typing import Any, Dict, List, Optional, Sequence
 
 from .run_logger import build_metrics, emit_run_log
 
@@ -66,9 +88,221 @@ def evaluate_metrics(metrics: Dict[str, float], channel_type: str) -> Dict[str,
     }
 
 
+CHANNEL_TYPES = tuple(THRESHOLDS)
+BULK_METRICS = ("ctr", "avd", "retention_30s")
+WRITE_CHUNK = 500
+NAN = float("nan")
+
+
+def _table_columns() -> Dict[str, array]:
+    """``THRESHOLDS``/``GOVERNANCE`` as one array per rule, indexed like ``CHANNEL_TYPES``."""
+    return {
+        "publish_ctr": array("d", (GOVERNANCE[name]["publish"]["ctr"] for name in CHANNEL_TYPES)),
+        "publish_avd": array("d", (GOVERNANCE[name]["publish"]["avd"] for name in CHANNEL_TYPES)),
+        "rework_ctr": array("d", (GOVERNANCE[name]["rework"]["ctr"] for name in CHANNEL_TYPES)),
+        "rework_avd": array("d", (GOVERNANCE[name]["rework"]["avd"] for name in CHANNEL_TYPES)),
+        **{f"base_{metric}": array("d", (THRESHOLDS[name][metric] for name in CHANNEL_TYPES)) for metric in BULK_METRICS},
+    }
+
+
+def evaluate_metrics_bulk(
+    video_ids: Sequence[str],
+    channel_types: Sequence[str],
+    ctr: Sequence[float],
+    avd: Sequence[float],
+    retention_30s: Sequence[float],
+) -> List[Dict[str, Any]]:
+    """Column-wise ``evaluate_metrics`` for many videos; missing metrics are NaN."""
+    codes = {name: index for index, name in enumerate(CHANNEL_TYPES)}
+    unknown = sorted(set(channel_types) - set(codes))
+    if unknown:
+        raise ValueError(f"Unknown channel_type: {', '.join(unknown)}")
+    channel = [codes[name] for name in channel_types]
+    table = _table_columns()
+
+    def gather(rule: str) -> List[float]:
+        column = table[rule]
+        return [column[index] for index in channel]
+
+    values = {"ctr": ctr, "avd": avd, "retention_30s": retention_30s}
+    missing = {metric: [math.isnan(value) for value in values[metric]] for metric in BULK_METRICS}
+    publish = [
+        c >= pc and a >= pa for c, a, pc, pa in zip(ctr, avd, gather("publish_ctr"), gather("publish_avd"))
+    ]
+    rework = [c < rc or a < ra for c, a, rc, ra in zip(ctr, avd, gather("rework_ctr"), gather("rework_avd"))]
+    below = {
+        metric: [value < base for value, base in zip(values[metric], gather(f"base_{metric}"))] for metric in BULK_METRICS
+    }
+
+    results: List[Dict[str, Any]] = []
+    for row, video_id in enumerate(video_ids):
+        if missing["ctr"][row] or missing["avd"][row]:
+            decision = "hold"
+        else:
+            decision = "publish" if publish[row] else "rework" if rework[row] else "hold"
+        flags = [f"{metric}_below_baseline" for metric in BULK_METRICS if below[metric][row]]
+        flags.extend(f"{metric}_missing" for metric in BULK_METRICS if missing[metric][row])
+        results.append(
+            {
+                "video_id": video_id,
+                "channel_type": channel_types[row],
+                "decision": decision,
+                "flags": flags,
+                **{metric: None if missing[metric][row] else values[metric][row] for metric in BULK_METRICS},
+            }
+        )
+    return results
+
+
+def _float(value: Any) -> float:
+    try:
+        return NAN if value is None else float(value)
+    except (TypeError, ValueError):
+        return NAN
+
+
+def load_supabase_snapshots(client: Any = None, page_size: int = 1000) -> Dict[str, Dict[str, float]]:
+    """Latest ``analytics_snapshot`` row per video from ``metadata_experiments``."""
+    if client is None:
+        from .supabase_client import get_client
+
+        client = get_client()
+    latest: Dict[str, Dict[str, float]] = {}
+    offset = 0
+    while True:
+        response = (
+            client.table("metadata_experiments")
+            .select("video_id,ctr,avd,created_at")
+            .eq("experiment_type", "analytics_snapshot")
+            .order("created_at", desc=True)
+            .range(offset, offset + page_size - 1)
+            .execute()
+        )
+        rows = response.data or []
+        for row in rows:
+            latest.setdefault(row["video_id"], {"ctr": _float(row.get("ctr")), "avd": _float(row.get("avd")), "retention_30s": NAN})
+        if len(rows) < page_size:
+            return latest
+        offset += page_size
+
+
+def load_kpi_snapshots(store: Any = None) -> Dict[str, Dict[str, float]]:
+    """Latest stored CTR / AVD per video from the local KPI store."""
+    if store is None:
+        from .kpi_store import KpiStore
+
+        store = KpiStore()
+    latest = store.latest(["impressions_ctr", "average_view_duration"])
+    return {
+        video_id: {"ctr": values["impressions_ctr"], "avd": values["average_view_duration"], "retention_30s": NAN}
+        for video_id, values in latest.items()
+    }
+
+
+def load_file_snapshots(path: Path) -> Dict[str, Dict[str, Any]]:
+    """``{"videos": [{"video_id", "channel_type"?, "metrics": {"ctr", "avd", "retention_30s"}}]}``."""
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    snapshots: Dict[str, Dict[str, Any]] = {}
+    for item in payload["videos"]:
+        metrics = item.get("metrics", {})
+        snapshots[item["video_id"]] = {metric: _float(metrics.get(metric)) for metric in BULK_METRICS}
+        if item.get("channel_type"):
+            snapshots[item["video_id"]]["channel_type"] = item["channel_type"]
+    return snapshots
+
+
+def evaluate_snapshots(
+    snapshots: Dict[str, Dict[str, Any]],
+    channel_type: str,
+    channel_map: Optional[Dict[str, str]] = None,
+) -> List[Dict[str, Any]]:
+    video_ids = sorted(snapshots)
+    channel_map = channel_map or {}
+    return evaluate_metrics_bulk(
+        video_ids,
+        [channel_map.get(vid) or snapshots[vid].get("channel_type") or channel_type for vid in video_ids],
+        *([snapshots[vid][metric] for vid in video_ids] for metric in BULK_METRICS),
+    )
+
+
+def write_decisions(results: List[Dict[str, Any]], client: Any = None, review_date: Optional[date] = None) -> int:
+    """Upsert decisions into ``qa_gate_decisions`` (one row per video and review date); returns requests issued."""
+    if client is None:
+        from .supabase_client import get_client
+
+        client = get_client()
+    review = (review_date or date.today()).isoformat()
+    rows = [{**result, "review_date": review} for result in results]
+    requests = 0
+    for index in range(0, len(rows), WRITE_CHUNK):
+        client.table("qa_gate_decisions").upsert(rows[index : index + WRITE_CHUNK], on_conflict="video_id,review_date").execute()
+        requests += 1
+    return requests
+
+
+def _decision_counts(results: List[Dict[str, Any]]) -> Dict[str, int]:
+    counts = {"publish": 0, "hold": 0, "rework": 0}
+    for result in results:
+        counts[result["decision"]] += 1
+    return counts
+
+
+def _run_bulk(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m lib.qa_gate bulk", description="Evaluate the QA gate for every video's latest snapshot.")
+    parser.add_argument("--source", choices=["supabase", "kpi", "file"], default="supabase")
+    parser.add_argument("--path", help="Snapshot JSON for --source file")
+    parser.add_argument("--channel-type", default="finance", choices=CHANNEL_TYPES, help="Default channel type")
+    parser.add_argument("--channel-map", help="JSON object mapping video_id to channel_type")
+    parser.add_argument("--write", action="store_true", help="Upsert decisions into qa_gate_decisions")
+    parser.add_argument("--json", action="store_true", help="Print decisions as JSON")
+    args = parser.parse_args(argv)
+    if args.source == "file" and not args.path:
+        parser.error("--source file requires --path")
+
+    input_refs = {"mode": "bulk", "source": args.source, "path": args.path}
+    try:
+        if args.source == "file":
+            snapshots = load_file_snapshots(Path(args.path))
+        elif args.source == "kpi":
+            snapshots = load_kpi_snapshots()
+        else:
+            snapshots = load_supabase_snapshots()
+        channel_map = json.loads(Path(args.channel_map).read_text(encoding="utf-8")) if args.channel_map else None
+        results = evaluate_snapshots(snapshots, args.channel_type, channel_map)
+        write_requests = write_decisions(results) if args.write and results else 0
+    except Exception as exc:
+        emit_run_log(
+            stage="qa_gate",
+            status="failure",
+            input_refs=input_refs,
+            error_summary=str(exc),
+            metrics=build_metrics(cache_hit=False),
+        )
+        print(f"QA gate failed: {exc}", file=sys.stderr)
+        return 1
+
+    counts = _decision_counts(results)
+    emit_run_log(
+        stage="qa_gate",
+        status="success",
+        input_refs=input_refs,
+        output_refs={"videos": len(results), "decisions": counts, "write_requests": write_requests},
+        metrics=build_metrics(cache_hit=False),
+    )
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        for result in results:
+            print(f"{result['video_id']:<14} {result['channel_type']:<10} {result['decision']:<8} {', '.join(result['flags'])}")
+        print(f"{len(results)} videos: " + ", ".join(f"{name}={count}" for name, count in counts.items()), file=sys.stderr)
+    return 0
+
+
 def main() -> int:
+    if len(sys.argv) >= 2 and sys.argv[1] == "bulk":
+        return _run_bulk(sys.argv[2:])
     if len(sys.argv) < 2:
-        print("Usage: python -m lib.qa_gate <metrics_json_path>", file=sys.stderr)
+        print("Usage: python -m lib.qa_gate <metrics_json_path> | bulk [--source ...]", file=sys.stderr)
         return 1
 
     metrics_path = Path(sys.argv[1])
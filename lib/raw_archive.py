@@ -0,0 +1,278 @@
+"""Append-only, gzip-compressed archive of raw model responses.
+
+Each video gets ``data/raw_archive/{video_id}.jsonl.gz`` plus a plain-text
+offset index ``{video_id}.idx.jsonl``. Every attempt is written as its own
+gzip member holding one JSON line, so the log is a valid gzip stream
+(``zcat`` prints the full history as JSONL) and any single attempt can be
+read back with one seek using the offset/length recorded in the index.
+
+Each stage also has its own index under ``{video_id}.idx.d/{stage}.jsonl``,
+so stage lookups (``latest_raw``, per-stage ``list_attempts``) read only that
+stage's entries. The next ``seq`` and ``attempt`` come from the last line of
+each index. Appends, compaction and reads hold ``{video_id}.lock`` (see
+``lib.file_lock``), so concurrent writers in other processes do not
+interleave. Archives written before the per-stage indexes existed are split
+on their next append.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .env_utils import load_project_env
+from .file_lock import file_lock
+
+
+DEFAULT_KEEP_PER_STAGE = 20
+KEEP_PER_STAGE_ENV = "RAW_ARCHIVE_KEEP_PER_STAGE"
+
+
+def archive_dir(data_dir: Path) -> Path:
+    path = data_dir / "raw_archive"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _log_path(data_dir: Path, video_id: str) -> Path:
+    return archive_dir(data_dir) / f"{video_id}.jsonl.gz"
+
+
+def _index_path(data_dir: Path, video_id: str) -> Path:
+    return archive_dir(data_dir) / f"{video_id}.idx.jsonl"
+
+
+def _stage_dir(data_dir: Path, video_id: str) -> Path:
+    return archive_dir(data_dir) / f"{video_id}.idx.d"
+
+
+def _stage_index_path(data_dir: Path, video_id: str, stage: str) -> Path:
+    return _stage_dir(data_dir, video_id) / f"{stage}.jsonl"
+
+
+def _lock_path(data_dir: Path, video_id: str) -> Path:
+    return archive_dir(data_dir) / f"{video_id}.lock"
+
+
+def _read_index(path: Path) -> List[Dict[str, Any]]:
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+
+def _last_entry(path: Path) -> Optional[Dict[str, Any]]:
+    """Return the final entry of an index by reading backwards from the end of the file."""
+    try:
+        handle = path.open("rb")
+    except FileNotFoundError:
+        return None
+    with handle:
+        end = handle.seek(0, os.SEEK_END)
+        tail = b""
+        position = end
+        while position > 0:
+            step = min(4096, position)
+            position -= step
+            handle.seek(position)
+            tail = handle.read(step) + tail
+            lines = [line for line in tail.split(b"\n") if line.strip()]
+            if len(lines) > 1 or (lines and position == 0):
+                return json.loads(lines[-1])
+    return None
+
+
+def _read_first(path: Path) -> Dict[str, Any]:
+    with path.open("r", encoding="utf-8") as handle:
+        return json.loads(handle.readline())
+
+
+def _write_index(path: Path, entries: List[Dict[str, Any]]) -> None:
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text("".join(json.dumps(entry) + "\n" for entry in entries), encoding="utf-8")
+    tmp_path.replace(path)
+
+
+def _ensure_stage_indexes(data_dir: Path, video_id: str) -> None:
+    """Split a pre-existing combined index into per-stage indexes (caller holds the archive lock)."""
+    stage_dir = _stage_dir(data_dir, video_id)
+    if stage_dir.is_dir():
+        return
+    by_stage: Dict[str, List[Dict[str, Any]]] = {}
+    for entry in _read_index(_index_path(data_dir, video_id)):
+        by_stage.setdefault(entry["stage"], []).append(entry)
+    tmp_dir = stage_dir.with_name(f".{stage_dir.name}.tmp")
+    tmp_dir.mkdir(exist_ok=True)
+    for stage, entries in by_stage.items():
+        _write_index(tmp_dir / f"{stage}.jsonl", entries)
+    tmp_dir.replace(stage_dir)
+
+
+def keep_per_stage() -> int:
+    raw = os.getenv(KEEP_PER_STAGE_ENV, "")
+    return int(raw) if raw.isdigit() and int(raw) > 0 else DEFAULT_KEEP_PER_STAGE
+
+
+def list_attempts(data_dir: Path, video_id: str, stage: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Return index entries (oldest first), optionally filtered to one stage."""
+    if stage is None:
+        return _read_index(_index_path(data_dir, video_id))
+    if _stage_dir(data_dir, video_id).is_dir():
+        return _read_index(_stage_index_path(data_dir, video_id, stage))
+    return [entry for entry in _read_index(_index_path(data_dir, video_id)) if entry["stage"] == stage]
+
+
+def _read_record(data_dir: Path, video_id: str, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Read one attempt with a single seek; None if the offsets no longer point at ``entry``."""
+    with _log_path(data_dir, video_id).open("rb") as handle:
+        handle.seek(entry["offset"])
+        blob = handle.read(entry["length"])
+    try:
+        record = json.loads(gzip.decompress(blob))
+    except (OSError, EOFError, ValueError):
+        return None
+    return record if record.get("seq") == entry["seq"] else None
+
+
+def read_attempt(data_dir: Path, video_id: str, entry: Dict[str, Any]) -> str:
+    """Return the raw text for one index entry.
+
+    Entries listed before a compaction carry stale offsets; the attempt is then
+    looked up again by ``seq`` in the current index.
+    """
+    with file_lock(_lock_path(data_dir, video_id)):
+        record = _read_record(data_dir, video_id, entry)
+        if record is None:
+            current = next((item for item in list_attempts(data_dir, video_id, entry["stage"]) if item["seq"] == entry["seq"]), None)
+            record = _read_record(data_dir, video_id, current) if current else None
+        if record is None:
+            raise LookupError(f"Archived attempt {entry['seq']} for {video_id} is no longer available")
+    return record["raw_text"]
+
+
+def latest_raw(data_dir: Path, video_id: str, stage: str) -> Optional[str]:
+    with file_lock(_lock_path(data_dir, video_id)):
+        if _stage_dir(data_dir, video_id).is_dir():
+            entry = _last_entry(_stage_index_path(data_dir, video_id, stage))
+        else:
+            entries = list_attempts(data_dir, video_id, stage)
+            entry = entries[-1] if entries else None
+        record = _read_record(data_dir, video_id, entry) if entry else None
+    return record["raw_text"] if record else None
+
+
+def append_raw(data_dir: Path, video_id: str, stage: str, raw_text: str) -> Dict[str, Any]:
+    """Append one attempt to the video's archive and return its index entry."""
+    created_at = datetime.now(timezone.utc).isoformat()
+    with file_lock(_lock_path(data_dir, video_id)):
+        _ensure_stage_indexes(data_dir, video_id)
+        last = _last_entry(_index_path(data_dir, video_id))
+        last_in_stage = _last_entry(_stage_index_path(data_dir, video_id, stage))
+        seq = last["seq"] + 1 if last else 1
+        attempt = last_in_stage["attempt"] + 1 if last_in_stage else 1
+        record = {"seq": seq, "stage": stage, "attempt": attempt, "created_at": created_at, "raw_text": raw_text}
+        blob = gzip.compress((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"), mtime=0)
+        log_path = _log_path(data_dir, video_id)
+        with log_path.open("ab") as handle:
+            offset = handle.seek(0, os.SEEK_END)
+            handle.write(blob)
+        entry = {
+            "seq": seq,
+            "stage": stage,
+            "attempt": attempt,
+            "created_at": created_at,
+            "offset": offset,
+            "length": len(blob),
+            "raw_bytes": len(raw_text.encode("utf-8")),
+        }
+        line = json.dumps(entry) + "\n"
+        with _stage_index_path(data_dir, video_id, stage).open("a", encoding="utf-8") as handle:
+            handle.write(line)
+        with _index_path(data_dir, video_id).open("a", encoding="utf-8") as handle:
+            handle.write(line)
+        first_in_stage = _read_first(_stage_index_path(data_dir, video_id, stage))
+
+    limit = keep_per_stage()
+    # Compact lazily so the rewrite cost is amortized over many appends.
+    # Retention only drops the oldest attempts, so a stage's attempt numbers stay contiguous.
+    if attempt - first_in_stage["attempt"] + 1 > limit * 2:
+        apply_retention(data_dir, video_id, keep=limit)
+    return entry
+
+
+def apply_retention(data_dir: Path, video_id: str, keep: Optional[int] = None) -> int:
+    """Keep the newest ``keep`` attempts per stage; return the number of attempts dropped."""
+    keep = keep or keep_per_stage()
+    with file_lock(_lock_path(data_dir, video_id)):
+        _ensure_stage_indexes(data_dir, video_id)
+        entries = list_attempts(data_dir, video_id)
+        retained: List[Dict[str, Any]] = []
+        per_stage: Dict[str, int] = {}
+        for entry in reversed(entries):
+            per_stage[entry["stage"]] = per_stage.get(entry["stage"], 0) + 1
+            if per_stage[entry["stage"]] <= keep:
+                retained.append(entry)
+        retained.reverse()
+        dropped = len(entries) - len(retained)
+        if not dropped:
+            return 0
+
+        log_path = _log_path(data_dir, video_id)
+        tmp_log = log_path.with_suffix(".gz.tmp")
+        new_entries = []
+        with log_path.open("rb") as source, tmp_log.open("wb") as target:
+            for entry in retained:
+                source.seek(entry["offset"])
+                blob = source.read(entry["length"])
+                new_entries.append({**entry, "offset": target.tell()})
+                target.write(blob)
+        tmp_log.replace(log_path)
+        by_stage: Dict[str, List[Dict[str, Any]]] = {stage: [] for stage in per_stage}
+        for entry in new_entries:
+            by_stage[entry["stage"]].append(entry)
+        for stage, stage_entries in by_stage.items():
+            _write_index(_stage_index_path(data_dir, video_id, stage), stage_entries)
+        _write_index(_index_path(data_dir, video_id), new_entries)
+        return dropped
+
+
+def main() -> int:
+    load_project_env()
+    from .storage_utils import DATA_DIR
+
+    if len(sys.argv) < 3 or sys.argv[1] not in {"list", "show", "compact"}:
+        print(
+            "Usage: python -m lib.raw_archive list <video_id> [stage]\n"
+            "       python -m lib.raw_archive show <video_id> <seq>\n"
+            "       python -m lib.raw_archive compact <video_id> [keep_per_stage]",
+            file=sys.stderr,
+        )
+        return 1
+
+    mode, video_id = sys.argv[1], sys.argv[2]
+    if mode == "list":
+        stage = sys.argv[3] if len(sys.argv) > 3 else None
+        for entry in list_attempts(DATA_DIR, video_id, stage):
+            print(json.dumps(entry))
+    elif mode == "show":
+        if len(sys.argv) < 4 or not sys.argv[3].isdigit():
+            print("show requires a numeric seq", file=sys.stderr)
+            return 1
+        seq = int(sys.argv[3])
+        match = next((entry for entry in list_attempts(DATA_DIR, video_id) if entry["seq"] == seq), None)
+        if not match:
+            print(f"No archived attempt {seq} for {video_id}", file=sys.stderr)
+            return 1
+        print(read_attempt(DATA_DIR, video_id, match))
+    else:
+        keep = int(sys.argv[3]) if len(sys.argv) > 3 and sys.argv[3].isdigit() else None
+        print(f"Dropped {apply_retention(DATA_DIR, video_id, keep=keep)} archived attempts for {video_id}.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
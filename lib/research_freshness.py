@@ -0,0 +1,178 @@
+"""Freshness and stale-while-revalidate for cached research.
+
+A ``research_cache`` row stays fresh for the shortest ``freshness_window_days``
+declared by its sources (``RESEARCH_FRESHNESS_DAYS`` when none is declared),
+counted from its last refresh; the deadline is stored in ``expires_at``. Rows
+written before that column existed are aged from ``updated_at``.
+
+Stale rows are still served immediately. ``ResearchRefresher`` reruns the
+research for the topic on a background thread (one refresh per topic at a
+time). The refreshed result replaces the cached content only when it
+materially changes the research: sources were added or dropped, the figures in
+key facts or data points differ, or the key facts' word overlap falls below
+``RESEARCH_MATERIAL_SIMILARITY``. Otherwise only ``expires_at`` moves forward,
+so the research artifact keeps its hash and the journaled downstream stages
+stay valid.
+
+Refresh threads are deliberately not daemonic: a CLI run that started a
+refresh waits for that one research call before the interpreter exits, so the
+refreshed row is never dropped half-way. The pipeline daemon is long-lived and
+never waits on it. Set ``RESEARCH_REFRESH_WORKERS`` to bound concurrent refreshes.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Set
+
+
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*%?")
+_WORD = re.compile(r"[a-z0-9]{3,}")
+
+
+def default_freshness_days() -> int:
+    return int(os.getenv("RESEARCH_FRESHNESS_DAYS", "7"))
+
+
+def material_similarity() -> float:
+    return float(os.getenv("RESEARCH_MATERIAL_SIMILARITY", "0.6"))
+
+
+def freshness_window_days(payload: Dict[str, Any], default: Optional[int] = None) -> int:
+    windows = []
+    for source in payload.get("sources") or []:
+        try:
+            days = int(source.get("freshness_window_days"))
+        except (AttributeError, TypeError, ValueError):
+            continue
+        if days > 0:
+            windows.append(days)
+    return min(windows) if windows else (default_freshness_days() if default is None else default)
+
+
+def expires_at(payload: Dict[str, Any], refreshed_at: Optional[datetime] = None) -> datetime:
+    refreshed_at = refreshed_at or datetime.now(timezone.utc)
+    return refreshed_at + timedelta(days=freshness_window_days(payload))
+
+
+def _parse_time(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _payload(content: Any) -> Dict[str, Any]:
+    if isinstance(content, dict):
+        return content
+    try:
+        loaded = json.loads(content or "")
+    except (TypeError, ValueError):
+        return {}
+    return loaded if isinstance(loaded, dict) else {}
+
+
+def is_stale(row: Dict[str, Any], now: Optional[datetime] = None) -> bool:
+    """True once the row's ``expires_at`` has passed; rows with no usable timestamp count as stale."""
+    now = now or datetime.now(timezone.utc)
+    deadline = _parse_time(row.get("expires_at"))
+    if deadline is None:
+        refreshed_at = _parse_time(row.get("updated_at")) or _parse_time(row.get("created_at"))
+        if refreshed_at is None:
+            return True
+        deadline = expires_at(_payload(row.get("content")), refreshed_at)
+    return now >= deadline
+
+
+def _source_keys(payload: Dict[str, Any]) -> Set[str]:
+    keys = set()
+    for source in payload.get("sources") or []:
+        if not isinstance(source, dict):
+            continue
+        url = str(source.get("url") or "").strip().lower()
+        url = re.sub(r"^https?://(www\.)?", "", url).rstrip("/")
+        key = url or str(source.get("title") or "").strip().lower()
+        if key:
+            keys.add(key)
+    return keys
+
+
+def _figures(payload: Dict[str, Any]) -> Set[str]:
+    texts = [str(fact) for fact in payload.get("key_facts") or []]
+    texts += [str(point.get("value", "")) for point in payload.get("data_points") or [] if isinstance(point, dict)]
+    return {match.replace(",", "") for text in texts for match in _NUMBER.findall(text)}
+
+
+def _fact_words(payload: Dict[str, Any]) -> Set[str]:
+    return {word for fact in payload.get("key_facts") or [] for word in _WORD.findall(str(fact).lower())}
+
+
+def material_change(old: Dict[str, Any], new: Dict[str, Any], similarity: Optional[float] = None) -> bool:
+    """Whether ``new`` changes what downstream stages would say, not just how the research is worded."""
+    if _source_keys(old) != _source_keys(new) or _figures(old) != _figures(new):
+        return True
+    old_words, new_words = _fact_words(old), _fact_words(new)
+    if not old_words and not new_words:
+        return False
+    overlap = len(old_words & new_words) / len(old_words | new_words)
+    return overlap < (material_similarity() if similarity is None else similarity)
+
+
+class ResearchRefresher:
+    """Runs research refreshes off the critical path, at most one in flight per topic."""
+
+    def __init__(self, max_workers: Optional[int] = None) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or int(os.getenv("RESEARCH_REFRESH_WORKERS", "1")), thread_name_prefix="research-refresh")
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def schedule(self, topic: str, refresh: Callable[[], Any]) -> Future:
+        """Start ``refresh`` unless one is already running for ``topic``; returns the running refresh."""
+        with self._lock:
+            future = self._inflight.get(topic)
+            if future is not None:
+                return future
+            future = self._inflight[topic] = self._executor.submit(self._run, topic, refresh)
+            return future
+
+    def _run(self, topic: str, refresh: Callable[[], Any]) -> Any:
+        try:
+            return refresh()
+        except Exception as exc:
+            print(f"⚠️ Background research refresh failed for {topic}: {exc}", file=sys.stderr)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(topic, None)
+
+    def is_pending(self, topic: str) -> bool:
+        with self._lock:
+            return topic in self._inflight
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._inflight)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+_default: Optional[ResearchRefresher] = None
+_default_lock = threading.Lock()
+
+
+def default_refresher() -> ResearchRefresher:
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ResearchRefresher()
+        return _default
@@ -0,0 +1,150 @@
+"""Map-reduce research over long transcripts and comment sets.
+
+Long research inputs are split on semantic boundaries (sections, then
+paragraphs or comment lines, then sentences) into chunks of at most
+``RESEARCH_CHUNK_CHARS``. Each chunk is condensed into short JSON notes by the
+fast model on ``RESEARCH_MAP_WORKERS`` threads, and one reduce call turns the
+merged notes into the ``research_output`` payload. Chunk notes are capped in
+size, so the reduce prompt and the per-call latency stay bounded however long
+the input gets. ``VideoResearcher`` switches to this mode above
+``RESEARCH_MAPREDUCE_MIN_CHARS``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from .json_utils import extract_json
+
+
+_SECTION_SPLIT = re.compile(r"\n(?=\[[^\]\n]+\]\n)")
+_PARAGRAPH_SPLIT = re.compile(r"\n\s*\n")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+_SPLITTERS = (_SECTION_SPLIT, _PARAGRAPH_SPLIT, re.compile(r"\n"), _SENTENCE_SPLIT)
+
+MapFn = Callable[[str, str], str]
+
+
+def default_chunk_chars() -> int:
+    return int(os.getenv("RESEARCH_CHUNK_CHARS", "6000"))
+
+
+def default_map_workers() -> int:
+    return int(os.getenv("RESEARCH_MAP_WORKERS", "4"))
+
+
+def mapreduce_min_chars() -> int:
+    return int(os.getenv("RESEARCH_MAPREDUCE_MIN_CHARS", "8000"))
+
+
+def _split_units(text: str, max_chars: int, level: int = 0) -> List[str]:
+    if len(text) <= max_chars:
+        return [text]
+    if level >= len(_SPLITTERS):
+        return [text[index : index + max_chars] for index in range(0, len(text), max_chars)]
+    parts = [part for part in _SPLITTERS[level].split(text) if part.strip()]
+    if len(parts) <= 1:
+        return _split_units(text, max_chars, level + 1)
+    units: List[str] = []
+    for part in parts:
+        units.extend(_split_units(part, max_chars, level + 1))
+    return units
+
+
+def _pack(units: List[str], max_chars: int) -> List[str]:
+    chunks: List[str] = []
+    current = ""
+    for unit in units:
+        unit = unit.strip()
+        if current and len(current) + 1 + len(unit) > max_chars:
+            chunks.append(current)
+            current = unit
+        else:
+            current = f"{current}\n{unit}" if current else unit
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_semantic(text: str, max_chars: Optional[int] = None) -> List[str]:
+    """Split into chunks of at most ``max_chars``; sections always start a new chunk, smaller units are packed greedily."""
+    max_chars = max_chars or default_chunk_chars()
+    chunks: List[str] = []
+    for section in _SECTION_SPLIT.split(text.strip()):
+        if section.strip():
+            chunks.extend(_pack(_split_units(section.strip(), max_chars, level=1), max_chars))
+    return chunks
+
+
+def map_prompt(topic: str, index: int, total: int, chunk: str) -> str:
+    return (
+        "You are the Research agent's note taker. Read one part of a video's metadata, transcript and viewer comments "
+        "and return JSON only:\n"
+        "{\n"
+        '  "summary": "2-3 sentences",\n'
+        '  "facts": ["verifiable claims stated in this part"],\n'
+        '  "data_points": [{"metric": "...", "value": "...", "timeframe": "..."}],\n'
+        '  "source_hints": ["named reports, institutions or datasets referenced"],\n'
+        '  "viewer_signals": ["recurring viewer questions, objections or reactions"]\n'
+        "}\n"
+        "Constraints: English only; at most 8 items per list; keep the whole answer under 250 words.\n\n"
+        f"Topic: {topic}\n"
+        f"Part {index + 1} of {total}:\n{chunk}\n"
+    )
+
+
+def map_chunks(
+    topic: str,
+    chunks: List[str],
+    generate: MapFn,
+    *,
+    map_model: str,
+    max_workers: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Condense every chunk concurrently; unparsable or failed chunks are skipped with an ``error`` note."""
+    max_workers = max_workers or default_map_workers()
+
+    def run(index: int) -> Dict[str, Any]:
+        try:
+            notes = extract_json(generate(map_prompt(topic, index, len(chunks), chunks[index]), map_model))
+            if not isinstance(notes, dict):
+                raise ValueError("chunk notes are not a JSON object")
+            return {"part": index + 1, **notes}
+        except Exception as exc:
+            return {"part": index + 1, "error": str(exc)}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks))), thread_name_prefix="research-map") as executor:
+        notes = list(executor.map(run, range(len(chunks))))
+    if all("error" in item for item in notes):
+        raise RuntimeError(f"All {len(chunks)} research chunks failed: {notes[0]['error']}")
+    return notes
+
+
+def map_reduce_research(
+    topic: str,
+    text: str,
+    generate: MapFn,
+    build_reduce_prompt: Callable[[str], str],
+    *,
+    map_model: str,
+    reduce_model: str,
+    chunk_chars: Optional[int] = None,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Return the reduce call's raw text plus chunk bookkeeping for the run log."""
+    chunks = split_semantic(text, chunk_chars)
+    notes = map_chunks(topic, chunks, generate, map_model=map_model, max_workers=max_workers)
+    material = json.dumps([item for item in notes if "error" not in item], ensure_ascii=False, indent=1)
+    return {
+        "text": generate(build_reduce_prompt(material), reduce_model),
+        "chunks": len(chunks),
+        "failed_chunks": sum(1 for item in notes if "error" in item),
+    }
+
+
+def should_map_reduce(text: str, min_chars: Optional[int] = None) -> bool:
+    return len(text) > (mapreduce_min_chars() if min_chars is None else min_chars)
@@ -1,25 +1,17 @@
 import json
-import os
 import re
-import sys
-from pathlib import Path
-
-import yt_dlp
-from dotenv import load_dotenv
+from datetime import datetime, timezone
 
 from .json_utils import ensure_schema_version, extract_json
 from .model_router import ModelRouter
+from .research_freshness import default_refresher, expires_at, is_stale, material_change
+from .research_mapreduce import map_reduce_research, should_map_reduce
 from .run_logger import build_metrics, emit_run_log
 from .schema_validator import validate_payload
 from .storage_utils import normalize_video_id, save_json, save_raw
 from .supabase_client import supabase
 from .trend_scout import TrendScout
-
-# Keep virtual environment path if used locally.
-venv_path = Path(__file__).resolve().parent.parent / ".venv" / "Lib" / "site-packages"
-sys.path.append(str(venv_path))
-
-load_dotenv()
+from .video_extractor import default_extractor
 
 
 class VideoResearcher:
@@ -99,71 +91,33 @@ class VideoResearcher:
         return warnings
 
     def get_video_transcript(self, video_id):
-        """Fetch metadata and comments for analysis."""
-        ydl_opts = {
-            "skip_download": True,
-            "quiet": True,
-            "get_comments": True,
-            "max_comments": 30,
-            "extract_flat": False,
-        }
-        js_runtime = os.getenv("YTDLP_JS_RUNTIME")
-        if js_runtime:
-            ydl_opts["js_runtimes"] = [js_runtime]
+        """Fetch metadata and comments for analysis (cached, see lib.video_extractor)."""
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                url = f"https://www.youtube.com/watch?v={video_id}" if len(video_id) == 11 else video_id
-                info = ydl.extract_info(url, download=False)
+            info = default_extractor().extract(video_id)
 
-                content = f"Title: {info.get('title')}\n"
-                content += f"Description: {info.get('description')}\n"
-                content += f"Tags: {info.get('tags', [])}\n"
+            content = f"Title: {info.get('title')}\n"
+            content += f"Description: {info.get('description')}\n"
+            content += f"Tags: {info.get('tags', [])}\n"
 
-                comments = info.get("comments", [])
-                comment_text = "\n".join([f"- {c.get('text')}" for c in comments])
-                content += f"\n[Viewer Reactions]\n{comment_text}"
+            comments = info.get("comments") or []
+            comment_text = "\n".join([f"- {c.get('text')}" for c in comments])
+            content += f"\n[Viewer Reactions]\n{comment_text}"
 
-                return content
+            return content
         except Exception as e:
             return f"Error: {str(e)}"
 
-    def analyze_viral_strategy(self, topic, force_update=False):
-        """
-        force_update=True: always re-run analysis.
-        force_update=False: reuse cached data when available.
-        """
-        normalized_topic = normalize_video_id(topic)
-
-        if not force_update:
-            cached = supabase.table("research_cache").select("*").eq("topic", normalized_topic).execute()
-            if cached.data:
-                cached_content = cached.data[0].get("content")
-                if cached_content:
-                    print(f"💡 Loaded cached research: {topic}")
-                    emit_run_log(
-                        stage="research",
-                        status="success",
-                        input_refs={"topic": topic},
-                        output_refs={"cache": "hit"},
-                        metrics=build_metrics(cache_hit=True),
-                    )
-                    try:
-                        cached_payload = json.loads(cached_content)
-                        save_json("research", normalized_topic, cached_payload)
-                    except json.JSONDecodeError:
-                        pass
-                    return cached_content
-
-        print(f"🚀 [NEW/REFRESH] Starting research analysis: {normalized_topic}")
-        transcript_text = self.get_video_transcript(normalized_topic)
-
-        selected_model = self.main_model
-        if len(transcript_text) > 8000:
-            selected_model = self.heavy_model
-
-        print(f"📡 Model in use: {selected_model}")
+    def _generate(self, prompt, model):
+        try:
+            return self.router.generate_content(prompt, preferred_models=[model])
+        except Exception as e:
+            if "429" not in str(e):
+                raise
+            print("⚠️ Quota exceeded. Retrying with model rotation.")
+            return self.router.generate_content(prompt, preferred_models=[model])
 
-        prompt_text = (
+    def _research_prompt(self, topic, material_label, material):
+        return (
             "You are the Research agent. Return JSON only that matches this schema:\n"
             "{\n"
             '  "executive_summary": "...",\n'
@@ -181,63 +135,203 @@ class VideoResearcher:
             "- Use real, verifiable sources.\n"
             "- General-knowledge claims may use lighter citation density, but factual/high-risk claims need explicit source_ids.\n"
             "\n"
-            f"Topic: {normalized_topic}\n\n"
-            f"Video transcript and comments:\n{transcript_text}\n"
+            f"Topic: {topic}\n\n"
+            f"{material_label}:\n{material}\n"
         )
 
+    def _cached_row(self, normalized_topic):
+        cached = supabase.table("research_cache").select("*").eq("topic", normalized_topic).execute()
+        if cached.data and cached.data[0].get("content"):
+            return cached.data[0]
+        return None
+
+    def _write_cache(self, normalized_topic, research_payload, transcript_text):
+        refreshed_at = datetime.now(timezone.utc)
+        supabase.table("research_cache").upsert(
+            {
+                "topic": normalized_topic,
+                "content": json.dumps(research_payload, ensure_ascii=False),
+                "raw_transcript": transcript_text,
+                "updated_at": refreshed_at.isoformat(),
+                "expires_at": expires_at(research_payload, refreshed_at).isoformat(),
+            },
+            on_conflict="topic",
+        ).execute()
+
+    def _run_analysis(self, normalized_topic):
+        """Run the model calls; returns (raw text, schema-valid payload or None, transcript, mode refs)."""
+        transcript_text = self.get_video_transcript(normalized_topic)
+
+        research_mode = {"mode": "single"}
         analysis_result = ""
         try:
-            analysis_result = self.router.generate_content(prompt_text, preferred_models=[selected_model])
-        except Exception as e:
-            if "429" in str(e):
-                print("⚠️ Quota exceeded. Retrying with model rotation.")
-                analysis_result = self.router.generate_content(prompt_text, preferred_models=[selected_model])
+            if should_map_reduce(transcript_text):
+                print(f"📡 Map-reduce research: {self.fast_model} (map) -> {self.main_model} (reduce)")
+                outcome = map_reduce_research(
+                    normalized_topic,
+                    transcript_text,
+                    self._generate,
+                    lambda notes: self._research_prompt(
+                        normalized_topic,
+                        "Research notes condensed from the video transcript and comments (one entry per part)",
+                        notes,
+                    ),
+                    map_model=self.fast_model,
+                    reduce_model=self.main_model,
+                )
+                analysis_result = outcome["text"]
+                research_mode = {"mode": "map_reduce", "chunks": outcome["chunks"], "failed_chunks": outcome["failed_chunks"]}
             else:
-                emit_run_log(
-                    stage="research",
-                    status="failure",
-                    input_refs={"topic": normalized_topic},
-                    error_summary=str(e),
-                    metrics=build_metrics(cache_hit=False),
+                selected_model = self.main_model
+                # Reached only when RESEARCH_MAPREDUCE_MIN_CHARS is raised above 8000.
+                if len(transcript_text) > 8000:
+                    selected_model = self.heavy_model
+                print(f"📡 Model in use: {selected_model}")
+                analysis_result = self._generate(
+                    self._research_prompt(normalized_topic, "Video transcript and comments", transcript_text),
+                    selected_model,
                 )
-                raise e
+        except Exception as e:
+            emit_run_log(
+                stage="research",
+                status="failure",
+                input_refs={"topic": normalized_topic},
+                error_summary=str(e),
+                metrics=build_metrics(cache_hit=False),
+            )
+            raise e
 
         research_payload = None
+        valid = False
         if analysis_result:
             save_raw("research_raw", normalized_topic, analysis_result)
             try:
                 research_payload = extract_json(analysis_result)
                 ensure_schema_version(research_payload, "1.0")
-                save_json("research", normalized_topic, research_payload)
-                validation_error = None
                 try:
                     validate_payload("research_output", research_payload)
+                    valid = True
                 except Exception as exc:
-                    validation_error = str(exc)
-                    print(f"⚠️ Research schema validation warning: {validation_error}")
+                    print(f"⚠️ Research schema validation warning: {exc}")
                 governance_warnings = self._validate_source_governance(research_payload)
                 if governance_warnings:
                     print(f"⚠️ Source governance warning: {', '.join(governance_warnings)}")
-
-                if not validation_error:
-                    supabase.table("research_cache").upsert(
-                        {
-                            "topic": normalized_topic,
-                            "content": json.dumps(research_payload, ensure_ascii=False),
-                            "raw_transcript": transcript_text,
-                            "updated_at": "now()",
-                        },
-                        on_conflict="topic",
-                    ).execute()
-                    print("✅ Research cache updated.")
             except Exception as e:
+                research_payload = None
                 print(f"⚠️ Failed to parse research data: {e}")
+        return analysis_result, research_payload, valid, transcript_text, research_mode
+
+    def revalidate(self, topic):
+        """
+        Re-run research for a cached topic.
+        The cached content (and the local research artifact) is replaced only when the result
+        materially changes; otherwise only the row's expires_at moves forward.
+        """
+        normalized_topic = normalize_video_id(topic)
+        row = self._cached_row(normalized_topic)
+        print(f"♻️ Revalidating cached research: {normalized_topic}")
+        analysis_result, research_payload, valid, transcript_text, research_mode = self._run_analysis(normalized_topic)
+        if not valid:
+            emit_run_log(
+                stage="research",
+                status="failure",
+                input_refs={"topic": normalized_topic, "revalidate": True},
+                error_summary="Refreshed research failed schema validation; cached research kept.",
+                metrics=build_metrics(cache_hit=False),
+            )
+            return {"topic": normalized_topic, "updated": False, "material_change": False}
+
+        cached_payload = None
+        if row:
+            try:
+                cached_payload = json.loads(row["content"])
+            except json.JSONDecodeError:
+                cached_payload = None
+        changed = not isinstance(cached_payload, dict) or material_change(cached_payload, research_payload)
+        if changed:
+            save_json("research", normalized_topic, research_payload)
+            self._write_cache(normalized_topic, research_payload, transcript_text)
+            print(f"✅ Research materially changed; downstream stages will be rebuilt: {normalized_topic}")
+        else:
+            refreshed_at = datetime.now(timezone.utc)
+            supabase.table("research_cache").update(
+                {
+                    "updated_at": refreshed_at.isoformat(),
+                    "expires_at": expires_at(cached_payload, refreshed_at).isoformat(),
+                }
+            ).eq("topic", normalized_topic).execute()
+            print(f"✅ Research unchanged; freshness extended: {normalized_topic}")
+
+        emit_run_log(
+            stage="research",
+            status="success",
+            input_refs={"topic": normalized_topic, "revalidate": True},
+            output_refs={"cache": "revalidated", "material_change": changed, **research_mode},
+            metrics=build_metrics(cache_hit=False),
+        )
+        return {"topic": normalized_topic, "updated": True, "material_change": changed}
+
+    def revalidate_in_background(self, topic):
+        normalized_topic = normalize_video_id(topic)
+        return default_refresher().schedule(normalized_topic, lambda: self.revalidate(normalized_topic))
+
+    def refresh_pending(self, topic):
+        return default_refresher().is_pending(normalize_video_id(topic))
+
+    def revalidate_if_stale(self, topic):
+        """Start a background refresh when the cached row is stale; returns whether one was started."""
+        normalized_topic = normalize_video_id(topic)
+        row = self._cached_row(normalized_topic)
+        if row is None or not is_stale(row):
+            return False
+        self.revalidate_in_background(normalized_topic)
+        return True
+
+    def analyze_viral_strategy(self, topic, force_update=False):
+        """
+        force_update=True: always re-run analysis.
+        force_update=False: reuse cached data when available; stale data is returned
+        immediately while a background refresh runs.
+        """
+        normalized_topic = normalize_video_id(topic)
+
+        if not force_update:
+            cached_row = self._cached_row(normalized_topic)
+            if cached_row:
+                cached_content = cached_row["content"]
+                stale = is_stale(cached_row)
+                if stale:
+                    print(f"💡 Loaded stale cached research (refreshing in background; the process waits for it before exiting): {topic}")
+                    self.revalidate_in_background(normalized_topic)
+                else:
+                    print(f"💡 Loaded cached research: {topic}")
+                emit_run_log(
+                    stage="research",
+                    status="success",
+                    input_refs={"topic": topic},
+                    output_refs={"cache": "stale" if stale else "hit"},
+                    metrics=build_metrics(cache_hit=True),
+                )
+                try:
+                    cached_payload = json.loads(cached_content)
+                    save_json("research", normalized_topic, cached_payload)
+                except json.JSONDecodeError:
+                    pass
+                return cached_content
+
+        print(f"🚀 [NEW/REFRESH] Starting research analysis: {normalized_topic}")
+        analysis_result, research_payload, valid, transcript_text, research_mode = self._run_analysis(normalized_topic)
+        if research_payload is not None:
+            save_json("research", normalized_topic, research_payload)
+            if valid:
+                self._write_cache(normalized_topic, research_payload, transcript_text)
+                print("✅ Research cache updated.")
 
         emit_run_log(
             stage="research",
             status="success",
             input_refs={"topic": normalized_topic},
-            output_refs={"cache": "updated" if analysis_result else "skipped"},
+            output_refs={"cache": "updated" if analysis_result else "skipped", **research_mode},
             metrics=build_metrics(cache_hit=False),
         )
         if research_payload:
@@ -0,0 +1,119 @@
+"""Append-only per-video run journal for stage-granular resume.
+
+Each completed stage appends one line to ``data/journal/{video_id}.jsonl``
+recording the hash of the stage's inputs and of the output artifact. A
+restarted run reuses a stored artifact only when the journal proves it was
+produced from the same inputs and has not changed since, so it resumes at the
+first stage whose inputs are new or whose output is missing.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .serialization import canonical_hash
+
+
+STAGE_ORDER = ["research", "plan", "script_long", "script_shorts", "scenes", "image", "motion", "metadata"]
+
+_lock = threading.Lock()
+
+
+def journal_inputs(**inputs: Any) -> str:
+    """Hash a stage's named inputs (payloads or scalars) into one stable key."""
+    return canonical_hash({name: canonical_hash(value) for name, value in sorted(inputs.items())})
+
+
+class RunJournal:
+    def __init__(self, data_dir: Path, video_id: str) -> None:
+        self.video_id = video_id
+        self.path = data_dir / "journal" / f"{video_id}.jsonl"
+        self._latest: Optional[Dict[str, Dict[str, Any]]] = None
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Return stage entries recorded since the last reset (oldest first)."""
+        if not self.path.exists():
+            return []
+        entries: List[Dict[str, Any]] = []
+        for line in self.path.read_text(encoding="utf-8").splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # A torn final line from a crash mid-append.
+            if entry.get("event") == "reset":
+                entries = []
+            elif entry.get("event") == "stage_complete":
+                entries.append(entry)
+        return entries
+
+    def latest(self, stage: str) -> Optional[Dict[str, Any]]:
+        if self._latest is None:
+            self._latest = {entry["stage"]: entry for entry in self.entries()}
+        return self._latest.get(stage)
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with _lock, self.path.open("a+b") as handle:
+            # A crash mid-append leaves a torn last line; end it first so the new entry gets its own line.
+            if handle.seek(0, os.SEEK_END) > 0:
+                handle.seek(-1, os.SEEK_END)
+                if handle.read(1) != b"\n":
+                    line = "\n" + line
+            handle.write(line.encode("utf-8"))
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def record(self, stage: str, *, run_id: str, input_hash: str, output_hash: str) -> Dict[str, Any]:
+        entry = {
+            "event": "stage_complete",
+            "stage": stage,
+            "run_id": run_id,
+            "input_hash": input_hash,
+            "output_hash": output_hash,
+            "completed_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self._append(entry)
+        if self._latest is not None:
+            self._latest[stage] = entry
+        return entry
+
+    def reset(self, run_id: str) -> None:
+        """Invalidate every earlier entry (used by ``--refresh``)."""
+        self._append({"event": "reset", "run_id": run_id, "at": datetime.now(timezone.utc).isoformat()})
+        self._latest = {}
+
+    def verify(self, stage: str, input_hash: str, payload: Dict[str, Any]) -> bool:
+        entry = self.latest(stage)
+        return bool(entry) and entry["input_hash"] == input_hash and entry["output_hash"] == canonical_hash(payload)
+
+    def first_incomplete(self) -> Optional[str]:
+        for stage in STAGE_ORDER:
+            if self.latest(stage) is None:
+                return stage
+        return None
+
+
+def main() -> int:
+    from .storage_utils import DATA_DIR, normalize_video_id
+
+    if len(sys.argv) < 2:
+        print("Usage: python -m lib.run_journal <youtube_url_or_id>", file=sys.stderr)
+        return 1
+    journal = RunJournal(DATA_DIR, normalize_video_id(sys.argv[1]))
+    for entry in journal.entries():
+        print(json.dumps(entry, ensure_ascii=False))
+    print(f"Resume point: {journal.first_incomplete() or 'complete'}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
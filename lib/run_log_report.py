@@ -0,0 +1,293 @@
+"""Per-stage latency, retry, cache and failure analytics over pipeline run logs.
+
+Reads ``pipeline_runs`` from Supabase (or the local spill file written by
+``lib.run_logger`` when inserts fail) for a time window and reports, per
+stage: p50/p90/p99 latency, retry and cache-hit rates, token and cost totals
+and the most common failure reasons. Latency percentiles cover only records
+that measured a latency and did not hit a cache; pipeline start/failure
+records and cache hits log ``latency_ms=0`` and would otherwise drag the
+percentiles toward zero. Cache-hit latency is reported as ``cache_hit_p50_ms``. ``--compare-since`` adds a second window
+and prints the per-stage deltas between the two.
+
+    python -m lib.run_log_report --since 7d
+    python -m lib.run_log_report --since 24h --compare-since 48h --compare-until 24h --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import re
+import sys
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .run_logger import SPILL_PATH
+
+
+PAGE_SIZE = 1000
+_RELATIVE = re.compile(r"^(\d+)([mhdw])$")
+_UNITS = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+_FAILURE_STATUSES = {"failure", "failed", "error"}
+
+
+def parse_time(value: Optional[str], now: Optional[datetime] = None) -> Optional[datetime]:
+    """Parse ``7d`` / ``24h`` / ``30m`` / ``2w`` (relative to now) or an ISO timestamp."""
+    if not value:
+        return None
+    now = now or datetime.now(timezone.utc)
+    match = _RELATIVE.match(value.strip())
+    if match:
+        return now - timedelta(**{_UNITS[match.group(2)]: int(match.group(1))})
+    parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _created_at(record: Dict[str, Any]) -> Optional[datetime]:
+    raw = record.get("created_at")
+    if not raw:
+        return None
+    try:
+        return parse_time(str(raw))
+    except ValueError:
+        return None
+
+
+def _in_window(record: Dict[str, Any], since: Optional[datetime], until: Optional[datetime]) -> bool:
+    created = _created_at(record)
+    if created is None:
+        return since is None and until is None
+    return (since is None or created >= since) and (until is None or created < until)
+
+
+def load_spill(path: Path, since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    if not path.exists():
+        return []
+    records: List[Dict[str, Any]] = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if _in_window(record, since, until):
+            records.append(record)
+    return records
+
+
+def load_supabase(since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    from .supabase_client import supabase
+
+    records: List[Dict[str, Any]] = []
+    start = 0
+    while True:
+        query = supabase.table("pipeline_runs").select("*")
+        if since is not None:
+            query = query.gte("created_at", since.isoformat())
+        if until is not None:
+            query = query.lt("created_at", until.isoformat())
+        page = query.order("created_at").range(start, start + PAGE_SIZE - 1).execute().data or []
+        records.extend(page)
+        if len(page) < PAGE_SIZE:
+            return records
+        start += PAGE_SIZE
+
+
+def load_runs(source: str, since: Optional[datetime] = None, until: Optional[datetime] = None, spill_path: Path = SPILL_PATH) -> List[Dict[str, Any]]:
+    if source == "spill":
+        return load_spill(spill_path, since, until)
+    if source == "supabase":
+        return load_supabase(since, until)
+    raise ValueError(f"Unknown run-log source: {source}")
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile; None for an empty sample."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _latency(metrics: Dict[str, Any]) -> Optional[float]:
+    """Measured latency in ms, or None when the record did not time anything."""
+    value = _number(metrics.get("latency_ms"))
+    return value if value > 0 else None
+
+
+def _failure_reason(record: Dict[str, Any]) -> str:
+    summary = str(record.get("error_summary") or "").strip()
+    if not summary:
+        return "unknown"
+    return summary.splitlines()[0].split(":", 1)[0][:80]
+
+
+def summarize_runs(records: Iterable[Dict[str, Any]], top_failures: int = 3) -> Dict[str, Dict[str, Any]]:
+    """Aggregate run-log records into per-stage statistics (keyed by stage)."""
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        grouped.setdefault(str(record.get("stage") or "unknown"), []).append(record)
+
+    summary: Dict[str, Dict[str, Any]] = {}
+    for stage, items in sorted(grouped.items()):
+        latencies: List[float] = []
+        cache_hit_latencies: List[float] = []
+        for item in items:
+            metrics = item.get("metrics") or {}
+            latency = _latency(metrics)
+            if latency is not None:
+                (cache_hit_latencies if metrics.get("cache_hit") else latencies).append(latency)
+        failures = [item for item in items if str(item.get("status", "")).lower() in _FAILURE_STATUSES]
+        retried = sum(
+            1
+            for item in items
+            if _number((item.get("metrics") or {}).get("retry_count")) > 0 or int(_number(item.get("attempts"))) > 1
+        )
+        cache_hits = sum(1 for item in items if (item.get("metrics") or {}).get("cache_hit"))
+        reasons = Counter(_failure_reason(item) for item in failures)
+        count = len(items)
+        summary[stage] = {
+            "count": count,
+            "failures": len(failures),
+            "failure_rate": len(failures) / count,
+            "p50_ms": percentile(latencies, 50),
+            "p90_ms": percentile(latencies, 90),
+            "p99_ms": percentile(latencies, 99),
+            "timed": len(latencies),
+            "cache_hit_p50_ms": percentile(cache_hit_latencies, 50),
+            "retry_rate": retried / count,
+            "cache_hit_rate": cache_hits / count,
+            "tokens": int(sum(_number((item.get("metrics") or {}).get("tokens")) for item in items)),
+            "cost_usd": round(sum(_number((item.get("metrics") or {}).get("cost_usd")) for item in items), 6),
+            "top_failures": [{"reason": reason, "count": n} for reason, n in reasons.most_common(top_failures)],
+        }
+    return summary
+
+
+_DIFF_FIELDS = ["count", "failure_rate", "p50_ms", "p90_ms", "p99_ms", "retry_rate", "cache_hit_rate", "tokens", "cost_usd"]
+
+
+def diff_summaries(current: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Per-stage ``current - baseline`` deltas; None where either side has no value."""
+    diff: Dict[str, Dict[str, Any]] = {}
+    for stage in sorted(set(current) | set(baseline)):
+        now, before = current.get(stage, {}), baseline.get(stage, {})
+        row: Dict[str, Any] = {}
+        for field in _DIFF_FIELDS:
+            a, b = now.get(field), before.get(field)
+            row[field] = None if a is None or b is None else round(a - b, 6)
+        diff[stage] = row
+    return diff
+
+
+def _fmt(value: Any, kind: str = "num") -> str:
+    if value is None:
+        return "-"
+    if kind == "pct":
+        return f"{value * 100:.1f}%"
+    if kind == "usd":
+        return f"{value:.4f}"
+    return f"{value:.0f}" if isinstance(value, float) else str(value)
+
+
+def format_table(summary: Dict[str, Dict[str, Any]]) -> str:
+    lines = [
+        f"{'stage':<22} {'runs':>5} {'fail%':>6} {'p50_ms':>8} {'p90_ms':>8} {'p99_ms':>8} "
+        f"{'retry%':>7} {'cache%':>7} {'tokens':>9} {'cost_usd':>9}  top failure"
+    ]
+    for stage, row in summary.items():
+        top = row.get("top_failures") or []
+        lines.append(
+            f"{stage[:22]:<22} {row['count']:>5} {_fmt(row['failure_rate'], 'pct'):>6} "
+            f"{_fmt(row['p50_ms']):>8} {_fmt(row['p90_ms']):>8} {_fmt(row['p99_ms']):>8} "
+            f"{_fmt(row['retry_rate'], 'pct'):>7} {_fmt(row['cache_hit_rate'], 'pct'):>7} "
+            f"{row['tokens']:>9} {_fmt(row['cost_usd'], 'usd'):>9}  "
+            + (f"{top[0]['reason']} (x{top[0]['count']})" if top else "")
+        )
+    return "\n".join(lines)
+
+
+def format_diff(diff: Dict[str, Dict[str, Any]]) -> str:
+    def signed(value: Any, kind: str = "num") -> str:
+        if value is None:
+            return "-"
+        text = _fmt(abs(value), kind)
+        return ("+" if value >= 0 else "-") + text
+
+    lines = [f"{'stage':<22} {'Δruns':>6} {'Δfail%':>7} {'Δp50_ms':>8} {'Δp90_ms':>8} {'Δp99_ms':>8} {'Δretry%':>8} {'Δcache%':>8} {'Δcost':>9}"]
+    for stage, row in diff.items():
+        lines.append(
+            f"{stage[:22]:<22} {signed(row['count']):>6} {signed(row['failure_rate'], 'pct'):>7} "
+            f"{signed(row['p50_ms']):>8} {signed(row['p90_ms']):>8} {signed(row['p99_ms']):>8} "
+            f"{signed(row['retry_rate'], 'pct'):>8} {signed(row['cache_hit_rate'], 'pct'):>8} {signed(row['cost_usd'], 'usd'):>9}"
+        )
+    return "\n".join(lines)
+
+
+def build_report(args: argparse.Namespace, now: Optional[datetime] = None) -> Dict[str, Any]:
+    now = now or datetime.now(timezone.utc)
+    since, until = parse_time(args.since, now), parse_time(args.until, now)
+    spill_path = Path(args.spill_path) if args.spill_path else SPILL_PATH
+    summary = summarize_runs(load_runs(args.source, since, until, spill_path))
+    report: Dict[str, Any] = {
+        "source": args.source,
+        "window": {"since": since.isoformat() if since else None, "until": until.isoformat() if until else None},
+        "stages": summary,
+    }
+    if args.compare_since or args.compare_until:
+        compare_since, compare_until = parse_time(args.compare_since, now), parse_time(args.compare_until, now)
+        baseline = summarize_runs(load_runs(args.source, compare_since, compare_until, spill_path))
+        report["baseline"] = {
+            "window": {
+                "since": compare_since.isoformat() if compare_since else None,
+                "until": compare_until.isoformat() if compare_until else None,
+            },
+            "stages": baseline,
+        }
+        report["diff"] = diff_summaries(summary, baseline)
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Summarize pipeline run logs per stage.")
+    parser.add_argument("--source", choices=["supabase", "spill"], default="supabase")
+    parser.add_argument("--spill-path", help="Spill file to read with --source spill.")
+    parser.add_argument("--since", default="7d", help="Window start: 7d, 24h, 30m, 2w or ISO timestamp.")
+    parser.add_argument("--until", help="Window end (default: now).")
+    parser.add_argument("--compare-since", help="Baseline window start for a diff.")
+    parser.add_argument("--compare-until", help="Baseline window end for a diff.")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args()
+
+    try:
+        report = build_report(args)
+    except ValueError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return 0
+    if not report["stages"]:
+        print("No run logs in window.")
+    else:
+        print(format_table(report["stages"]))
+    if "diff" in report:
+        print()
+        print(format_diff(report["diff"]))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
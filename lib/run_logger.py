@@ -1,14 +1,30 @@
-"""Run-log utilities for pipeline observability."""
+"""Run-log utilities for pipeline observability.
+
+Records go to the Supabase ``pipeline_runs`` table. When the insert fails
+(offline runs, missing credentials) the record is appended to
+``data/run_log_spill.jsonl`` instead so ``lib.run_log_report`` can still
+analyse it.
+"""
 
 from __future__ import annotations
 
+import json
 import sys
+import threading
 import uuid
+from datetime import datetime, timezone
+from pathlib import Path
 from typing import Any, Dict, Optional
 
+from .metrics import RUN_LOG_RECORDS, RUN_LOG_SPILLS
 from .supabase_client import supabase
 
 
+SPILL_PATH = Path(__file__).resolve().parent.parent / "data" / "run_log_spill.jsonl"
+
+_spill_lock = threading.Lock()
+
+
 def build_metrics(
     *,
     latency_ms: int = 0,
@@ -54,8 +70,23 @@ def emit_run_log(
         "error_summary": error_summary,
         "metrics": metrics_payload,
     }
+    RUN_LOG_RECORDS.inc(stage=stage, status=status, cache="hit" if metrics_payload.get("cache_hit") else "miss")
     try:
         supabase.table("pipeline_runs").insert(payload).execute()
     except Exception as exc:  # Avoid crashing on logging failures.
         print(f"Run log insert failed: {exc}", file=sys.stderr)
+        spill_run_log(payload)
     return run_id
+
+
+def spill_run_log(payload: Dict[str, Any], path: Optional[Path] = None) -> None:
+    """Append a run-log record to the local spill file (best effort)."""
+    target = path or SPILL_PATH
+    record = {**payload, "created_at": datetime.now(timezone.utc).isoformat()}
+    RUN_LOG_SPILLS.inc()
+    try:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with _spill_lock, target.open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    except OSError as exc:
+        print(f"Run log spill failed: {exc}", file=sys.stderr)
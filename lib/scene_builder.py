@@ -4,10 +4,6 @@ import sys
 import time
 from pathlib import Path
 
-# Keep virtual environment path if used locally.
-venv_path = Path(__file__).resolve().parent.parent / ".venv" / "Lib" / "site-packages"
-sys.path.append(str(venv_path))
-
 from .json_utils import ensure_schema_version, extract_json
 from .model_router import ModelRouter
 from .run_logger import build_metrics, emit_run_log
@@ -3,10 +3,14 @@
 from __future__ import annotations
 
 import json
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, Dict
 
-from jsonschema import Draft7Validator
+from .tracing import traced
+
+if TYPE_CHECKING:
+    from jsonschema import Draft7Validator
 
 SCHEMA_DIR = Path(__file__).resolve().parent.parent / "spec" / "schemas"
 
@@ -57,9 +61,17 @@ def load_schema(name: str) -> Dict[str, Any]:
     return json.loads(schema_path.read_text(encoding="utf-8"))
 
 
+@lru_cache(maxsize=None)
+def get_validator(name: str) -> "Draft7Validator":
+    """Return a compiled validator, built once per process and schema name."""
+    from jsonschema import Draft7Validator
+
+    return Draft7Validator(load_schema(name))
+
+
+@traced("schema.validate_payload", cat="schema")
 def validate_payload(schema_name: str, payload: Dict[str, Any]) -> None:
-    schema = load_schema(schema_name)
-    validator = Draft7Validator(schema)
+    validator = get_validator(schema_name)
     errors = sorted(validator.iter_errors(payload), key=lambda e: e.path)
     if errors:
         messages = "\n".join(f"- {error.message}" for error in errors)
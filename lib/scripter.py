@@ -1,11 +1,5 @@
 import json
 import os
-import sys
-from pathlib import Path
-
-# Path and library wiring.
-venv_path = Path(__file__).resolve().parent.parent / ".venv" / "Lib" / "site-packages"
-sys.path.append(str(venv_path))
 
 from .supabase_client import supabase
 from .json_utils import ensure_schema_version, extract_json_relaxed
@@ -13,10 +7,8 @@ from .model_router import ModelRouter
 from .run_logger import build_metrics, emit_run_log
 from .schema_validator import validate_payload
 from .storage_utils import normalize_video_id, save_json, save_raw
-from dotenv import load_dotenv
 import re
 
-load_dotenv()
 
 class ContentScripter:
     def __init__(self):
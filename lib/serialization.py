@@ -0,0 +1,91 @@
+"""JSON serialization helpers shared by storage, Supabase writes and hashing.
+
+Uses orjson when it is installed and falls back to the stdlib encoder with
+identical output conventions (UTF-8, no ASCII escaping). ``SerializedPayload``
+memoizes the encodings and hash of one payload version so a stage result is
+encoded once and reused for the local artifact, database rows and provenance.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:  # Optional accelerator; stdlib json is used when missing.
+    orjson = None
+
+
+def dumps(payload: Any, *, pretty: bool = False) -> str:
+    if orjson is not None:
+        try:
+            option = orjson.OPT_INDENT_2 if pretty else 0
+            return orjson.dumps(payload, option=option).decode("utf-8")
+        except TypeError:
+            pass  # e.g. non-str keys or >64-bit ints; the stdlib encoder handles them.
+    if pretty:
+        return json.dumps(payload, ensure_ascii=False, indent=2)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+def loads(text: str | bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def canonical_bytes(payload: Any) -> bytes:
+    """Sorted-key compact encoding used for content hashes."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def canonical_hash(payload: Any) -> str:
+    return hashlib.sha256(canonical_bytes(payload)).hexdigest()
+
+
+class SerializedPayload:
+    """Lazily computed, memoized encodings of one payload version.
+
+    Build a new instance whenever the payload is mutated; the cached strings
+    describe the payload as it was when first encoded.
+    """
+
+    def __init__(self, payload: Any) -> None:
+        self.payload = payload
+        self._text: Optional[str] = None
+        self._pretty: Optional[str] = None
+        self._canonical: Optional[bytes] = None
+        self._sha256: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        """Compact encoding for database columns."""
+        if self._text is None:
+            self._text = dumps(self.payload)
+        return self._text
+
+    @property
+    def pretty(self) -> str:
+        """Indented encoding for local artifacts."""
+        if self._pretty is None:
+            self._pretty = dumps(self.payload, pretty=True)
+        return self._pretty
+
+    @property
+    def canonical(self) -> bytes:
+        if self._canonical is None:
+            self._canonical = canonical_bytes(self.payload)
+        return self._canonical
+
+    @property
+    def sha256(self) -> str:
+        if self._sha256 is None:
+            self._sha256 = hashlib.sha256(self.canonical).hexdigest()
+        return self._sha256
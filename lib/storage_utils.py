@@ -1,14 +1,36 @@
-"""Storage helpers for local JSON backups and video ID normalization."""
+"""Storage helpers for local JSON backups and video ID normalization.
+
+Artifacts are written as loose files under ``data/`` by default. Setting
+``ARTIFACT_STORE=sqlite`` routes the same calls into a single SQLite bundle
+(``data/artifacts.sqlite3``, see ``lib.artifact_store``); paths returned and
+accepted by these helpers keep the ``data/{video_id}_{stage}.json`` shape in
+both modes so callers do not need to know which backend is active.
+"""
 
 from __future__ import annotations
 
-import json
+import os
 import re
+import threading
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from .artifact_store import ArtifactStore, content_hash
+from .metrics import ARTIFACT_BYTES, ARTIFACT_WRITES
+from .raw_archive import append_raw, latest_raw
+from .serialization import SerializedPayload, dumps, loads
+from .tracing import span, traced
 
 
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+STORE_PATH = DATA_DIR / "artifacts.sqlite3"
+STORE_BACKEND_ENV = "ARTIFACT_STORE"
+
+_store: Optional[ArtifactStore] = None
+_store_pid: Optional[int] = None
+# (content hash, size, mtime_ns) of the last file written or verified (loose-file mode).
+_known_hashes: Dict[str, tuple[str, int, int]] = {}
 
 
 def ensure_data_dir() -> Path:
@@ -21,38 +43,145 @@ def normalize_video_id(value: str) -> str:
     return match.group(1) if match else value.strip()
 
 
+def get_artifact_store() -> Optional[ArtifactStore]:
+    """Return the shared SQLite store when enabled, otherwise None (loose-file mode)."""
+    global _store, _store_pid
+    if os.getenv(STORE_BACKEND_ENV, "files").strip().lower() != "sqlite":
+        return None
+    # SQLite connections must not cross fork(); pool workers open their own.
+    if _store is None or _store_pid != os.getpid():
+        ensure_data_dir()
+        _store = ArtifactStore(STORE_PATH)
+        _store_pid = os.getpid()
+    return _store
+
+
+@contextmanager
+def artifact_transaction() -> Iterator[None]:
+    """Commit every save issued inside the block atomically (no-op for loose files)."""
+    store = get_artifact_store()
+    with store.transaction() if store else nullcontext():
+        yield
+
+
 def _stage_path(stage: str, video_id: str) -> Path:
     ensure_data_dir()
     return DATA_DIR / f"{video_id}_{stage}.json"
 
 
-def save_json(stage: str, video_id: str, payload: Dict[str, Any]) -> Path:
-    ensure_data_dir()
-    path = _stage_path(stage, video_id)
-    tmp_path = path.with_suffix(".json.tmp")
-    tmp_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-    tmp_path.replace(path)
+def _remember(path: Path, digest: str) -> None:
+    stat = path.stat()
+    _known_hashes[path.name] = (digest, stat.st_size, stat.st_mtime_ns)
+
+
+def _is_unchanged(path: Path, digest: str, size: int) -> bool:
+    try:
+        stat = path.stat()
+    except OSError:
+        return False
+    if stat.st_size != size:
+        return False
+    known = _known_hashes.get(path.name)
+    if known and known[1:] == (stat.st_size, stat.st_mtime_ns):
+        return known[0] == digest
+    try:
+        existing = content_hash(path.read_text(encoding="utf-8"))
+    except (OSError, UnicodeDecodeError):
+        return False
+    _known_hashes[path.name] = (existing, stat.st_size, stat.st_mtime_ns)
+    return existing == digest
+
+
+def _write_text(path: Path, content: str, *, stage: str, video_id: str, kind: str) -> Path:
+    """Write an artifact unless the stored copy already has the same content hash."""
+    store = get_artifact_store()
+    if store:
+        with span("store.put", cat="io", artifact=path.name):
+            store.put(name=path.name, video_id=video_id, stage=stage, kind=kind, content=content)
+        return path
+    digest = content_hash(content)
+    size = len(content.encode("utf-8"))
+    if _is_unchanged(path, digest, size):
+        ARTIFACT_WRITES.inc(kind=kind, result="unchanged")
+        return path
+    with span("file.write", cat="io", artifact=path.name):
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(content, encoding="utf-8")
+        tmp_path.replace(path)
+    _remember(path, digest)
+    ARTIFACT_WRITES.inc(kind=kind, result="written")
+    ARTIFACT_BYTES.inc(size, kind=kind)
     return path
 
 
+@traced("storage.save_json", cat="io")
+def save_json(stage: str, video_id: str, payload: Union[Dict[str, Any], SerializedPayload]) -> Path:
+    path = _stage_path(stage, video_id)
+    if isinstance(payload, SerializedPayload):
+        content = payload.pretty
+    else:
+        content = dumps(payload, pretty=True)
+    return _write_text(path, content, stage=stage, video_id=video_id, kind="json")
+
+
+@traced("storage.save_raw", cat="io")
 def save_raw(stage: str, video_id: str, raw_text: str) -> Path:
+    """Append a raw model response to the video's compressed attempt archive."""
     ensure_data_dir()
-    path = _stage_path(stage, video_id)
-    tmp_path = path.with_suffix(".json.tmp")
-    payload = {"raw_text": raw_text}
-    tmp_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-    tmp_path.replace(path)
-    return path
+    append_raw(DATA_DIR, video_id, stage, raw_text)
+    return DATA_DIR / "raw_archive" / f"{video_id}.jsonl.gz"
+
+
+def load_raw(stage: str, video_id: str) -> Optional[str]:
+    """Return the latest raw response for a stage (archive first, legacy ``_raw.json`` second)."""
+    ensure_data_dir()
+    archived = latest_raw(DATA_DIR, video_id, stage)
+    if archived is not None:
+        return archived
+    legacy_path = _stage_path(stage, video_id)
+    if artifact_exists(legacy_path):
+        return load_json(legacy_path).get("raw_text")
+    return None
 
 
+@traced("storage.save_markdown", cat="io")
 def save_markdown(stage: str, video_id: str, content: str) -> Path:
     ensure_data_dir()
     path = DATA_DIR / f"{video_id}_{stage}.md"
-    tmp_path = path.with_suffix(".md.tmp")
-    tmp_path.write_text(content, encoding="utf-8")
-    tmp_path.replace(path)
-    return path
+    return _write_text(path, content, stage=stage, video_id=video_id, kind="md")
+
+
+def artifact_exists(path: Path) -> bool:
+    store = get_artifact_store()
+    if store and store.exists(path.name):
+        return True
+    return path.exists()
+
+
+def delete_artifact(path: Path) -> None:
+    store = get_artifact_store()
+    if store:
+        store.delete(path.name)
+    _known_hashes.pop(path.name, None)
+    path.unlink(missing_ok=True)
+
+
+def list_artifact_names() -> List[str]:
+    """Return artifact file names from the active backend (store entries plus loose files)."""
+    names = set()
+    if DATA_DIR.exists():
+        names.update(entry.name for entry in os.scandir(DATA_DIR) if entry.is_file())
+    store = get_artifact_store()
+    if store:
+        names.update(store.names())
+    return sorted(names)
 
 
+@traced("storage.load_json", cat="io")
 def load_json(path: Path) -> Dict[str, Any]:
-    return json.loads(path.read_text(encoding="utf-8"))
+    store = get_artifact_store()
+    if store:
+        content = store.get(path.name)
+        if content is not None:
+            return loads(content)
+    return loads(path.read_bytes())
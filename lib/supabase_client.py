@@ -1,30 +1,81 @@
-# lib/supabase_client.py
 """Supabase client initialization for YouTube Automation Factory.
 
 Loads SUPABASE_URL and SUPABASE_KEY from root .env.
 Uses supabase-py. See spec/TECH_SPEC.md.
+
+The client is created on first use rather than at import time, so modules
+that only import ``supabase`` (and never touch the database) start without
+pulling in supabase-py or reading credentials.
 """
 
+from __future__ import annotations
+
 import os
-from pathlib import Path
-from dotenv import load_dotenv
-from supabase import create_client, Client
+import threading
+from typing import Any
+
+from .env_utils import load_project_env
+from .tracing import active_tracer, span
+
+_client: Any = None
+_lock = threading.Lock()
+
+
+def get_client() -> Any:
+    """Return the shared client, creating it on the first call."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                load_project_env()
+                url = os.getenv("SUPABASE_URL")
+                key = os.getenv("SUPABASE_KEY")  # Match the .env key name if needed.
+                if not url or not key:
+                    raise ValueError(
+                        "SUPABASE_URL and SUPABASE_KEY must be set in .env at project root."
+                    )
+                from supabase import create_client
+
+                _client = create_client(url, key)
+    return _client
+
+
+_QUERY_OPS = {"select", "insert", "upsert", "update", "delete"}
+
+
+class _TracedQuery:
+    """Wraps a query builder so ``execute()`` is recorded as a ``db:<table>.<op>`` span."""
+
+    def __init__(self, target: Any, label: str) -> None:
+        self._target = target
+        self._label = label
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+        if name == "execute":
+            def execute(*args: Any, **kwargs: Any) -> Any:
+                with span(f"db:{self._label}", cat="db"):
+                    return attr(*args, **kwargs)
+
+            return execute
+        label = f"{self._label}.{name}" if name in _QUERY_OPS else self._label
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            return _TracedQuery(attr(*args, **kwargs), label)
+
+        return call
 
-# 1. Load .env from project root
-_ROOT = Path(__file__).resolve().parent.parent
-load_dotenv(_ROOT / ".env")
 
-_URL = os.getenv("SUPABASE_URL")
-_KEY = os.getenv("SUPABASE_KEY")  # Match the .env key name if needed.
+class _LazyClient:
+    """Stand-in for the module-level ``supabase`` name; forwards to ``get_client()``."""
 
-if not _URL or not _KEY:
-    raise ValueError(
-        "SUPABASE_URL and SUPABASE_KEY must be set in .env at project root."
-    )
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(get_client(), name)
+        if name in {"table", "rpc"} and active_tracer() is not None:
+            return lambda target, *args, **kwargs: _TracedQuery(attr(target, *args, **kwargs), f"{name}:{target}" if name == "rpc" else target)
+        return attr
 
-# 2. Initialize the client (outside the function).
-supabase: Client = create_client(_URL, _KEY)
 
-def get_client() -> Client:
-    """Optional: Return the pre-configured client."""
-    return supabase
+supabase: Any = _LazyClient()
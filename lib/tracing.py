@@ -0,0 +1,159 @@
+"""Lightweight span tracing with Chrome trace-event export.
+
+Tracing is off unless a ``Tracer`` is active (``with tracing(path): ...`` or
+``python -m lib.pipeline_runner --trace trace.json``); disabled spans cost one
+global lookup. Spans nest per thread, so the summary can report self time
+(total minus child spans) next to total time. Open the exported JSON in
+``chrome://tracing`` or https://ui.perfetto.dev for a flamegraph view.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Tracer:
+    def __init__(self) -> None:
+        self.origin_ns = time.perf_counter_ns()
+        self.events: List[Dict[str, Any]] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self) -> List[List[int]]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name: str, cat: str = "func", **args: Any) -> Iterator[None]:
+        stack = self._stack()
+        frame = [0]  # accumulated child duration (ns)
+        stack.append(frame)
+        start_ns = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            duration_ns = time.perf_counter_ns() - start_ns
+            stack.pop()
+            if stack:
+                stack[-1][0] += duration_ns
+            event = {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": (start_ns - self.origin_ns) / 1000,
+                "dur": duration_ns / 1000,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": {**args, "self_us": (duration_ns - frame[0]) / 1000},
+            }
+            with self._lock:
+                self.events.append(event)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        with self._lock:
+            events = list(self.events)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path: Path) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.chrome_trace(), ensure_ascii=False), encoding="utf-8")
+        return path
+
+
+_active: Optional[Tracer] = None
+
+
+def active_tracer() -> Optional[Tracer]:
+    return _active
+
+
+@contextmanager
+def span(name: str, cat: str = "func", **args: Any) -> Iterator[None]:
+    tracer = _active
+    if tracer is None:
+        yield
+        return
+    with tracer.span(name, cat, **args):
+        yield
+
+
+def traced(name: Optional[str] = None, cat: str = "func") -> Callable[[F], F]:
+    """Decorator form of ``span``; the span name defaults to the function's qualified name."""
+
+    def decorator(func: F) -> F:
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            tracer = _active
+            if tracer is None:
+                return func(*args, **kwargs)
+            with tracer.span(label, cat):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+@contextmanager
+def tracing(path: Optional[Path] = None) -> Iterator[Tracer]:
+    """Activate a tracer for the block; export Chrome trace JSON to ``path`` on exit."""
+    global _active
+    previous = _active
+    tracer = Tracer()
+    _active = tracer
+    try:
+        yield tracer
+    finally:
+        _active = previous
+        if path is not None:
+            tracer.export(path)
+
+
+def summarize(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Aggregate complete events into per-name count / total / self time (ms), slowest self time first."""
+    rows: Dict[str, Dict[str, Any]] = {}
+    for event in events:
+        if event.get("ph") != "X":
+            continue
+        row = rows.setdefault(event["name"], {"name": event["name"], "cat": event.get("cat", ""), "count": 0, "total_ms": 0.0, "self_ms": 0.0})
+        row["count"] += 1
+        row["total_ms"] += event["dur"] / 1000
+        row["self_ms"] += event.get("args", {}).get("self_us", event["dur"]) / 1000
+    return sorted(rows.values(), key=lambda row: row["self_ms"], reverse=True)
+
+
+def format_summary(rows: List[Dict[str, Any]], limit: int = 30) -> str:
+    lines = [f"{'span':<48} {'cat':<9} {'count':>6} {'total_ms':>11} {'self_ms':>11}"]
+    for row in rows[:limit]:
+        lines.append(
+            f"{row['name'][:48]:<48} {row['cat'][:9]:<9} {row['count']:>6} {row['total_ms']:>11.1f} {row['self_ms']:>11.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> int:
+    if len(sys.argv) < 2:
+        print("Usage: python -m lib.tracing <trace.json> [limit]", file=sys.stderr)
+        return 1
+    trace = json.loads(Path(sys.argv[1]).read_text(encoding="utf-8"))
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 and sys.argv[2].isdigit() else 30
+    print(format_summary(summarize(trace.get("traceEvents", [])), limit=limit))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,11 +1,13 @@
 import os
-from googleapiclient.discovery import build
-from dotenv import load_dotenv
 
-load_dotenv()
+from .env_utils import load_project_env
+
 
 class TrendScout:
     def __init__(self):
+        from googleapiclient.discovery import build
+
+        load_project_env()
         self.youtube = build("youtube", "v3", developerKey=os.getenv("YOUTUBE_API_KEY"))
 
     def fetch_trending_videos(self, region_code='KR', max_results=10):
@@ -0,0 +1,275 @@
+"""Concurrent YouTube upload queue with a shared bandwidth cap.
+
+Jobs are ``ops publish`` payloads (``video_id``, ``metadata_path``,
+``video_path``, ``privacy_status``, ``notify_subscribers``) with an optional
+``priority`` (lower runs first, default 100). ``UPLOAD_WORKERS`` uploads run at
+once. They share one set of OAuth credentials and one YouTube API client,
+with one HTTP transport per worker thread. Every chunk first reserves its
+bytes from a global limiter, so the batch's average throughput stays under
+``UPLOAD_MAX_MBPS``; smaller ``YOUTUBE_UPLOAD_CHUNK_MB`` values give smoother
+shaping. Each job's ``upload_state`` (queued / uploading / done / failed),
+bytes sent and errors are written to ``video_uploads`` as it runs::
+
+    python -m lib.upload_queue batch.json [--workers 3] [--max-mbps 40]
+
+``batch.json`` is a list of payloads or ``{"uploads": [...]}``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .env_utils import load_project_env
+from .run_logger import build_metrics, emit_run_log
+from .storage_utils import load_json
+from .youtube_uploader import UploadSessionStore, build_youtube_client, build_youtube_credentials, upload_chunk_size, upload_video
+
+
+DEFAULT_PRIORITY = 100
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class BandwidthLimiter:
+    """Reserves transmit slots so callers together stay under ``bytes_per_s`` on average."""
+
+    def __init__(self, bytes_per_s: float, sleep: Callable[[float], None] = time.sleep, clock: Callable[[], float] = time.monotonic) -> None:
+        self.bytes_per_s = bytes_per_s
+        self._sleep = sleep
+        self._clock = clock
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, nbytes: int) -> float:
+        """Block until ``nbytes`` may be sent; returns the time waited."""
+        if self.bytes_per_s <= 0:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            start = max(now, self._next_at)
+            self._next_at = start + nbytes / self.bytes_per_s
+        wait = start - now
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+class SupabaseUploadStatus:
+    """Writes per-job upload state into ``video_uploads`` (one row per video_id)."""
+
+    def __init__(self, client: Any = None) -> None:
+        if client is None:
+            from .supabase_client import get_client
+
+            client = get_client()
+        self.client = client
+
+    def update(self, video_id: str, fields: Dict[str, Any]) -> None:
+        self.client.table("video_uploads").upsert(
+            {"video_id": video_id, **fields, "updated_at": _now()}, on_conflict="video_id"
+        ).execute()
+
+
+class UploadQueue:
+    def __init__(
+        self,
+        *,
+        max_workers: int = 2,
+        max_bytes_per_s: float = 0.0,
+        status: Any = None,
+        youtube: Any = None,
+        credentials: Any = None,
+        uploader: Callable[..., Dict[str, Any]] = upload_video,
+        chunk_size: Optional[int] = None,
+        session_store: Optional[UploadSessionStore] = None,
+        progress_interval_s: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_workers = max(1, max_workers)
+        self.limiter = BandwidthLimiter(max_bytes_per_s)
+        self.status = status
+        self.youtube = youtube
+        self.credentials = credentials
+        self.uploader = uploader
+        self.chunk_size = chunk_size or upload_chunk_size()
+        self.session_store = session_store or UploadSessionStore()
+        self.progress_interval_s = progress_interval_s
+        self._clock = clock
+        self._heap: List[Tuple[int, int, Dict[str, Any]]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def submit(self, payload: Dict[str, Any], priority: Optional[int] = None) -> None:
+        if not payload.get("video_id") or not payload.get("video_path") or not payload.get("metadata_path"):
+            raise ValueError("Upload jobs require video_id, video_path and metadata_path.")
+        if priority is None:
+            priority = int(payload.get("priority", DEFAULT_PRIORITY))
+        with self._lock:
+            heapq.heappush(self._heap, (priority, next(self._seq), payload))
+        self._report(payload["video_id"], {"upload_state": "queued", "priority": priority})
+
+    def _next_job(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return heapq.heappop(self._heap)[2] if self._heap else None
+
+    def _report(self, video_id: str, fields: Dict[str, Any]) -> None:
+        if self.status is None:
+            return
+        try:
+            self.status.update(video_id, fields)
+        except Exception as exc:  # Status bookkeeping must not fail the upload.
+            print(f"Upload status update skipped for {video_id}: {exc}", file=sys.stderr)
+
+    def _http(self) -> Any:
+        # httplib2 connections are not thread-safe; each worker gets its own authorized transport.
+        if self.credentials is None:
+            return None
+        http = getattr(self._local, "http", None)
+        if http is None:
+            import google_auth_httplib2
+            import httplib2
+
+            http = self._local.http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http())
+        return http
+
+    def _upload(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        video_id = payload["video_id"]
+        video_path = Path(payload["video_path"])
+        try:
+            total = video_path.stat().st_size
+        except OSError as exc:
+            self._report(video_id, {"upload_state": "failed", "last_error": str(exc)})
+            return {"video_id": video_id, "upload_state": "failed", "error": str(exc)}
+        self._report(video_id, {"upload_state": "uploading", "bytes_uploaded": 0, "total_bytes": total, "last_error": None})
+        last_report = [self._clock()]
+
+        def on_progress(sent: int, total_bytes: int) -> None:
+            now = self._clock()
+            if sent < total_bytes and now - last_report[0] < self.progress_interval_s:
+                return
+            last_report[0] = now
+            self._report(video_id, {"bytes_uploaded": sent, "total_bytes": total_bytes})
+
+        start = time.monotonic()
+        try:
+            result = self.uploader(
+                metadata=load_json(Path(payload["metadata_path"])),
+                video_path=video_path,
+                privacy_status=payload.get("privacy_status", "private"),
+                notify_subscribers=payload.get("notify_subscribers", False),
+                youtube=self.youtube,
+                chunk_size=self.chunk_size,
+                session_store=self.session_store,
+                on_progress=on_progress,
+                before_chunk=lambda: self.limiter.acquire(self.chunk_size),
+                http=self._http(),
+            )
+        except Exception as exc:
+            self._report(video_id, {"upload_state": "failed", "last_error": str(exc)[:2000]})
+            return {"video_id": video_id, "upload_state": "failed", "error": str(exc)}
+        self._report(
+            video_id,
+            {
+                "upload_state": "done",
+                "youtube_video_id": result.get("video_id"),
+                "status": result.get("status"),
+                "notify_subscribers": result.get("notify_subscribers"),
+                "published_at": _now(),
+                "metadata_path": payload["metadata_path"],
+                "video_path": payload["video_path"],
+                "bytes_uploaded": total,
+            },
+        )
+        return {
+            "video_id": video_id,
+            "upload_state": "done",
+            "youtube_video_id": result.get("video_id"),
+            "bytes": total,
+            "seconds": round(time.monotonic() - start, 3),
+        }
+
+    def _worker(self) -> List[Dict[str, Any]]:
+        results = []
+        while True:
+            payload = self._next_job()
+            if payload is None:
+                return results
+            results.append(self._upload(payload))
+
+    def run(self) -> List[Dict[str, Any]]:
+        """Upload every queued job (highest priority first) and return one result per job."""
+        if self.youtube is None:
+            self.credentials = self.credentials or build_youtube_credentials()
+            self.youtube = build_youtube_client(self.credentials)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="upload-worker") as executor:
+            futures = [executor.submit(self._worker) for _ in range(self.max_workers)]
+            return [result for future in futures for result in future.result()]
+
+
+def _load_batch(path: Path) -> List[Dict[str, Any]]:
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    return payload["uploads"] if isinstance(payload, dict) else payload
+
+
+def main() -> int:
+    load_project_env()
+    parser = argparse.ArgumentParser(description="Upload a batch of videos concurrently under a bandwidth cap.")
+    parser.add_argument("batch", help="JSON list of publish payloads, or {'uploads': [...]}")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("UPLOAD_WORKERS", "2")))
+    parser.add_argument(
+        "--max-mbps", type=float, default=float(os.getenv("UPLOAD_MAX_MBPS", "0")), help="Total upload cap in Mbit/s (0 = uncapped)"
+    )
+    args = parser.parse_args()
+
+    batch_path = Path(args.batch)
+    input_refs = {"batch": str(batch_path), "workers": args.workers, "max_mbps": args.max_mbps}
+    start = time.monotonic()
+    try:
+        queue = UploadQueue(
+            max_workers=args.workers,
+            max_bytes_per_s=args.max_mbps * 1_000_000 / 8,
+            status=SupabaseUploadStatus(),
+        )
+        for payload in _load_batch(batch_path):
+            queue.submit(payload)
+        results = queue.run()
+    except Exception as exc:
+        emit_run_log(
+            stage="upload",
+            status="failure",
+            input_refs=input_refs,
+            error_summary=str(exc),
+            metrics=build_metrics(cache_hit=False),
+        )
+        print(f"Upload batch failed: {exc}", file=sys.stderr)
+        return 1
+
+    failed = [result["video_id"] for result in results if result["upload_state"] != "done"]
+    emit_run_log(
+        stage="upload",
+        status="success" if not failed else "failure",
+        input_refs=input_refs,
+        output_refs={"uploads": results},
+        error_summary=f"{len(failed)} of {len(results)} uploads failed." if failed else None,
+        metrics=build_metrics(latency_ms=int((time.monotonic() - start) * 1000), cache_hit=False),
+    )
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    return 0 if not failed else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
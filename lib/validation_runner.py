@@ -3,12 +3,15 @@
 from __future__ import annotations
 
 import json
+import os
 import sys
+import time
 from pathlib import Path
-from typing import Any, Callable, Dict, Iterable, List
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 
-from .schema_validator import validate_json_file, validate_payload
-from .storage_utils import normalize_video_id
+from .env_utils import load_project_env
+from .schema_validator import validate_payload
+from .storage_utils import artifact_exists, list_artifact_names, load_json, normalize_video_id
 
 
 VALIDATION_TARGETS = {
@@ -33,6 +36,8 @@ STAGE_FILENAMES = {
 
 GEO_PHASE_A_WARN_FIELDS = ("target_locale", "target_region")
 
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
 
 def _build_metrics_default(**overrides: Any) -> Dict[str, Any]:
     payload = {
@@ -50,7 +55,9 @@ def _resolve_run_logger() -> tuple[Callable[..., Dict[str, Any]], Callable[...,
     """Return logger callables with a safe fallback in no-env contexts."""
     try:
         from .run_logger import build_metrics, emit_run_log
+        from .supabase_client import get_client
 
+        get_client()  # The client is lazy; probe it so missing env/deps fall back here.
         return build_metrics, emit_run_log
     except Exception:
         def _fallback_emit(**_: Any) -> str:
@@ -76,47 +83,185 @@ def validate_files(stage: str, json_paths: Iterable[str]) -> List[str]:
     schema_name = VALIDATION_TARGETS[stage]
     for path in json_paths:
         if stage == "scenes":
-            payload = json.loads(Path(path).read_text(encoding="utf-8"))
+            payload = load_json(Path(path))
             scenes = payload.get("scenes", [])
             if not scenes:
                 raise ValueError("Scene output missing 'scenes' array.")
             for scene in scenes:
                 validate_payload(schema_name, scene)
         elif stage == "image":
-            payload = json.loads(Path(path).read_text(encoding="utf-8"))
+            payload = load_json(Path(path))
             images = payload.get("images", [])
             if not images:
                 raise ValueError("Image output missing 'images' array.")
             for image in images:
                 validate_payload(schema_name, image)
         elif stage == "motion":
-            payload = json.loads(Path(path).read_text(encoding="utf-8"))
+            payload = load_json(Path(path))
             motions = payload.get("motions", [])
             if not motions:
                 raise ValueError("Motion output missing 'motions' array.")
             for motion in motions:
                 validate_payload(schema_name, motion)
         elif stage == "metadata":
-            payload = json.loads(Path(path).read_text(encoding="utf-8"))
+            payload = load_json(Path(path))
             validate_payload(schema_name, payload)
             warnings.extend(_validate_metadata_geo_readiness(payload))
         else:
-            validate_json_file(schema_name, path)
+            validate_payload(schema_name, load_json(Path(path)))
     return warnings
 
 
-def validate_all(video_id: str) -> List[str]:
-    data_dir = Path(__file__).resolve().parent.parent / "data"
+def validate_all(video_id: str, data_dir: Optional[Path] = None) -> List[str]:
+    data_dir = data_dir or DATA_DIR
     warnings: List[str] = []
     for stage, template in STAGE_FILENAMES.items():
         path = data_dir / template.format(video_id=video_id)
-        if not path.exists():
+        if not artifact_exists(path):
             raise FileNotFoundError(f"Missing file for stage {stage}: {path}")
         warnings.extend(validate_files(stage, [str(path)]))
     return warnings
 
 
+def discover_video_ids(data_dir: Optional[Path] = None) -> List[str]:
+    """Return every video ID with at least one canonical stage file in the data store."""
+    if data_dir is None:
+        names = list_artifact_names()
+    elif data_dir.exists():
+        names = [entry.name for entry in os.scandir(data_dir) if entry.is_file()]
+    else:
+        return []
+    suffixes = [template.replace("{video_id}", "") for template in STAGE_FILENAMES.values()]
+    video_ids = set()
+    for name in names:
+        for suffix in suffixes:
+            if name.endswith(suffix) and len(name) > len(suffix):
+                video_ids.add(name[: -len(suffix)])
+                break
+    return sorted(video_ids)
+
+
+def validate_video(video_id: str, data_dir: Optional[Path] = None) -> Dict[str, Any]:
+    """Validate all stages for one video and return a result record instead of raising."""
+    start_time = time.monotonic()
+    try:
+        warnings = validate_all(video_id, data_dir)
+        status, error = "success", None
+    except Exception as exc:
+        warnings, status, error = [], "failure", str(exc)
+    return {
+        "video_id": video_id,
+        "status": status,
+        "warnings": warnings,
+        "error": error,
+        "latency_ms": int((time.monotonic() - start_time) * 1000),
+    }
+
+
+def _validate_video_in_dir(args: tuple[str, Optional[str]]) -> Dict[str, Any]:
+    video_id, data_dir = args
+    return validate_video(video_id, Path(data_dir) if data_dir else None)
+
+
+def validate_corpus(
+    video_ids: Iterable[str],
+    data_dir: Optional[Path] = None,
+    max_workers: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Yield per-video validation results, fanning out across a process pool.
+
+    Each worker compiles every schema once (see ``get_validator``) and reuses it
+    for all videos it is handed, so cost scales with file count, not schema count.
+    """
+    jobs = [(video_id, str(data_dir) if data_dir else None) for video_id in video_ids]
+    workers = max_workers or os.cpu_count() or 1
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            yield _validate_video_in_dir(job)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_validate_video_in_dir, jobs, chunksize=chunksize)
+
+
+def _run_corpus(args: List[str]) -> int:
+    max_workers: Optional[int] = None
+    if "--workers" in args:
+        idx = args.index("--workers")
+        if idx + 1 >= len(args) or not args[idx + 1].isdigit():
+            print("Usage: python -m lib.validation_runner all --corpus [--workers N]", file=sys.stderr)
+            return 1
+        max_workers = int(args[idx + 1])
+
+    build_metrics, emit_run_log = _resolve_run_logger()
+    start_time = time.monotonic()
+    video_ids = discover_video_ids()
+    failed: List[str] = []
+    warning_counts: Dict[str, int] = {}
+    for result in validate_corpus(video_ids, max_workers=max_workers):
+        if result["status"] != "success":
+            failed.append(result["video_id"])
+        else:
+            warning_counts[result["video_id"]] = len(result["warnings"])
+        print(json.dumps(result, ensure_ascii=False), flush=True)
+    warning_count = sum(warning_counts.values())
+    if warning_counts:
+        _record_geo_warnings(warning_counts)
+
+    status = "success" if not failed else "failure"
+    emit_run_log(
+        stage="validation",
+        status=status,
+        input_refs={"stage": "all", "corpus": str(DATA_DIR), "video_count": len(video_ids)},
+        output_refs={"failed_video_ids": failed} if failed else None,
+        error_summary=f"{len(failed)} of {len(video_ids)} videos failed validation." if failed else None,
+        metrics={
+            **build_metrics(latency_ms=int((time.monotonic() - start_time) * 1000), cache_hit=False),
+            "geo_readiness_warning_count": warning_count,
+        },
+    )
+    print(
+        f"Validated {len(video_ids)} videos: {len(video_ids) - len(failed)} passed, {len(failed)} failed.",
+        file=sys.stderr,
+    )
+    return 0 if not failed else 1
+
+
+def _record_geo_warnings(counts: Dict[str, int]) -> Optional[Dict[str, Any]]:
+    """Feed today's per-video warning counts into the KPI store and the streaming GEO readiness tracker.
+
+    Returns the tracker status, or None when the tracker could not be updated.
+    """
+    try:
+        from datetime import date
+
+        from .kpi_store import KpiStore
+
+        with KpiStore.locked() as store:
+            for video_id, count in counts.items():
+                store.record_geo_warnings(video_id, date.today(), count)
+    except Exception as exc:  # KPI bookkeeping must not fail validation.
+        print(f"KPI store update skipped: {exc}", file=sys.stderr)
+    try:
+        from .geo_readiness_tracker import record_validation_warnings
+
+        status = record_validation_warnings(counts)
+        if status["level"] != "green" or status["phase_hold"]:
+            print(
+                f"⚠️ GEO readiness {status['level']}: {status['latest_warning_count']} warnings this week, "
+                f"phase hold={status['phase_hold']}",
+                file=sys.stderr,
+            )
+        return status
+    except Exception as exc:
+        print(f"GEO readiness tracker update skipped: {exc}", file=sys.stderr)
+        return None
+
+
 def main() -> int:
+    load_project_env()
     if len(sys.argv) < 3:
         print(
             "Usage: python -m lib.validation_runner <plan|research|scenes|image|motion|script|metadata|all> <json_path>...",
@@ -125,10 +270,13 @@ def main() -> int:
         return 1
 
     stage = sys.argv[1].strip().lower()
+    if stage == "all" and sys.argv[2] == "--corpus":
+        return _run_corpus(sys.argv[3:])
     if stage == "all":
         if len(sys.argv) < 4 or sys.argv[2] != "--url":
             print(
-                "Usage: python -m lib.validation_runner all --url <youtube_url_or_id>",
+                "Usage: python -m lib.validation_runner all --url <youtube_url_or_id>\n"
+                "       python -m lib.validation_runner all --corpus [--workers N]",
                 file=sys.stderr,
             )
             return 1
@@ -146,6 +294,7 @@ def main() -> int:
         warnings: List[str] = []
         if stage == "all":
             warnings = validate_all(video_id)
+            _record_geo_warnings({video_id: len(warnings)})
         else:
             warnings = validate_files(stage, json_paths)
         emit_run_log(
@@ -0,0 +1,248 @@
+"""Cached, parallel yt_dlp extraction for research inputs.
+
+``extract_info`` results are trimmed to the fields research reads (title,
+description, tags, comment text) and stored gzipped under
+``data/extract_cache/``. The key is the video ID (a hash of it for URLs and
+other non-standard IDs) plus a hash of the yt_dlp options, and entries are
+reused for ``YTDLP_CACHE_TTL_HOURS``. Cache writes are best-effort. Research
+``--refresh`` reruns therefore redo the analysis but not the extraction.
+Each worker thread keeps one ``YoutubeDL`` instance. Concurrent requests for
+the same key share one extraction. ``prefetch`` warms the cache for a batch
+of videos on ``YTDLP_WORKERS`` threads::
+
+    python -m lib.video_extractor prefetch <video_id|ids.txt> [--workers 4] [--force]
+    python -m lib.video_extractor purge
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from .env_utils import load_project_env
+from .serialization import canonical_hash
+
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / "data" / "extract_cache"
+RESEARCH_OPTS: Dict[str, Any] = {
+    "skip_download": True,
+    "quiet": True,
+    "get_comments": True,
+    "max_comments": 30,
+    "extract_flat": False,
+}
+CACHED_FIELDS = ("id", "title", "description", "tags", "comments")
+_VIDEO_ID = re.compile(r"^[A-Za-z0-9_-]{11}$")
+
+
+def research_opts() -> Dict[str, Any]:
+    opts = dict(RESEARCH_OPTS)
+    js_runtime = os.getenv("YTDLP_JS_RUNTIME")
+    if js_runtime:
+        opts["js_runtimes"] = [js_runtime]
+    return opts
+
+
+def video_url(video_id: str) -> str:
+    return f"https://www.youtube.com/watch?v={video_id}" if len(video_id) == 11 else video_id
+
+
+def research_fields(info: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep only what ``Researcher.get_video_transcript`` reads; formats, thumbnails and the rest are dropped."""
+    trimmed = {field: info[field] for field in CACHED_FIELDS if field in info}
+    if isinstance(trimmed.get("comments"), list):
+        trimmed["comments"] = [{"text": comment.get("text")} for comment in trimmed["comments"] if isinstance(comment, dict)]
+    return trimmed
+
+
+class ExtractionCache:
+    def __init__(self, path: Path = CACHE_DIR, ttl_s: Optional[float] = None, clock: Callable[[], float] = time.time) -> None:
+        self.path = path
+        self.ttl_s = ttl_s if ttl_s is not None else float(os.getenv("YTDLP_CACHE_TTL_HOURS", "24")) * 3600
+        self._clock = clock
+
+    def _file(self, key: str) -> Path:
+        return self.path / f"{key}.json.gz"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._file(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as handle:
+                entry = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        if self._clock() - entry.get("extracted_at", 0) > self.ttl_s:
+            return None
+        return entry["info"]
+
+    def put(self, key: str, info: Dict[str, Any]) -> Path:
+        self.path.mkdir(parents=True, exist_ok=True)
+        path = self._file(key)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as handle:
+            json.dump({"extracted_at": self._clock(), "info": info}, handle, ensure_ascii=False)
+        tmp_path.replace(path)
+        return path
+
+    def purge_expired(self) -> int:
+        removed = 0
+        for path in self.path.glob("*.json.gz"):
+            if self._clock() - path.stat().st_mtime > self.ttl_s:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+
+def _default_ydl_factory(opts: Dict[str, Any]) -> Any:
+    import yt_dlp
+
+    return yt_dlp.YoutubeDL(opts)
+
+
+class VideoExtractor:
+    """``extract_info`` behind an on-disk TTL cache, with one ``YoutubeDL`` per thread."""
+
+    def __init__(
+        self,
+        opts: Optional[Dict[str, Any]] = None,
+        *,
+        cache: Optional[ExtractionCache] = None,
+        max_workers: Optional[int] = None,
+        ydl_factory: Callable[[Dict[str, Any]], Any] = _default_ydl_factory,
+    ) -> None:
+        self.opts = opts if opts is not None else research_opts()
+        self.cache = cache or ExtractionCache()
+        self.max_workers = max_workers or int(os.getenv("YTDLP_WORKERS", "4"))
+        self._ydl_factory = ydl_factory
+        self._opts_hash = canonical_hash(self.opts)[:16]
+        self._local = threading.local()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.extractions = 0
+        self.cache_hits = 0
+
+    def key(self, video_id: str) -> str:
+        """Cache file stem; anything but a plain 11-character ID is hashed so it is safe as a file name."""
+        if not _VIDEO_ID.match(video_id):
+            video_id = "h" + hashlib.sha256(video_id.encode("utf-8")).hexdigest()[:20]
+        return f"{video_id}_{self._opts_hash}"
+
+    def _ydl(self) -> Any:
+        ydl = getattr(self._local, "ydl", None)
+        if ydl is None:
+            ydl = self._local.ydl = self._ydl_factory(dict(self.opts))
+        return ydl
+
+    def _extract(self, video_id: str) -> Dict[str, Any]:
+        ydl = self._ydl()
+        info = ydl.extract_info(video_url(video_id), download=False)
+        sanitize = getattr(ydl, "sanitize_info", None)
+        return research_fields(sanitize(info) if sanitize is not None else info)
+
+    def extract(self, video_id: str, force: bool = False) -> Dict[str, Any]:
+        """Return cached info when fresh; otherwise extract once even if several threads ask at the same time."""
+        key = self.key(video_id)
+        if not force:
+            cached = self.cache.get(key)
+            if cached is not None:
+                with self._lock:
+                    self.cache_hits += 1
+                return cached
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result()
+        try:
+            info = self._extract(video_id)
+            try:
+                self.cache.put(key, info)
+            except OSError as exc:
+                print(f"⚠️ Extraction cache write failed for {video_id}: {exc}", file=sys.stderr)
+            with self._lock:
+                self.extractions += 1
+            future.set_result(info)
+            return info
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def prefetch(self, video_ids: Iterable[str], force: bool = False) -> Dict[str, Union[Dict[str, Any], Exception]]:
+        """Extract many videos on a bounded pool; failures are returned per video instead of raised."""
+        ids = list(dict.fromkeys(video_ids))
+
+        def run(video_id: str) -> Union[Dict[str, Any], Exception]:
+            try:
+                return self.extract(video_id, force=force)
+            except Exception as exc:
+                return exc
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(ids) or 1)), thread_name_prefix="ytdlp") as executor:
+            return dict(zip(ids, executor.map(run, ids)))
+
+
+_default: Optional[VideoExtractor] = None
+_default_lock = threading.Lock()
+
+
+def default_extractor() -> VideoExtractor:
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = VideoExtractor()
+        return _default
+
+
+def _video_ids(arg: str) -> List[str]:
+    if arg.endswith(".txt"):
+        return [line.strip() for line in Path(arg).read_text(encoding="utf-8").splitlines() if line.strip()]
+    return [arg.strip()]
+
+
+def main() -> int:
+    load_project_env()
+    parser = argparse.ArgumentParser(description="Prefetch yt_dlp research extractions into the local cache.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    prefetch = sub.add_parser("prefetch")
+    prefetch.add_argument("videos", help="Video ID/URL or a .txt file with one per line")
+    prefetch.add_argument("--workers", type=int, default=None)
+    prefetch.add_argument("--force", action="store_true", help="Ignore cached entries")
+    sub.add_parser("purge", help="Delete cache entries older than the TTL")
+    args = parser.parse_args()
+
+    if args.command == "purge":
+        print(f"Removed {ExtractionCache().purge_expired()} expired extraction(s).")
+        return 0
+
+    from .storage_utils import normalize_video_id
+
+    extractor = VideoExtractor(max_workers=args.workers)
+    start = time.monotonic()
+    results = extractor.prefetch([normalize_video_id(item) for item in _video_ids(args.videos)], force=args.force)
+    failed = {video_id: str(result) for video_id, result in results.items() if isinstance(result, Exception)}
+    for video_id, error in failed.items():
+        print(f"❌ {video_id}: {error}", file=sys.stderr)
+    print(
+        f"✅ {len(results) - len(failed)}/{len(results)} videos ready "
+        f"({extractor.extractions} extracted, {extractor.cache_hits} cached) in {time.monotonic() - start:.1f}s"
+    )
+    return 0 if not failed else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
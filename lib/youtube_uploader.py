@@ -1,20 +1,31 @@
-"""YouTube upload utilities using OAuth2 credentials."""
+"""YouTube upload utilities using OAuth2 credentials.
+
+Uploads are chunked and resumable. The chunk size is ``YOUTUBE_UPLOAD_CHUNK_MB``,
+rounded to a multiple of 256 KiB. After every chunk, the session URI and the
+committed byte offset are written to ``data/upload_sessions.json``. The key
+is the file (path, size, mtime) plus the request body, so re-running the same
+upload after a crash asks YouTube how many bytes it already has and continues
+from there. Failed chunks are retried with exponential back-off up to
+``YOUTUBE_UPLOAD_MAX_RETRIES`` times in a row. An expired session (404/410)
+starts a fresh upload.
+"""
 
 from __future__ import annotations
 
+import http.client
 import json
 import os
+import random
 import sys
+import threading
 import time
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaFileUpload
+from typing import Any, Callable, Dict, List, Optional
 
+from .env_utils import load_project_env
 from .run_logger import build_metrics, emit_run_log
+from .serialization import canonical_hash
 
 
 SCOPES = [
@@ -22,6 +33,14 @@ SCOPES = [
     "https://www.googleapis.com/auth/youtube.force-ssl",
 ]
 
+SESSION_PATH = Path(__file__).resolve().parent.parent / "data" / "upload_sessions.json"
+CHUNK_ALIGN = 256 * 1024
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+EXPIRED_SESSION_STATUSES = {404, 410}
+MAX_BACKOFF_S = 64.0
+
+ProgressCallback = Callable[[int, int], None]
+
 
 def _load_metadata(path: Path) -> Dict[str, Any]:
     return json.loads(path.read_text(encoding="utf-8"))
@@ -40,14 +59,17 @@ def _build_description(metadata: Dict[str, Any]) -> str:
     return description
 
 
-def build_youtube_client() -> Any:
+def build_youtube_credentials() -> Any:
+    from google.oauth2.credentials import Credentials
+
+    load_project_env()
     client_id = os.getenv("GOOGLE_CLIENT_ID")
     client_secret = os.getenv("GOOGLE_CLIENT_SECRET")
     refresh_token = os.getenv("GOOGLE_REFRESH_TOKEN")
     if not client_id or not client_secret or not refresh_token:
         raise ValueError("Missing Google OAuth environment variables.")
 
-    credentials = Credentials(
+    return Credentials(
         token=None,
         refresh_token=refresh_token,
         token_uri="https://oauth2.googleapis.com/token",
@@ -55,7 +77,159 @@ def build_youtube_client() -> Any:
         client_secret=client_secret,
         scopes=SCOPES,
     )
-    return build("youtube", "v3", credentials=credentials)
+
+
+def build_youtube_client(credentials: Any = None) -> Any:
+    from googleapiclient.discovery import build
+
+    return build("youtube", "v3", credentials=credentials or build_youtube_credentials())
+
+
+def upload_chunk_size() -> int:
+    size = int(float(os.getenv("YOUTUBE_UPLOAD_CHUNK_MB", "16")) * 1024 * 1024)
+    return max(CHUNK_ALIGN, size - size % CHUNK_ALIGN)
+
+
+def upload_max_retries() -> int:
+    return int(os.getenv("YOUTUBE_UPLOAD_MAX_RETRIES", "8"))
+
+
+class UploadSessionStore:
+    """Resumable upload sessions persisted as one small JSON file."""
+
+    def __init__(self, path: Path = SESSION_PATH) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        if not self.path.exists():
+            return {}
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except ValueError:
+            return {}
+
+    def _write(self, sessions: Dict[str, Dict[str, Any]]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(sessions, ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp_path.replace(self.path)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._read().get(key)
+
+    def put(self, key: str, record: Dict[str, Any]) -> None:
+        with self._lock:
+            sessions = self._read()
+            sessions[key] = {**record, "updated_at": datetime.now(timezone.utc).isoformat()}
+            self._write(sessions)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            sessions = self._read()
+            if sessions.pop(key, None) is not None:
+                self._write(sessions)
+
+
+def session_key(video_path: Path, request_body: Dict[str, Any]) -> str:
+    stat = video_path.stat()
+    return canonical_hash(
+        {"path": str(video_path.resolve()), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "body": request_body}
+    )
+
+
+def _transport_errors() -> tuple:
+    errors: tuple = (ConnectionError, TimeoutError, http.client.HTTPException, OSError)
+    try:
+        import httplib2
+
+        errors += (httplib2.HttpLib2Error,)
+    except ImportError:
+        pass
+    return errors
+
+
+def _http_status(exc: Exception) -> Optional[int]:
+    status = getattr(getattr(exc, "resp", None), "status", None)
+    return int(status) if status is not None else None
+
+
+def _backoff_s(attempt: int) -> float:
+    return min(MAX_BACKOFF_S, 2.0 ** attempt) + random.random()
+
+
+def run_resumable_upload(
+    make_request: Callable[[], Any],
+    *,
+    key: str,
+    total_bytes: int,
+    store: UploadSessionStore,
+    on_progress: Optional[ProgressCallback] = None,
+    before_chunk: Optional[Callable[[], None]] = None,
+    http: Any = None,
+    max_retries: Optional[int] = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Dict[str, Any]:
+    """Drive a googleapiclient resumable request chunk by chunk, persisting the session after each chunk.
+
+    ``before_chunk`` runs before every chunk request (e.g. a bandwidth limiter)
+    and ``http`` overrides the request's transport (one per thread). Returns the API response plus ``resumed_from_bytes``, ``chunks`` and ``retries``.
+    """
+    max_retries = upload_max_retries() if max_retries is None else max_retries
+    transport_errors = _transport_errors()
+    request = make_request()
+    saved = store.get(key)
+    resumed_from = 0
+    if saved:
+        request.resumable_uri = saved["resumable_uri"]
+        # googleapiclient re-queries the committed range (empty PUT) before the next chunk when in error state.
+        request._in_error_state = True
+        resumed_from = int(saved.get("offset", 0))
+    resuming = bool(saved)
+
+    response = None
+    attempt = chunks = retries = 0
+    while response is None:
+        if before_chunk is not None:
+            before_chunk()
+        try:
+            status, response = request.next_chunk(http=http) if http is not None else request.next_chunk()
+        except Exception as exc:
+            code = _http_status(exc)
+            if code is None and not isinstance(exc, transport_errors):
+                raise
+            if resuming and code in EXPIRED_SESSION_STATUSES:
+                store.delete(key)
+                request, resuming, resumed_from = make_request(), False, 0
+                continue
+            if (code is not None and code not in RETRYABLE_STATUSES) or attempt >= max_retries:
+                raise
+            request._in_error_state = True
+            sleep(_backoff_s(attempt))
+            attempt += 1
+            retries += 1
+            continue
+        attempt = 0
+        resuming = False
+        chunks += 1
+        if status is not None:
+            store.put(
+                key,
+                {"resumable_uri": request.resumable_uri, "offset": status.resumable_progress, "total_bytes": total_bytes},
+            )
+            if on_progress is not None:
+                on_progress(status.resumable_progress, total_bytes)
+
+    store.delete(key)
+    if on_progress is not None:
+        on_progress(total_bytes, total_bytes)
+    return {"response": response, "resumed_from_bytes": resumed_from, "chunks": chunks, "retries": retries}
+
+
+def _print_progress(sent: int, total: int) -> None:
+    percent = 100.0 * sent / total if total else 100.0
+    print(f"⬆️ Upload {percent:5.1f}% ({sent / (1024 * 1024):.1f} / {total / (1024 * 1024):.1f} MiB)", file=sys.stderr, flush=True)
 
 
 def upload_video(
@@ -64,8 +238,17 @@ def upload_video(
     video_path: Path,
     privacy_status: str = "private",
     notify_subscribers: bool = False,
+    youtube: Any = None,
+    chunk_size: Optional[int] = None,
+    session_store: Optional[UploadSessionStore] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    before_chunk: Optional[Callable[[], None]] = None,
+    http: Any = None,
 ) -> Dict[str, Any]:
-    youtube = build_youtube_client()
+    from googleapiclient.http import MediaFileUpload
+
+    youtube = youtube or build_youtube_client()
+    chunk_size = chunk_size or upload_chunk_size()
 
     request_body = {
         "snippet": {
@@ -80,36 +263,36 @@ def upload_video(
         },
     }
 
-    media = MediaFileUpload(str(video_path), chunksize=-1, resumable=True)
-    request = youtube.videos().insert(
-        part="snippet,status",
-        body=request_body,
-        media_body=media,
-        notifySubscribers=notify_subscribers,
-    )
+    def make_request() -> Any:
+        media = MediaFileUpload(str(video_path), chunksize=chunk_size, resumable=True)
+        return youtube.videos().insert(
+            part="snippet,status",
+            body=request_body,
+            media_body=media,
+            notifySubscribers=notify_subscribers,
+        )
 
-    last_error: Exception | None = None
-    for attempt in range(2):
-        try:
-            response = request.execute()
-            return {
-                "video_id": response.get("id"),
-                "status": privacy_status,
-                "notify_subscribers": notify_subscribers,
-            }
-        except HttpError as exc:
-            last_error = exc
-            if exc.resp.status in {429, 500, 502, 503, 504} and attempt == 0:
-                time.sleep(2)
-                continue
-            raise
-        except Exception as exc:
-            last_error = exc
-            raise
-    raise RuntimeError(f"Upload failed after retries: {last_error}")
+    outcome = run_resumable_upload(
+        make_request,
+        key=session_key(video_path, {**request_body, "notify_subscribers": notify_subscribers}),
+        total_bytes=video_path.stat().st_size,
+        store=session_store or UploadSessionStore(),
+        on_progress=on_progress,
+        before_chunk=before_chunk,
+        http=http,
+    )
+    return {
+        "video_id": outcome["response"].get("id"),
+        "status": privacy_status,
+        "notify_subscribers": notify_subscribers,
+        "resumed_from_bytes": outcome["resumed_from_bytes"],
+        "chunks": outcome["chunks"],
+        "retries": outcome["retries"],
+    }
 
 
 def main() -> int:
+    load_project_env()
     if len(sys.argv) < 3:
         print(
             "Usage: python -m lib.youtube_uploader <metadata_json> <video_path>",
@@ -122,7 +305,7 @@ def main() -> int:
 
     try:
         metadata = _load_metadata(metadata_path)
-        result = upload_video(metadata=metadata, video_path=video_path)
+        result = upload_video(metadata=metadata, video_path=video_path, on_progress=_print_progress)
         emit_run_log(
             stage="upload",
             status="success",
@@ -9,11 +9,14 @@ CREATE TABLE IF NOT EXISTS research_cache (
   deep_analysis text,
   raw_transcript text,
   updated_at timestamptz,
+  expires_at timestamptz,
   created_at timestamptz DEFAULT now()
 );
 
 -- If table exists with wrong columns, add content:
 -- ALTER TABLE research_cache ADD COLUMN IF NOT EXISTS content text;
+-- Freshness deadline for stale-while-revalidate (lib/research_freshness.py):
+ALTER TABLE research_cache ADD COLUMN IF NOT EXISTS expires_at timestamptz;
 -- Ensure upserts on topic are supported:
 CREATE UNIQUE INDEX IF NOT EXISTS research_cache_topic_key ON research_cache (topic);
 
@@ -70,10 +73,24 @@ CREATE TABLE IF NOT EXISTS video_uploads (
   published_at timestamptz,
   metadata_path text,
   video_path text,
+  upload_state text,
+  priority int,
+  bytes_uploaded bigint,
+  total_bytes bigint,
+  youtube_video_id text,
+  last_error text,
   created_at timestamptz DEFAULT now(),
   updated_at timestamptz DEFAULT now()
 );
 
+-- Upload queue progress columns (lib/upload_queue.py) for existing tables:
+ALTER TABLE video_uploads ADD COLUMN IF NOT EXISTS upload_state text;
+ALTER TABLE video_uploads ADD COLUMN IF NOT EXISTS priority int;
+ALTER TABLE video_uploads ADD COLUMN IF NOT EXISTS bytes_uploaded bigint;
+ALTER TABLE video_uploads ADD COLUMN IF NOT EXISTS total_bytes bigint;
+ALTER TABLE video_uploads ADD COLUMN IF NOT EXISTS youtube_video_id text;
+ALTER TABLE video_uploads ADD COLUMN IF NOT EXISTS last_error text;
+
 -- video_scripts: long-form + shorts scripts per video
 CREATE TABLE IF NOT EXISTS video_scripts (
   video_id text PRIMARY KEY,
@@ -99,3 +116,106 @@ CREATE TABLE IF NOT EXISTS metadata_experiments (
 );
 
 CREATE INDEX IF NOT EXISTS metadata_experiments_video_id_idx ON metadata_experiments (video_id);
+
+-- pipeline_jobs: durable multi-node job queue (lib/job_queue.py, JOB_QUEUE_BACKEND=supabase)
+CREATE TABLE IF NOT EXISTS pipeline_jobs (
+  job_id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  video_id text NOT NULL,
+  payload jsonb NOT NULL DEFAULT '{}'::jsonb,
+  status text NOT NULL DEFAULT 'queued',
+  attempts int NOT NULL DEFAULT 0,
+  max_attempts int NOT NULL DEFAULT 3,
+  lease_owner text,
+  lease_expires_at timestamptz,
+  available_at timestamptz NOT NULL DEFAULT now(),
+  last_error text,
+  created_at timestamptz DEFAULT now(),
+  updated_at timestamptz DEFAULT now()
+);
+
+-- At most one open (queued/leased) job per video.
+CREATE UNIQUE INDEX IF NOT EXISTS pipeline_jobs_open_video_key ON pipeline_jobs (video_id) WHERE status IN ('queued', 'leased');
+CREATE INDEX IF NOT EXISTS pipeline_jobs_ready_idx ON pipeline_jobs (status, available_at);
+
+-- pipeline_stage_completions: idempotent stage outputs keyed by (video_id, stage)
+CREATE TABLE IF NOT EXISTS pipeline_stage_completions (
+  video_id text NOT NULL,
+  stage text NOT NULL,
+  output_hash text NOT NULL,
+  output jsonb,
+  completed_at timestamptz DEFAULT now(),
+  PRIMARY KEY (video_id, stage)
+);
+
+-- Lease the oldest ready job (or one whose lease expired); SKIP LOCKED keeps workers from colliding.
+CREATE OR REPLACE FUNCTION lease_pipeline_job(p_worker text, p_lease_seconds int)
+RETURNS SETOF pipeline_jobs
+LANGUAGE plpgsql AS $$
+BEGIN
+  UPDATE pipeline_jobs
+     SET status = 'dead', lease_owner = NULL, updated_at = now(),
+         last_error = COALESCE(last_error, 'lease expired')
+   WHERE attempts >= max_attempts
+     AND (status = 'queued' OR (status = 'leased' AND lease_expires_at < now()));
+
+  RETURN QUERY
+  UPDATE pipeline_jobs j
+     SET status = 'leased', lease_owner = p_worker,
+         lease_expires_at = now() + make_interval(secs => p_lease_seconds),
+         attempts = j.attempts + 1, updated_at = now()
+   WHERE j.job_id = (
+     SELECT job_id FROM pipeline_jobs
+      WHERE (status = 'queued' AND available_at <= now())
+         OR (status = 'leased' AND lease_expires_at < now())
+      ORDER BY created_at
+      LIMIT 1
+      FOR UPDATE SKIP LOCKED
+   )
+  RETURNING j.*;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION heartbeat_pipeline_job(p_job_id uuid, p_worker text, p_lease_seconds int)
+RETURNS boolean
+LANGUAGE sql AS $$
+  WITH extended AS (
+    UPDATE pipeline_jobs
+       SET lease_expires_at = now() + make_interval(secs => p_lease_seconds), updated_at = now()
+     WHERE job_id = p_job_id AND lease_owner = p_worker AND status = 'leased'
+    RETURNING 1
+  )
+  SELECT EXISTS (SELECT 1 FROM extended);
+$$;
+
+-- video_daily_metrics: per-video daily YouTube Analytics (lib/analytics_sync.py), upserted by (video_id, metric_date)
+CREATE TABLE IF NOT EXISTS video_daily_metrics (
+  video_id text NOT NULL,
+  metric_date date NOT NULL,
+  views bigint,
+  estimated_minutes_watched numeric,
+  average_view_duration numeric,
+  impressions_ctr numeric,
+  synced_at timestamptz DEFAULT now(),
+  PRIMARY KEY (video_id, metric_date)
+);
+
+-- analytics_sync_state: last day fully synced per video (incremental sync watermark)
+CREATE TABLE IF NOT EXISTS analytics_sync_state (
+  video_id text PRIMARY KEY,
+  last_synced_date date NOT NULL,
+  updated_at timestamptz DEFAULT now()
+);
+
+-- qa_gate_decisions: bulk QA gate review results (lib/qa_gate.py bulk --write), upserted by (video_id, review_date)
+CREATE TABLE IF NOT EXISTS qa_gate_decisions (
+  video_id text NOT NULL,
+  review_date date NOT NULL,
+  channel_type text NOT NULL,
+  decision text NOT NULL,
+  flags jsonb NOT NULL DEFAULT '[]'::jsonb,
+  ctr numeric,
+  avd numeric,
+  retention_30s numeric,
+  created_at timestamptz DEFAULT now(),
+  PRIMARY KEY (video_id, review_date)
+);
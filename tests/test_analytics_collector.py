@@ -0,0 +1,120 @@
+import threading
+import unittest
+from typing import Any, Dict, List
+from unittest import mock
+
+from lib import analytics_collector
+from lib.analytics_collector import AnalyticsBatchCollector, QuotaLimiter
+
+
+class _QuotaError(Exception):
+    def __init__(self) -> None:
+        super().__init__("quotaExceeded")
+        self.resp = type("Resp", (), {"status": 403})()
+
+
+class _FakeRequest:
+    def __init__(self, api: "_FakeAnalytics", params: Dict[str, Any]) -> None:
+        self.api = api
+        self.params = params
+
+    def execute(self) -> Dict[str, Any]:
+        with self.api.lock:
+            self.api.calls.append(self.params)
+            if self.api.fail_next:
+                self.api.fail_next -= 1
+                raise _QuotaError()
+        requested = self.params["filters"][len("video=="):].split(",")
+        rows = [[vid, 10, 5, 30, 0.04] for vid in requested if vid in self.api.known]
+        start = self.params["startIndex"] - 1
+        return {"rows": rows[start : start + self.params["maxResults"]]}
+
+
+class _FakeAnalytics:
+    def __init__(self, known: List[str], fail_next: int = 0) -> None:
+        self.known = set(known)
+        self.calls: List[Dict[str, Any]] = []
+        self.fail_next = fail_next
+        self.lock = threading.Lock()
+
+    def reports(self) -> "_FakeAnalytics":
+        return self
+
+    def query(self, **params: Any) -> _FakeRequest:
+        return _FakeRequest(self, params)
+
+
+class _FakeTable:
+    def __init__(self, inserts: List[Any]) -> None:
+        self.inserts = inserts
+
+    def insert(self, rows: Any) -> "_FakeTable":
+        self.inserts.append(rows)
+        return self
+
+    def execute(self) -> None:
+        return None
+
+
+class _FakeSupabase:
+    def __init__(self) -> None:
+        self.inserts: List[Any] = []
+
+    def table(self, name: str) -> _FakeTable:
+        return _FakeTable(self.inserts)
+
+
+def _collector(api: _FakeAnalytics, **kwargs: Any) -> AnalyticsBatchCollector:
+    limiter = QuotaLimiter(rate_per_s=0, sleep=lambda _: None)
+    return AnalyticsBatchCollector(api, limiter=limiter, **kwargs)
+
+
+class AnalyticsBatchCollectorTests(unittest.TestCase):
+    def test_batches_pages_and_fills_missing_videos(self) -> None:
+        videos = [f"vid{i:08d}" for i in range(25)]
+        api = _FakeAnalytics(known=videos[:20])
+        collector = _collector(api, batch_size=10, page_size=4, max_workers=3)
+        results = collector.fetch(videos + [videos[0]], "2026-01-01", "2026-01-07")
+
+        self.assertEqual([row["video_id"] for row in results], videos)
+        self.assertEqual(results[0]["views"], 10)
+        self.assertEqual(results[-1]["views"], 0)
+        # Chunks of 10/10/5 videos: 10 rows → 3 pages each, last chunk has no rows → 1 page.
+        self.assertEqual(len(api.calls), 7)
+        self.assertEqual(collector.requests_made, 7)
+        self.assertTrue(all(call["dimensions"] == "video" for call in api.calls))
+
+    def test_retries_quota_errors(self) -> None:
+        api = _FakeAnalytics(known=["a" * 11], fail_next=2)
+        penalties: List[float] = []
+        collector = _collector(api)
+        collector.limiter.penalize = penalties.append  # type: ignore[method-assign]
+        results = collector.fetch(["a" * 11], "2026-01-01", "2026-01-07")
+        self.assertEqual(results[0]["views"], 10)
+        self.assertEqual(penalties, [2, 4])
+
+    def test_collect_bulk_inserts_snapshots(self) -> None:
+        videos = [f"vid{i:08d}" for i in range(5)]
+        fake_db = _FakeSupabase()
+        with mock.patch.object(analytics_collector, "supabase", fake_db):
+            payload = analytics_collector.collect_metrics_for_videos(
+                video_ids=videos,
+                start_date="2026-01-01",
+                end_date="2026-01-07",
+                collector=_collector(_FakeAnalytics(known=videos)),
+            )
+        self.assertEqual(payload["api_requests"], 1)
+        self.assertEqual(len(fake_db.inserts), 1)
+        self.assertEqual(len(fake_db.inserts[0]), 5)
+        self.assertEqual(fake_db.inserts[0][0]["ctr"], 0.04)
+
+    def test_limiter_spaces_requests(self) -> None:
+        sleeps: List[float] = []
+        limiter = QuotaLimiter(rate_per_s=2, sleep=sleeps.append, clock=lambda: 100.0)
+        for _ in range(3):
+            limiter.acquire()
+        self.assertEqual(sleeps, [0.5, 1.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
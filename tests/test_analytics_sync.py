@@ -0,0 +1,81 @@
+import unittest
+from datetime import date, timedelta
+from typing import Any, Dict, List, Set, Tuple
+
+from lib.analytics_sync import backfill_gaps, plan_sync, sync_incremental
+
+
+class _MemoryStore:
+    def __init__(self) -> None:
+        self.rows: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.marks: Dict[str, date] = {}
+
+    def watermarks(self, video_ids: List[str]) -> Dict[str, date]:
+        return {vid: self.marks[vid] for vid in video_ids if vid in self.marks}
+
+    def existing_days(self, video_ids: List[str], start: date, end: date) -> Set[Tuple[str, date]]:
+        return {
+            (vid, date.fromisoformat(day))
+            for vid, day in self.rows
+            if vid in video_ids and start <= date.fromisoformat(day) <= end
+        }
+
+    def upsert_daily(self, rows: List[Dict[str, Any]]) -> None:
+        for row in rows:
+            self.rows[(row["video_id"], row["metric_date"])] = row
+
+    def set_watermarks(self, marks: Dict[str, date]) -> None:
+        self.marks.update(marks)
+
+
+class _FakeCollector:
+    def __init__(self) -> None:
+        self.requests_made = 0
+        self.calls: List[Tuple[Tuple[str, ...], str, str]] = []
+
+    def fetch(self, video_ids: List[str], start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        self.requests_made += 1
+        self.calls.append((tuple(video_ids), start_date, end_date))
+        return [{"video_id": vid, "views": 1} for vid in video_ids]
+
+
+END = date(2026, 3, 10)
+
+
+class AnalyticsSyncTests(unittest.TestCase):
+    def test_plan_groups_videos_by_missing_day(self) -> None:
+        plan = plan_sync(["old", "new"], {"old": END - timedelta(days=1)}, END, initial_days=3)
+        self.assertEqual(list(plan), [END - timedelta(days=2), END - timedelta(days=1), END])
+        self.assertEqual(plan[END], ["old", "new"])
+        self.assertEqual(plan[END - timedelta(days=1)], ["new"])
+
+    def test_second_sync_fetches_only_new_days(self) -> None:
+        store = _MemoryStore()
+        first = _FakeCollector()
+        summary = sync_incremental(["a", "b"], end=END, store=store, collector=first, initial_days=7)
+        self.assertEqual(summary["rows"], 14)
+        self.assertEqual(store.marks, {"a": END, "b": END})
+
+        again = _FakeCollector()
+        self.assertEqual(sync_incremental(["a", "b"], end=END, store=store, collector=again)["days"], 0)
+        self.assertEqual(again.calls, [])
+
+        nightly = _FakeCollector()
+        next_day = END + timedelta(days=1)
+        summary = sync_incremental(["a", "b"], end=next_day, store=store, collector=nightly)
+        self.assertEqual(nightly.calls, [(("a", "b"), next_day.isoformat(), next_day.isoformat())])
+        self.assertEqual(len(store.rows), 16)
+
+    def test_backfill_fetches_only_gaps(self) -> None:
+        store = _MemoryStore()
+        sync_incremental(["a"], end=END, store=store, collector=_FakeCollector(), initial_days=3)
+        del store.rows[("a", (END - timedelta(days=1)).isoformat())]
+        collector = _FakeCollector()
+        summary = backfill_gaps(["a"], END - timedelta(days=2), END, store=store, collector=collector)
+        self.assertEqual(summary["rows"], 1)
+        self.assertEqual(collector.calls[0][1], (END - timedelta(days=1)).isoformat())
+        self.assertEqual(store.marks["a"], END)
+
+
+if __name__ == "__main__":
+    unittest.main()
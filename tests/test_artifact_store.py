@@ -0,0 +1,63 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from lib.artifact_store import ArtifactStore, export_directory, import_directory
+from lib.metrics import ARTIFACT_BYTES, ARTIFACT_WRITES
+
+
+class ArtifactStoreTests(unittest.TestCase):
+    def test_transaction_commits_all_artifacts_with_index(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ArtifactStore(Path(tmp) / "artifacts.sqlite3")
+            with store.transaction():
+                store.put(name="abcdefghijk_plan.json", video_id="abcdefghijk", stage="plan", kind="json", content="{}")
+                store.put(name="abcdefghijk_plan.md", video_id="abcdefghijk", stage="plan", kind="md", content="# Plan")
+            index = store.index("abcdefghijk")
+            store.close()
+        self.assertEqual([row["name"] for row in index], ["abcdefghijk_plan.json", "abcdefghijk_plan.md"])
+        self.assertTrue(all(row["content_hash"] and row["created_at"] for row in index))
+
+    def test_transaction_rolls_back_on_error(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ArtifactStore(Path(tmp) / "artifacts.sqlite3")
+            with self.assertRaises(RuntimeError):
+                with store.transaction():
+                    store.put(name="abcdefghijk_plan.json", video_id="abcdefghijk", stage="plan", kind="json", content="{}")
+                    raise RuntimeError("interrupted checkpoint")
+            self.assertFalse(store.exists("abcdefghijk_plan.json"))
+            store.close()
+
+    def test_put_skips_identical_content(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ArtifactStore(Path(tmp) / "artifacts.sqlite3")
+            bytes_before = ARTIFACT_BYTES.value(kind="json")
+            unchanged_before = ARTIFACT_WRITES.value(kind="json", result="unchanged")
+            store.put(name="abcdefghijk_plan.json", video_id="abcdefghijk", stage="plan", kind="json", content='{"é": 1}')
+            first = store.index("abcdefghijk")[0]["created_at"]
+            store.put(name="abcdefghijk_plan.json", video_id="abcdefghijk", stage="plan", kind="json", content='{"é": 1}')
+            self.assertEqual(store.index("abcdefghijk")[0]["created_at"], first)
+            self.assertEqual(ARTIFACT_BYTES.value(kind="json") - bytes_before, 9)
+            self.assertEqual(ARTIFACT_WRITES.value(kind="json", result="unchanged") - unchanged_before, 1)
+            store.close()
+
+    def test_import_export_round_trip(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            source = Path(tmp) / "data"
+            source.mkdir()
+            (source / "ab_cdefghij_research.json").write_text(json.dumps({"k": 1}), encoding="utf-8")
+            (source / "ab_cdefghij_research_raw.json").write_text(json.dumps({"raw_text": "x"}), encoding="utf-8")
+            store = ArtifactStore(Path(tmp) / "artifacts.sqlite3")
+            self.assertEqual(import_directory(store, source), 2)
+            rows = {row["name"]: row for row in store.index("ab_cdefghij")}
+            self.assertEqual(rows["ab_cdefghij_research.json"]["stage"], "research")
+            self.assertEqual(rows["ab_cdefghij_research_raw.json"]["kind"], "raw")
+            target = Path(tmp) / "export"
+            self.assertEqual(export_directory(store, target), 2)
+            self.assertEqual(json.loads((target / "ab_cdefghij_research.json").read_text(encoding="utf-8")), {"k": 1})
+            store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import multiprocessing
+import random
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from lib.geo_readiness_tracker import GeoReadinessTracker, record_validation_warnings
+from lib.kpi_store import KpiStore
+from lib.policy_engine import PhaseEvaluationInput, evaluate_geo_readiness, get_policy
+
+
+def _record_many(path: str, worker: int) -> None:
+    for idx in range(10):
+        record_validation_warnings({f"w{worker}-{idx}": 1}, Path(path))
+
+
+MONDAY = datetime(2026, 3, 2, 12, tzinfo=timezone.utc)
+
+
+def _geo_input(weekly):
+    return PhaseEvaluationInput(
+        published_videos=12,
+        ctr_weekly=[],
+        avd_weekly=[],
+        geo_readiness_warning_count_weekly=weekly,
+        source_contract_ready=True,
+        source_linkage_pass_rate=1.0,
+        research_source_coverage=1.0,
+    )
+
+
+class GeoReadinessTrackerTests(unittest.TestCase):
+    def test_matches_batch_evaluation_over_random_event_streams(self) -> None:
+        rng = random.Random(7)
+        policy = get_policy()
+        keys = ("level", "latest_warning_count", "sustained_increase_streak", "incident_required", "phase_hold", "reason_codes")
+        for _ in range(50):
+            tracker = GeoReadinessTracker()
+            tracker.advance(MONDAY.date())
+            weekly = []
+            week = 0
+            for _ in range(rng.randint(1, 12)):
+                week += rng.choice([1, 1, 1, 2, 4])
+                latest = {}
+                for _ in range(rng.randint(0, 6)):
+                    video, day, count = rng.choice("abc"), rng.randint(0, 6), rng.randint(0, 4)
+                    tracker.observe(video, count, MONDAY + timedelta(weeks=week, days=day))
+                    if day >= latest.get(video, (day, 0))[0]:
+                        latest[video] = (day, count)
+                tracker.advance((MONDAY + timedelta(weeks=week)).date())
+                if latest:  # Quiet weeks are skipped, as in KpiStore.weekly_series.
+                    weekly.append(sum(count for _, count in latest.values()))
+                expected = evaluate_geo_readiness(_geo_input(weekly), policy)
+                status = tracker.status()
+                self.assertEqual({key: status[key] for key in keys}, {key: expected[key] for key in keys}, weekly)
+
+    def test_weekly_revalidation_replaces_and_late_events_are_ignored(self) -> None:
+        tracker = GeoReadinessTracker()
+        tracker.observe("a", 3, MONDAY)
+        tracker.observe("a", 1, MONDAY + timedelta(days=3))
+        tracker.observe("a", 7, MONDAY + timedelta(days=1))
+        tracker.observe("b", 2, MONDAY + timedelta(days=1))
+        self.assertEqual(tracker.status()["latest_warning_count"], 3)
+        tracker.observe("a", 5, MONDAY + timedelta(weeks=1))
+        tracker.observe("a", 9, MONDAY)
+        status = tracker.status()
+        self.assertEqual(status["weekly_warning_counts"], [3, 5])
+        self.assertEqual(status["sustained_increase_streak"], 1)
+        self.assertEqual(status["late_events"], 1)
+
+        tracker.advance((MONDAY + timedelta(weeks=3)).date())
+        quiet = tracker.status()
+        self.assertEqual((quiet["weekly_warning_counts"], quiet["latest_warning_count"]), ([3, 5], 5))
+        self.assertEqual(quiet["sustained_increase_streak"], 1)
+
+    def test_agrees_with_kpi_store_phase_input(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = KpiStore(Path(tmp))
+            tracker = GeoReadinessTracker()
+            runs = [("a", 0, 2), ("a", 3, 4), ("b", 1, 1), ("a", 7, 5), ("b", 9, 3), ("a", 21, 9), ("b", 24, 2)]
+            for video, offset, count in runs:
+                at = MONDAY + timedelta(days=offset)
+                tracker.observe(video, count, at)
+                store.record_geo_warnings(video, at.date(), count)
+            end = MONDAY.date() + timedelta(days=27)
+            tracker.advance(end)
+            phase = store.phase_input(weeks=8, end=end, published_videos=12)
+            self.assertEqual(phase.geo_readiness_warning_count_weekly, [5, 8, 11])
+            self.assertEqual(tracker.status()["weekly_warning_counts"], [5, 8, 11])
+            expected = evaluate_geo_readiness(phase, get_policy())
+            status = tracker.status()
+            for key in ("level", "latest_warning_count", "sustained_increase_streak", "phase_hold"):
+                self.assertEqual(status[key], expected[key], key)
+
+    def test_red_escalation_and_state_round_trip(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "state.json"
+            tracker = GeoReadinessTracker()
+            for week, count in enumerate([4, 5, 6, 7]):
+                tracker.observe("a", count, MONDAY + timedelta(weeks=week))
+            tracker.save(path)
+            restored = GeoReadinessTracker.load(path)
+            self.assertEqual(restored.status(), tracker.status())
+            self.assertEqual(restored.status()["level"], "red")
+            self.assertTrue(restored.status()["phase_hold"])
+
+            status = record_validation_warnings({"b": 2}, path)
+            self.assertGreaterEqual(status["latest_warning_count"], 2)
+
+    def test_concurrent_processes_keep_every_count(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "state.json"
+            context = multiprocessing.get_context("spawn")
+            workers = [context.Process(target=_record_many, args=(str(path), worker)) for worker in range(3)]
+            for process in workers:
+                process.start()
+            for process in workers:
+                process.join(30)
+            self.assertEqual([process.exitcode for process in workers], [0, 0, 0])
+            self.assertEqual(GeoReadinessTracker.load(path).status()["latest_warning_count"], 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
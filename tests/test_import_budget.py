@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ["google.genai", "googleapiclient", "supabase", "yt_dlp", "dotenv", "jsonschema"]
+# Generous default so slow CI runners pass; override with IMPORT_BUDGET_MS.
+DEFAULT_BUDGET_MS = 1500
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import lib.pipeline_runner
+elapsed_ms = (time.perf_counter() - start) * 1000
+heavy = [name for name in %r if name in sys.modules]
+print(json.dumps({"elapsed_ms": elapsed_ms, "heavy": heavy}))
+""" % (HEAVY_MODULES,)
+
+
+class ImportBudgetTests(unittest.TestCase):
+    def test_pipeline_runner_imports_within_budget(self) -> None:
+        env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+        result = subprocess.run(
+            [sys.executable, "-c", _PROBE],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        probe = json.loads(result.stdout.strip().splitlines()[-1])
+        budget_ms = float(os.getenv("IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS))
+        self.assertEqual(probe["heavy"], [], "heavy dependencies must be imported on first use")
+        self.assertLess(probe["elapsed_ms"], budget_ms)
+
+
+if __name__ == "__main__":
+    unittest.main()
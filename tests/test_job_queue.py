@@ -0,0 +1,98 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from lib import pipeline_runner
+from lib.job_queue import SQLiteJobQueue
+
+
+class SQLiteJobQueueTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.queue = SQLiteJobQueue(Path(self._tmp.name) / "queue.sqlite3", max_attempts=2)
+
+    def tearDown(self) -> None:
+        self.queue.close()
+        self._tmp.cleanup()
+
+    def test_open_job_is_unique_per_video_and_lease_is_exclusive(self) -> None:
+        job_id = self.queue.enqueue("abcdefghijk", {"video": "abcdefghijk"})
+        self.assertEqual(self.queue.enqueue("abcdefghijk"), job_id)
+
+        job = self.queue.lease("worker-a", lease_seconds=60)
+        self.assertEqual((job.job_id, job.attempts), (job_id, 1))
+        self.assertIsNone(self.queue.lease("worker-b", lease_seconds=60))
+        self.assertTrue(self.queue.heartbeat(job_id, "worker-a", lease_seconds=60))
+        self.assertFalse(self.queue.ack(job_id, "worker-b"))
+        self.assertTrue(self.queue.ack(job_id, "worker-a"))
+        self.assertEqual(self.queue.get(job_id)["status"], "done")
+        self.assertNotEqual(self.queue.enqueue("abcdefghijk"), job_id)
+
+    def test_expired_lease_is_released_and_exhausted_jobs_go_dead(self) -> None:
+        job_id = self.queue.enqueue("abcdefghijk")
+        self.queue.lease("worker-a", lease_seconds=0)
+        time.sleep(0.01)
+
+        stolen = self.queue.lease("worker-b", lease_seconds=60)
+        self.assertEqual((stolen.job_id, stolen.attempts), (job_id, 2))
+        self.assertFalse(self.queue.heartbeat(job_id, "worker-a"))
+
+        self.assertTrue(self.queue.nack(job_id, "worker-b", "boom", retry_delay_s=0))
+        self.assertIsNone(self.queue.lease("worker-a"))
+        self.assertEqual(self.queue.get(job_id)["status"], "dead")
+        self.assertEqual(self.queue.get(job_id)["last_error"], "boom")
+
+    def test_stage_completion_is_idempotent(self) -> None:
+        self.assertTrue(self.queue.complete_stage("abcdefghijk", "research", {"topic": "rates"}))
+        self.assertFalse(self.queue.complete_stage("abcdefghijk", "research", {"topic": "rates"}))
+        self.assertTrue(self.queue.complete_stage("abcdefghijk", "research", {"topic": "inflation"}))
+        self.assertEqual(self.queue.completed_stages("abcdefghijk"), {"research": {"topic": "inflation"}})
+
+    def test_consume_jobs_records_stages_and_acks(self) -> None:
+        job_id = self.queue.enqueue("abcdefghijk", {"video": "https://youtu.be/abcdefghijk"})
+        self.queue.complete_stage("abcdefghijk", "research", {"topic": "rates"})
+
+        def fake_run(video, refresh, render_views, agents, stage_listener):
+            stage_listener("plan", {"video_id": "abcdefghijk"})
+            return {"video_id": "abcdefghijk"}
+
+        with mock.patch.object(pipeline_runner, "run_pipeline", side_effect=fake_run) as run, \
+                mock.patch.object(pipeline_runner, "write_run_manifest"), \
+                mock.patch.object(pipeline_runner, "_hydrate_completed_stages") as hydrate:
+            processed = pipeline_runner.consume_jobs(self.queue, "worker-a", once=True)
+
+        self.assertEqual(processed, 1)
+        self.assertEqual(run.call_args.args[0], "https://youtu.be/abcdefghijk")
+        hydrate.assert_called_once_with("abcdefghijk", {"research": {"topic": "rates"}})
+        self.assertEqual(set(self.queue.completed_stages("abcdefghijk")), {"research", "plan"})
+        self.assertEqual(self.queue.get(job_id)["status"], "done")
+
+    def test_lost_lease_aborts_run_without_recording_stages(self) -> None:
+        job_id = self.queue.enqueue("abcdefghijk", {"video": "abcdefghijk"})
+        reached = []
+
+        def fake_run(video, refresh, render_views, agents, stage_listener):
+            stage_listener("research", {"topic": "rates"})
+            time.sleep(0.01)
+            self.assertIsNotNone(self.queue.lease("worker-b", lease_seconds=60))
+            stage_listener("plan", {"video_id": "abcdefghijk"})
+            reached.append("script")
+            return {"video_id": "abcdefghijk"}
+
+        with mock.patch.object(pipeline_runner, "run_pipeline", side_effect=fake_run), \
+                mock.patch.object(pipeline_runner, "write_run_manifest") as manifest, \
+                mock.patch.object(pipeline_runner, "_hydrate_completed_stages"):
+            processed = pipeline_runner.consume_jobs(self.queue, "worker-a", once=True, lease_seconds=0)
+
+        self.assertEqual(processed, 1)
+        self.assertEqual(reached, [])
+        manifest.assert_not_called()
+        self.assertEqual(set(self.queue.completed_stages("abcdefghijk")), {"research"})
+        job = self.queue.get(job_id)
+        self.assertEqual((job["status"], job["lease_owner"], job["attempts"]), ("leased", "worker-b", 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
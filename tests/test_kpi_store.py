@@ -0,0 +1,119 @@
+import math
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+
+from lib.kpi_store import KpiStore, rolling, week_index, week_start
+from lib.policy_engine import evaluate_phase_state
+
+
+END = date(2026, 3, 1)  # a Sunday
+
+
+def _seed(store: KpiStore, videos: int, days: int) -> None:
+    rows = []
+    for vid in range(videos):
+        for offset in range(days):
+            rows.append(
+                {
+                    "video_id": f"v{vid:010d}",
+                    "metric_date": END - timedelta(days=offset),
+                    "views": 100,
+                    "average_view_duration": 45.0,
+                    "impressions_ctr": 0.05,
+                }
+            )
+    store.upsert(rows)
+
+
+class KpiStoreTests(unittest.TestCase):
+    def test_weeks_are_monday_aligned(self) -> None:
+        self.assertEqual(week_start(week_index(END)), date(2026, 2, 23))
+        self.assertEqual(week_start(week_index(END)).weekday(), 0)
+
+    def test_upsert_merges_fields_and_round_trips(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = KpiStore(Path(tmp))
+            store.upsert([{"video_id": "a", "metric_date": "2026-03-01", "views": 10, "average_view_duration": 30}])
+            store.record_geo_warnings("a", END, 2)
+            store.upsert([{"video_id": "a", "metric_date": "2026-03-01", "views": 12}])
+            self.assertEqual(len(store), 1)
+            store.save()
+
+            reloaded = KpiStore(Path(tmp))
+            week = reloaded.weekly()[week_index(END)]
+            self.assertEqual(week["views"], 12)
+            self.assertEqual(week["average_view_duration"], 30)
+            self.assertEqual(week["geo_warnings"], 2)
+            self.assertTrue(math.isnan(week["impressions_ctr"]))
+
+    def test_weekly_avd_is_view_weighted(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = KpiStore(Path(tmp))
+            store.upsert(
+                [
+                    {"video_id": "a", "metric_date": END, "views": 300, "average_view_duration": 60},
+                    {"video_id": "b", "metric_date": END, "views": 100, "average_view_duration": 20},
+                ]
+            )
+            self.assertEqual(store.weekly()[week_index(END)]["average_view_duration"], 50)
+
+    def test_rolling_skips_missing_values(self) -> None:
+        self.assertEqual(rolling([1.0, float("nan"), 3.0], 2, lambda xs: sum(xs) / len(xs)), [1.0, 1.0, 3.0])
+
+    def test_phase_input_feeds_policy_engine(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = KpiStore(Path(tmp))
+            _seed(store, videos=12, days=28)
+            for offset in range(0, 28, 7):
+                store.record_geo_warnings("v0000000000", END - timedelta(days=offset), 1)
+            data = store.phase_input(
+                weeks=4,
+                end=END,
+                source_contract_ready=True,
+                source_linkage_pass_rate=0.99,
+                research_source_coverage=0.97,
+            )
+        self.assertEqual(data.published_videos, 12)
+        self.assertEqual(len(data.ctr_weekly), 4)
+        self.assertEqual(data.geo_readiness_warning_count_weekly, [1, 1, 1, 1])
+        self.assertTrue(evaluate_phase_state(data)["explain"]["can_promote"])
+
+    def test_phase_input_keeps_explicit_zero_published_videos(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = KpiStore(Path(tmp))
+            _seed(store, videos=3, days=7)
+            self.assertEqual(store.phase_input(weeks=1, end=END, published_videos=0).published_videos, 0)
+            self.assertEqual(store.phase_input(weeks=1, end=END).published_videos, 3)
+
+    def test_locked_writers_do_not_lose_updates(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            def write(index):
+                with KpiStore.locked(Path(tmp)) as store:
+                    store.record_geo_warnings(f"video{index:06d}", END, index)
+
+            threads = [threading.Thread(target=write, args=(index,)) for index in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            reloaded = KpiStore(Path(tmp))
+            self.assertEqual(len(reloaded), 8)
+            self.assertEqual(sorted(path.name for path in Path(tmp).iterdir() if path.name.endswith(".tmp")), [])
+
+    def test_rollup_over_catalogue_is_fast(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = KpiStore(Path(tmp))
+            _seed(store, videos=300, days=120)
+            store.save()
+            started = time.perf_counter()
+            reloaded = KpiStore(Path(tmp))
+            reloaded.phase_input(weeks=12, end=END)
+            self.assertLess(time.perf_counter() - started, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import json
+import tempfile
+import tracemalloc
+import unittest
+from pathlib import Path
+
+from lib.memory_profile import format_report, memory_metrics, memory_profiling, stage_memory
+
+
+class MemoryProfileTests(unittest.TestCase):
+    def test_stage_memory_is_noop_when_inactive(self) -> None:
+        with stage_memory("script") as record:
+            self.assertIsNone(record)
+        self.assertEqual(memory_metrics(None), {})
+
+    def test_records_peak_retained_and_top_sites(self) -> None:
+        kept = []
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "memory.json"
+            with memory_profiling(path, top_n=5) as profiler:
+                with stage_memory("scenes") as record:
+                    scratch = [bytes(1024) for _ in range(2000)]
+                    kept.append(bytearray(512 * 1024))
+                    del scratch
+                profiler.record_payloads("result:vid", {"scenes": {"items": list(range(100))}})
+            self.assertFalse(tracemalloc.is_tracing())
+            report = json.loads(path.read_text(encoding="utf-8"))
+
+        self.assertGreater(record["peak_bytes"], 1900 * 1024)
+        self.assertGreater(record["retained_bytes"], 400 * 1024)
+        self.assertLess(record["retained_bytes"], record["peak_bytes"])
+        self.assertTrue(any("test_memory_profile.py" in site["site"] for site in record["top_allocations"]))
+        self.assertEqual(set(memory_metrics(record)), {"memory_peak_bytes", "memory_retained_bytes"})
+        self.assertEqual([item["stage"] for item in report["stages"]], ["scenes", "result:vid"])
+        self.assertIn("scenes", format_report(report))
+
+    def test_shrinking_sites_do_not_take_top_slots(self) -> None:
+        with memory_profiling(top_n=1):
+            released = [bytearray(4 * 1024 * 1024)]
+            kept = []
+            with stage_memory("plan") as record:
+                released.clear()
+                kept.append(bytearray(64 * 1024))
+        self.assertEqual(len(record["top_allocations"]), 1)
+        self.assertGreater(record["top_allocations"][0]["size_diff_bytes"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
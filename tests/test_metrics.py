@@ -0,0 +1,64 @@
+import tempfile
+import unittest
+import urllib.request
+from pathlib import Path
+
+from lib.metrics import Registry, start_http_server
+
+
+class MetricsTests(unittest.TestCase):
+    def test_render_openmetrics_text(self) -> None:
+        registry = Registry()
+        calls = registry.counter("llm_requests", "Model calls.", ["model", "outcome"])
+        inflight = registry.gauge("stage_in_progress", "Running stages.", ["stage"])
+        latency = registry.histogram("stage_seconds", "Stage latency.", ["stage"], buckets=[0.1, 1.0])
+        calls.inc(model="flash", outcome="unavailable")
+        calls.inc(2, model="flash", outcome="success")
+        with inflight.track_inprogress(stage="script"):
+            self.assertEqual(inflight.value(stage="script"), 1)
+        latency.observe(0.05, stage="script")
+        latency.observe(5, stage="script")
+
+        text = registry.render()
+        self.assertIn("# TYPE llm_requests counter", text)
+        self.assertIn('llm_requests_total{model="flash",outcome="success"} 2', text)
+        self.assertIn('stage_in_progress{stage="script"} 0', text)
+        self.assertIn('stage_seconds_bucket{stage="script",le="0.1"} 1', text)
+        self.assertIn('stage_seconds_bucket{stage="script",le="1.0"} 1', text)
+        self.assertIn('stage_seconds_bucket{stage="script",le="+Inf"} 2', text)
+        self.assertIn('stage_seconds_count{stage="script"} 2', text)
+        self.assertTrue(text.endswith("# EOF\n"))
+
+    def test_label_and_registration_checks(self) -> None:
+        registry = Registry()
+        counter = registry.counter("jobs", "Jobs.", ["status"])
+        self.assertIs(registry.counter("jobs", "Jobs.", ["status"]), counter)
+        with self.assertRaises(ValueError):
+            registry.gauge("jobs", "Jobs.", ["status"])
+        with self.assertRaises(ValueError):
+            counter.inc(stage="x")
+        with self.assertRaises(ValueError):
+            counter.inc(-1, status="done")
+
+    def test_textfile_and_http_exposition(self) -> None:
+        registry = Registry()
+        registry.counter("spills", "Spills.").inc()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = registry.write_textfile(Path(tmp) / "pipeline.prom")
+            text = path.read_text(encoding="utf-8")
+            self.assertIn("# TYPE spills_total counter\n# HELP spills_total Spills.\nspills_total 1\n", text)
+            self.assertNotIn("# EOF", text)
+            self.assertEqual([p.name for p in Path(tmp).iterdir()], ["pipeline.prom"])
+
+        server = start_http_server("127.0.0.1", 0, registry=registry)
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics", timeout=5) as response:
+                self.assertIn("openmetrics-text", response.headers["Content-Type"])
+                self.assertIn("spills_total 1", response.read().decode("utf-8"))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
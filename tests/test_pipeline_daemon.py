@@ -0,0 +1,107 @@
+import json
+import threading
+import time
+import unittest
+import urllib.request
+
+from lib.pipeline_daemon import PipelineDaemon, make_server
+
+
+class PipelineDaemonTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.release = threading.Event()
+        self.calls = []
+
+        def runner(spec):
+            self.calls.append(spec)
+            self.release.wait(5)
+            if spec["video"] == "bad_video_x":
+                raise RuntimeError("stage failed")
+            return {"video_id": spec["video"], "run_id": "run-1"}
+
+        self.daemon = PipelineDaemon(max_workers=2, runner=runner)
+        self.server = make_server(self.daemon, port=0)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self) -> None:
+        self.release.set()
+        self.server.shutdown()
+        self.server.server_close()
+        self.daemon.shutdown()
+
+    def _request(self, path, body=None):
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        with urllib.request.urlopen(urllib.request.Request(self.base + path, data=data)) as response:
+            return response.status, json.loads(response.read())
+
+    def _wait(self, job_id):
+        for _ in range(200):
+            _, job = self._request(f"/jobs/{job_id}")
+            if job["status"] not in {"queued", "running"}:
+                return job
+            time.sleep(0.01)
+        self.fail("job did not finish")
+
+    def test_jobs_run_and_duplicates_join_active_job(self) -> None:
+        status, first = self._request("/jobs", {"video": "https://youtu.be/abcdefghijk"})
+        self.assertEqual(status, 202)
+        _, duplicate = self._request("/jobs", {"video": "abcdefghijk", "refresh": True})
+        self.assertEqual(duplicate["job_id"], first["job_id"])
+
+        self.release.set()
+        job = self._wait(first["job_id"])
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual(job["result"]["run_id"], "run-1")
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self._request("/health")[1]["jobs"], {"succeeded": 1})
+
+    def test_failed_job_reports_error(self) -> None:
+        self.release.set()
+        _, job = self._request("/jobs", {"video": "bad_video_x"})
+        self.assertEqual(self._wait(job["job_id"])["error"], "stage failed")
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            self._request("/jobs", {"refresh": True})
+        self.assertEqual(ctx.exception.code, 400)
+
+    def test_malformed_content_length_is_rejected(self) -> None:
+        request = urllib.request.Request(self.base + "/jobs", data=b"{}", headers={"Content-Length": "abc"})
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            urllib.request.urlopen(request)
+        self.assertEqual(ctx.exception.code, 400)
+
+    def test_finished_jobs_are_evicted_after_ttl_and_cap(self) -> None:
+        now = [0.0]
+        daemon = PipelineDaemon(max_workers=1, runner=lambda spec: {"video_id": spec["video"]}, job_ttl_s=60, max_finished=2, clock=lambda: now[0])
+        try:
+            jobs = [daemon.submit({"video": f"video{index:06d}"}) for index in range(3)]
+            daemon.shutdown()
+            self.assertEqual(len(daemon.list_jobs()), 2)
+            self.assertIsNone(daemon.get(jobs[0]["job_id"]))
+            now[0] = 61.0
+            self.assertEqual(daemon.list_jobs(), [])
+        finally:
+            daemon.shutdown()
+
+    def test_each_worker_thread_gets_its_own_agents(self) -> None:
+        from lib.pipeline_daemon import _warm_agents
+
+        built = []
+
+        def factory():
+            built.append(object())
+            return built[-1]
+
+        seen = []
+        threads = [threading.Thread(target=lambda: seen.append((_warm_agents(factory), _warm_agents(factory)))) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(built), 2)
+        self.assertTrue(all(first is second for first, second in seen))
+        self.assertIsNot(seen[0][0], seen[1][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import random
+import unittest
+
+from lib.policy_backtest import BacktestCases, backtest, decide, deep_merge
+from lib.policy_engine import PhaseEvaluationInput, evaluate_phase_state, load_policy
+
+
+def _random_case(rng: random.Random) -> dict:
+    spread = rng.choice([0.05, 0.3])
+    return {
+        "published_videos": rng.randint(5, 35),
+        "ctr_weekly": [0.05 * rng.uniform(1 - spread, 1 + spread) for _ in range(rng.randint(2, 6))],
+        "avd_weekly": [45 * rng.uniform(1 - spread, 1 + spread) for _ in range(rng.randint(2, 6))],
+        "geo_readiness_warning_count_weekly": [rng.randint(0, 8) for _ in range(rng.randint(0, 5))],
+        "source_contract_ready": rng.random() > 0.1,
+        "source_linkage_pass_rate": rng.uniform(0.97, 1.0),
+        "research_source_coverage": rng.uniform(0.93, 1.0),
+        "incident_open": rng.random() > 0.9,
+    }
+
+
+class PolicyBacktestTests(unittest.TestCase):
+    def test_decisions_match_evaluate_phase_state(self) -> None:
+        rng = random.Random(7)
+        records = [_random_case(rng) for _ in range(300)]
+        decisions = decide(BacktestCases.from_records(records), load_policy())
+        for record, can_promote in zip(records, decisions["can_promote"]):
+            expected = evaluate_phase_state(PhaseEvaluationInput(**record))["explain"]["can_promote"]
+            self.assertEqual(can_promote, expected, record)
+        self.assertTrue(any(decisions["can_promote"]))
+
+    def test_variants_report_false_rates(self) -> None:
+        stable = {
+            "published_videos": 12,
+            "ctr_weekly": [0.05, 0.05, 0.05, 0.05],
+            "avd_weekly": [45.0, 45.0, 45.0, 45.0],
+            "geo_readiness_warning_count_weekly": [1, 1, 1, 1],
+            "source_contract_ready": True,
+            "source_linkage_pass_rate": 0.99,
+            "research_source_coverage": 0.97,
+        }
+        noisy = {**stable, "ctr_weekly": [0.04, 0.05, 0.045, 0.05]}
+        cases = BacktestCases.from_records([{**stable, "expected": "promote"}, {**noisy, "expected": "promote"}])
+        base = load_policy()
+        loose = deep_merge(base, {"phase_b_transition": {"ctr": {"max_relative_range": 0.3}}})
+        results = {row["variant"]: row for row in backtest(cases, {"base": base, "loose": loose})}
+
+        self.assertEqual(results["base"]["false_hold_rate"], 0.5)
+        self.assertEqual(results["base"]["reason_counts"], {"CTR_STABILITY_FAIL": 1})
+        self.assertEqual(results["loose"]["false_hold_rate"], 0.0)
+        self.assertEqual(base["phase_b_transition"]["ctr"]["max_relative_range"], 0.2)
+
+    def test_weekly_series_replay(self) -> None:
+        week = {
+            "ctr": 0.05,
+            "avd": 45.0,
+            "geo_warnings": 1,
+            "published_videos": 12,
+            "source_contract_ready": True,
+            "source_linkage_pass_rate": 0.99,
+            "research_source_coverage": 0.97,
+            "expected": "promote",
+        }
+        cases = BacktestCases.from_weekly([week] * 6, history_weeks=4)
+        self.assertEqual([len(items) for items in cases.ctr_weekly], [1, 2, 3, 4, 4, 4])
+        self.assertEqual(decide(cases, load_policy())["can_promote"], [False, False, False, True, True, True])
+
+
+if __name__ == "__main__":
+    unittest.main()
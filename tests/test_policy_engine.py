@@ -1,6 +1,30 @@
+import hashlib
+import json
+import os
+import tempfile
 import unittest
+from pathlib import Path
+from unittest import mock
 
-from lib.policy_engine import PhaseEvaluationInput, evaluate_phase_state
+from lib.policy_engine import (
+    CompiledPolicy,
+    PhaseEvaluationInput,
+    evaluate_phase_state,
+    get_policy,
+    _decision_hash,
+    load_policy,
+)
+
+
+STABLE_INPUT = PhaseEvaluationInput(
+    published_videos=12,
+    ctr_weekly=[0.051, 0.049, 0.05, 0.052],
+    avd_weekly=[44.0, 45.0, 46.0, 45.0],
+    geo_readiness_warning_count_weekly=[1, 1, 1, 1],
+    source_contract_ready=True,
+    source_linkage_pass_rate=0.99,
+    research_source_coverage=0.97,
+)
 
 
 class PolicyEngineTests(unittest.TestCase):
@@ -92,6 +116,64 @@ class PolicyEngineTests(unittest.TestCase):
         self.assertEqual(result["override_audit_violations"], 1)
         self.assertFalse(result["explain"]["machine"]["override_status"]["valid"])
 
+    def test_decision_hash_keeps_stdlib_json_encoding(self) -> None:
+        payload = {"summary": "보류 — hold", "ratio": float("nan"), "codes": ["A"]}
+        packed = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        self.assertEqual(_decision_hash(payload), hashlib.sha256(packed.encode("utf-8")).hexdigest())
+
+
+class CompiledPolicyTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "policy.json"
+        self.path.write_text(json.dumps(load_policy()), encoding="utf-8")
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _rewrite(self, policy: dict, mtime_ns: int) -> None:
+        self.path.write_text(json.dumps(policy), encoding="utf-8")
+        os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def test_get_policy_reuses_compiled_policy_until_file_changes(self) -> None:
+        first = get_policy(self.path)
+        with mock.patch("lib.policy_engine.load_policy") as loader:
+            self.assertIs(get_policy(self.path), first)
+            loader.assert_not_called()
+
+        policy = load_policy(self.path)
+        policy["phase_b_transition"]["minimum_published_videos"] = 20
+        self._rewrite(policy, first.source_stamp[0] + 1_000_000_000)
+        reloaded = get_policy(self.path)
+        self.assertIsNot(reloaded, first)
+        self.assertEqual(reloaded.thresholds.min_published_videos, 20)
+
+        result = evaluate_phase_state(STABLE_INPUT, policy=reloaded)
+        self.assertFalse(result["explain"]["can_promote"])
+        self.assertIn("VIDEO_COUNT_BELOW_MINIMUM", result["explain"]["reason_codes"])
+
+    def test_compile_precomputes_lookup_tables(self) -> None:
+        compiled = get_policy(self.path)
+        raw = load_policy(self.path)
+        self.assertEqual(dict(compiled.reason_code_actions), raw["decision_enforcement"]["reason_code_actions"])
+        self.assertEqual(compiled.thresholds.hold_levels, frozenset(raw["geo_readiness"]["incident_rules"]["auto_hold_on_level"]))
+        self.assertEqual(compiled.version, raw["policy_version"])
+        self.assertEqual(
+            evaluate_phase_state(STABLE_INPUT, policy=compiled)["explain"]["machine"],
+            evaluate_phase_state(STABLE_INPUT, policy=raw)["explain"]["machine"],
+        )
+
+    def test_invalid_policy_is_rejected_by_schema(self) -> None:
+        policy = load_policy(self.path)
+        del policy["phase_b_transition"]["ctr"]
+        with self.assertRaises(ValueError):
+            CompiledPolicy.compile(policy)
+
+        policy = load_policy(self.path)
+        policy["geo_readiness"]["incident_rules"]["auto_hold_on_level"] = ["purple"]
+        with self.assertRaises(ValueError):
+            CompiledPolicy.compile(policy)
+
 
 if __name__ == "__main__":
     unittest.main()
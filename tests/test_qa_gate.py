@@ -0,0 +1,86 @@
+import random
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+
+from lib.kpi_store import KpiStore
+from lib.qa_gate import CHANNEL_TYPES, evaluate_metrics, evaluate_metrics_bulk, evaluate_snapshots, load_kpi_snapshots, write_decisions
+
+
+NAN = float("nan")
+
+
+class _FakeTable:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def upsert(self, rows, on_conflict=None):
+        self.calls.append((len(rows), on_conflict))
+        return self
+
+    def execute(self):
+        return self
+
+
+class _FakeClient:
+    def __init__(self):
+        self.calls = []
+
+    def table(self, name):
+        assert name == "qa_gate_decisions"
+        return _FakeTable(self.calls)
+
+
+class QaGateBulkTests(unittest.TestCase):
+    def test_bulk_matches_single_evaluation(self) -> None:
+        rng = random.Random(3)
+        rows = [
+            (f"vid{index:05d}", rng.choice(CHANNEL_TYPES), rng.uniform(2.5, 7.0), rng.uniform(25.0, 55.0), rng.uniform(50.0, 80.0))
+            for index in range(2000)
+        ]
+        video_ids, channels, ctr, avd, retention = (list(column) for column in zip(*rows))
+        results = evaluate_metrics_bulk(video_ids, channels, ctr, avd, retention)
+        for (video_id, channel, c, a, r), result in zip(rows, results):
+            expected = evaluate_metrics({"ctr": c, "avd": a, "retention_30s": r}, channel)
+            self.assertEqual(result["video_id"], video_id)
+            self.assertEqual(result["decision"], expected["decision"])
+            self.assertEqual(result["flags"], expected["flags"])
+
+    def test_missing_metrics_hold_and_are_flagged(self) -> None:
+        results = evaluate_snapshots(
+            {"a": {"ctr": 6.0, "avd": 50.0, "retention_30s": NAN}, "b": {"ctr": NAN, "avd": 10.0, "retention_30s": 70.0}},
+            "finance",
+            {"b": "news"},
+        )
+        self.assertEqual([r["decision"] for r in results], ["publish", "hold"])
+        self.assertEqual(results[0]["flags"], ["retention_30s_missing"])
+        self.assertEqual(results[1]["flags"], ["avd_below_baseline", "ctr_missing"])
+        self.assertEqual(results[1]["channel_type"], "news")
+        self.assertIsNone(results[1]["ctr"])
+        with self.assertRaises(ValueError):
+            evaluate_snapshots({"a": {"ctr": 1.0, "avd": 1.0, "retention_30s": 1.0}}, "gaming")
+
+    def test_decisions_written_in_batches(self) -> None:
+        client = _FakeClient()
+        results = [{"video_id": f"v{i}", "decision": "hold"} for i in range(1201)]
+        self.assertEqual(write_decisions(results, client=client, review_date=date(2026, 3, 2)), 3)
+        self.assertEqual(client.calls, [(500, "video_id,review_date"), (500, "video_id,review_date"), (201, "video_id,review_date")])
+
+    def test_kpi_source_uses_latest_values(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = KpiStore(Path(tmp))
+            store.upsert(
+                [
+                    {"video_id": "a", "metric_date": "2026-03-01", "impressions_ctr": 4.0, "average_view_duration": 41.0},
+                    {"video_id": "a", "metric_date": "2026-03-03", "impressions_ctr": 6.0},
+                    {"video_id": "a", "metric_date": "2026-03-02", "average_view_duration": 30.0},
+                ]
+            )
+            snapshots = load_kpi_snapshots(store)
+        self.assertEqual(snapshots["a"]["ctr"], 6.0)
+        self.assertEqual(snapshots["a"]["avd"], 30.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import gzip
+import json
+import multiprocessing
+import tempfile
+import unittest
+from pathlib import Path
+
+from lib.raw_archive import append_raw, apply_retention, latest_raw, list_attempts, read_attempt
+
+
+def _append_many(data_dir: str, worker: int) -> None:
+    for idx in range(10):
+        append_raw(Path(data_dir), "abcdefghijk", "research_raw", f"worker {worker} attempt {idx}")
+
+
+class RawArchiveTests(unittest.TestCase):
+    def test_attempt_history_is_preserved_and_addressable(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = Path(tmp)
+            append_raw(data_dir, "abcdefghijk", "script_long_raw", "first draft")
+            append_raw(data_dir, "abcdefghijk", "planner_raw", "plan")
+            append_raw(data_dir, "abcdefghijk", "script_long_raw", "repaired draft")
+
+            attempts = list_attempts(data_dir, "abcdefghijk", "script_long_raw")
+            self.assertEqual([entry["attempt"] for entry in attempts], [1, 2])
+            self.assertEqual(read_attempt(data_dir, "abcdefghijk", attempts[0]), "first draft")
+            self.assertEqual(latest_raw(data_dir, "abcdefghijk", "script_long_raw"), "repaired draft")
+
+            log_path = data_dir / "raw_archive" / "abcdefghijk.jsonl.gz"
+            lines = gzip.decompress(log_path.read_bytes()).decode("utf-8").splitlines()
+            self.assertEqual([json.loads(line)["seq"] for line in lines], [1, 2, 3])
+
+    def test_retention_keeps_newest_attempts_per_stage(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = Path(tmp)
+            for idx in range(4):
+                append_raw(data_dir, "abcdefghijk", "research_raw", f"attempt {idx}")
+            append_raw(data_dir, "abcdefghijk", "planner_raw", "plan")
+
+            self.assertEqual(apply_retention(data_dir, "abcdefghijk", keep=2), 2)
+            remaining = list_attempts(data_dir, "abcdefghijk")
+            self.assertEqual([entry["seq"] for entry in remaining], [3, 4, 5])
+            self.assertEqual(read_attempt(data_dir, "abcdefghijk", remaining[0]), "attempt 2")
+            self.assertEqual(latest_raw(data_dir, "abcdefghijk", "planner_raw"), "plan")
+
+    def test_stage_lookups_use_the_stage_index(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = Path(tmp)
+            append_raw(data_dir, "abcdefghijk", "research_raw", "research")
+            append_raw(data_dir, "abcdefghijk", "planner_raw", "plan")
+            append_raw(data_dir, "abcdefghijk", "research_raw", "research again")
+
+            stage_index = data_dir / "raw_archive" / "abcdefghijk.idx.d" / "research_raw.jsonl"
+            self.assertEqual([json.loads(line)["seq"] for line in stage_index.read_text().splitlines()], [1, 3])
+            (data_dir / "raw_archive" / "abcdefghijk.idx.jsonl").write_text("not json\n")
+            self.assertEqual(latest_raw(data_dir, "abcdefghijk", "research_raw"), "research again")
+            self.assertEqual([entry["attempt"] for entry in list_attempts(data_dir, "abcdefghijk", "planner_raw")], [1])
+
+    def test_combined_index_is_split_on_next_append(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = Path(tmp)
+            append_raw(data_dir, "abcdefghijk", "research_raw", "old")
+            append_raw(data_dir, "abcdefghijk", "planner_raw", "old plan")
+            stage_dir = data_dir / "raw_archive" / "abcdefghijk.idx.d"
+            for path in stage_dir.iterdir():
+                path.unlink()
+            stage_dir.rmdir()
+
+            self.assertEqual(latest_raw(data_dir, "abcdefghijk", "research_raw"), "old")
+            entry = append_raw(data_dir, "abcdefghijk", "research_raw", "new")
+            self.assertEqual((entry["seq"], entry["attempt"]), (3, 2))
+            self.assertEqual([item["seq"] for item in list_attempts(data_dir, "abcdefghijk", "research_raw")], [1, 3])
+            self.assertEqual(latest_raw(data_dir, "abcdefghijk", "planner_raw"), "old plan")
+
+    def test_concurrent_processes_do_not_interleave_appends(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            context = multiprocessing.get_context("spawn")
+            workers = [context.Process(target=_append_many, args=(tmp, worker)) for worker in range(3)]
+            for process in workers:
+                process.start()
+            for process in workers:
+                process.join(30)
+            self.assertEqual([process.exitcode for process in workers], [0, 0, 0])
+
+            entries = list_attempts(Path(tmp), "abcdefghijk")
+            self.assertEqual([entry["seq"] for entry in entries], list(range(1, 31)))
+            self.assertEqual([entry["attempt"] for entry in entries], list(range(1, 31)))
+            texts = {read_attempt(Path(tmp), "abcdefghijk", entry) for entry in entries}
+            self.assertEqual(len(texts), 30)
+
+    def test_entries_listed_before_compaction_still_resolve(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = Path(tmp)
+            for idx in range(4):
+                append_raw(data_dir, "abcdefghijk", "research_raw", f"attempt {idx}")
+            stale = list_attempts(data_dir, "abcdefghijk", "research_raw")
+            apply_retention(data_dir, "abcdefghijk", keep=2)
+
+            self.assertEqual(read_attempt(data_dir, "abcdefghijk", stale[3]), "attempt 3")
+            self.assertEqual(read_attempt(data_dir, "abcdefghijk", stale[2]), "attempt 2")
+            with self.assertRaises(LookupError):
+                read_attempt(data_dir, "abcdefghijk", stale[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
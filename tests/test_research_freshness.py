@@ -0,0 +1,113 @@
+import json
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from lib.research_freshness import (
+    ResearchRefresher,
+    expires_at,
+    freshness_window_days,
+    is_stale,
+    material_change,
+)
+
+
+NOW = datetime(2026, 3, 2, 12, 0, tzinfo=timezone.utc)
+
+
+def _payload(**overrides):
+    payload = {
+        "executive_summary": "Rates are rising.",
+        "key_facts": [
+            "The policy rate rose to 5.25% in July 2023.",
+            "Mortgage applications fell for three consecutive months.",
+        ],
+        "data_points": [{"metric": "policy rate", "value": "5.25%", "timeframe": "2023-07"}],
+        "sources": [
+            {"source_id": "src-001", "url": "https://www.federalreserve.gov/rates/", "freshness_window_days": 30},
+            {"source_id": "src-002", "url": "https://example.org/mortgages", "freshness_window_days": 180},
+        ],
+    }
+    payload.update(overrides)
+    return payload
+
+
+class FreshnessWindowTests(unittest.TestCase):
+    def test_shortest_source_window_wins(self):
+        self.assertEqual(freshness_window_days(_payload()), 30)
+        self.assertEqual(expires_at(_payload(), NOW), NOW + timedelta(days=30))
+
+    def test_default_window_without_declared_sources(self):
+        self.assertEqual(freshness_window_days({"sources": [{"freshness_window_days": "n/a"}]}, default=7), 7)
+
+    def test_stale_uses_expires_at_then_updated_at(self):
+        self.assertFalse(is_stale({"expires_at": (NOW + timedelta(hours=1)).isoformat()}, now=NOW))
+        self.assertTrue(is_stale({"expires_at": (NOW - timedelta(hours=1)).isoformat()}, now=NOW))
+        legacy = {"content": json.dumps(_payload()), "updated_at": (NOW - timedelta(days=29)).isoformat()}
+        self.assertFalse(is_stale(legacy, now=NOW))
+        legacy["updated_at"] = (NOW - timedelta(days=31)).isoformat().replace("+00:00", "Z")
+        self.assertTrue(is_stale(legacy, now=NOW))
+        self.assertTrue(is_stale({"content": json.dumps(_payload()), "updated_at": "now()"}, now=NOW))
+
+
+class MaterialChangeTests(unittest.TestCase):
+    def test_rewording_is_not_material(self):
+        reworded = _payload(
+            executive_summary="Borrowing costs keep climbing.",
+            key_facts=[
+                "In July 2023 the policy rate rose to 5.25%.",
+                "Mortgage applications fell for three consecutive months.",
+            ],
+            sources=[
+                {"source_id": "src-001", "url": "http://federalreserve.gov/rates", "freshness_window_days": 30},
+                {"source_id": "src-002", "url": "https://example.org/mortgages", "freshness_window_days": 180},
+            ],
+        )
+        self.assertFalse(material_change(_payload(), reworded))
+
+    def test_new_figures_sources_or_facts_are_material(self):
+        new_figure = _payload(data_points=[{"metric": "policy rate", "value": "5.50%", "timeframe": "2023-07"}])
+        self.assertTrue(material_change(_payload(), new_figure))
+        extra_source = _payload()
+        extra_source["sources"] = extra_source["sources"] + [{"source_id": "src-003", "url": "https://bls.gov/cpi"}]
+        self.assertTrue(material_change(_payload(), extra_source))
+        new_facts = _payload(key_facts=["Housing starts dropped sharply across western regions.", "The policy rate rose to 5.25% in July 2023."])
+        self.assertTrue(material_change(_payload(), new_facts, similarity=0.6))
+
+
+class ResearchRefresherTests(unittest.TestCase):
+    def test_one_refresh_per_topic_in_flight(self):
+        refresher = ResearchRefresher(max_workers=2)
+        release = threading.Event()
+        calls = []
+
+        def refresh():
+            calls.append(1)
+            release.wait(5)
+            return "done"
+
+        first = refresher.schedule("vid00000001", refresh)
+        second = refresher.schedule("vid00000001", refresh)
+        self.assertIs(first, second)
+        self.assertEqual(refresher.pending(), 1)
+        self.assertTrue(refresher.is_pending("vid00000001"))
+        release.set()
+        self.assertEqual(first.result(5), "done")
+        refresher.shutdown()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(refresher.pending(), 0)
+
+    def test_failed_refresh_clears_topic(self):
+        refresher = ResearchRefresher(max_workers=1)
+
+        def boom():
+            raise RuntimeError("quota")
+
+        with self.assertRaises(RuntimeError):
+            refresher.schedule("vid00000002", boom).result(5)
+        self.assertEqual(refresher.schedule("vid00000002", lambda: "ok").result(5), "ok")
+        refresher.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
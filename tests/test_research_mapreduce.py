@@ -0,0 +1,77 @@
+import json
+import threading
+import time
+import unittest
+
+from lib.research_mapreduce import map_reduce_research, split_semantic
+
+
+def _transcript(comments: int) -> str:
+    description = " ".join(f"Sentence {index} about rates and inflation." for index in range(120))
+    reactions = "\n".join(f"- Viewer comment number {index} asks about mortgage costs." for index in range(comments))
+    return f"Title: Rates explained\nDescription: {description}\nTags: ['finance']\n\n[Viewer Reactions]\n{reactions}"
+
+
+class ResearchMapReduceTests(unittest.TestCase):
+    def test_split_respects_limit_and_boundaries(self) -> None:
+        text = _transcript(400)
+        chunks = split_semantic(text, 2000)
+        self.assertGreater(len(chunks), 5)
+        self.assertTrue(all(len(chunk) <= 2000 for chunk in chunks))
+        self.assertEqual("".join(text.split()), "".join("".join(chunks).split()))
+        comment_chunks = [chunk for chunk in chunks if "Viewer comment" in chunk]
+        for chunk in comment_chunks:
+            for line in chunk.splitlines():
+                if "Viewer comment" in line:
+                    self.assertTrue(line.startswith("- Viewer comment") and line.endswith("costs."), line)
+        self.assertTrue(any(chunk.startswith("[Viewer Reactions]") for chunk in chunks))
+        self.assertEqual(split_semantic("short text", 2000), ["short text"])
+
+    def test_chunks_are_mapped_concurrently_and_reduced_once(self) -> None:
+        lock = threading.Lock()
+        state = {"active": 0, "max_active": 0, "calls": []}
+
+        def generate(prompt, model):
+            with lock:
+                state["calls"].append(model)
+                state["active"] += 1
+                state["max_active"] = max(state["max_active"], state["active"])
+            try:
+                if model == "reduce-model":
+                    return json.dumps({"executive_summary": prompt.count('"part"')})
+                time.sleep(0.02)
+                if "Part 2 of" in prompt:
+                    return "not json"
+                return json.dumps({"summary": "ok", "facts": ["rates rose"]})
+            finally:
+                with lock:
+                    state["active"] -= 1
+
+        outcome = map_reduce_research(
+            "rates",
+            _transcript(400),
+            generate,
+            lambda notes: f"REDUCE\n{notes}",
+            map_model="map-model",
+            reduce_model="reduce-model",
+            chunk_chars=2000,
+            max_workers=4,
+        )
+        chunks = outcome["chunks"]
+        self.assertEqual(state["calls"].count("map-model"), chunks)
+        self.assertEqual(state["calls"][-1], "reduce-model")
+        self.assertEqual(state["calls"].count("reduce-model"), 1)
+        self.assertGreater(state["max_active"], 1)
+        self.assertEqual(outcome["failed_chunks"], 1)
+        self.assertEqual(json.loads(outcome["text"])["executive_summary"], chunks - 1)
+
+    def test_all_chunks_failing_raises(self) -> None:
+        with self.assertRaises(RuntimeError):
+            map_reduce_research(
+                "rates", _transcript(400), lambda prompt, model: "", lambda notes: notes,
+                map_model="m", reduce_model="r", chunk_chars=2000,
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
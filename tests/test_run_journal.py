@@ -0,0 +1,52 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from lib.run_journal import RunJournal, journal_inputs
+from lib.serialization import canonical_hash
+
+
+class RunJournalTests(unittest.TestCase):
+    def test_verify_requires_matching_inputs_and_output(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            journal = RunJournal(Path(tmp), "abcdefghijk")
+            research = {"topic": "rates"}
+            plan = {"outline": ["a", "b"]}
+            plan_inputs = journal_inputs(research=research)
+            journal.record("research", run_id="r1", input_hash=journal_inputs(video_id="abcdefghijk"), output_hash=canonical_hash(research))
+            journal.record("plan", run_id="r1", input_hash=plan_inputs, output_hash=canonical_hash(plan))
+
+            resumed = RunJournal(Path(tmp), "abcdefghijk")
+            self.assertTrue(resumed.verify("plan", plan_inputs, plan))
+            self.assertFalse(resumed.verify("plan", journal_inputs(research={"topic": "tax"}), plan))
+            self.assertFalse(resumed.verify("plan", plan_inputs, {"outline": ["edited"]}))
+            self.assertEqual(resumed.first_incomplete(), "script_long")
+
+    def test_reset_and_torn_lines_are_ignored(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            journal = RunJournal(Path(tmp), "abcdefghijk")
+            journal.record("research", run_id="r1", input_hash="i", output_hash="o")
+            journal.reset("r2")
+            journal.record("plan", run_id="r2", input_hash="i", output_hash="o")
+            with journal.path.open("a", encoding="utf-8") as handle:
+                handle.write('{"event": "stage_complete", "stage": "scr')
+
+            entries = RunJournal(Path(tmp), "abcdefghijk").entries()
+            self.assertEqual([entry["stage"] for entry in entries], ["plan"])
+
+    def test_append_after_torn_line_keeps_new_entry(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            journal = RunJournal(Path(tmp), "abcdefghijk")
+            journal.record("research", run_id="r1", input_hash="i", output_hash="o")
+            with journal.path.open("a", encoding="utf-8") as handle:
+                handle.write('{"event": "stage_complete", "stage": "pl')
+
+            RunJournal(Path(tmp), "abcdefghijk").record("plan", run_id="r2", input_hash="i2", output_hash="o2")
+
+            entries = RunJournal(Path(tmp), "abcdefghijk").entries()
+            self.assertEqual([entry["stage"] for entry in entries], ["research", "plan"])
+            self.assertEqual(entries[-1]["output_hash"], "o2")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import json
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from lib.run_log_report import diff_summaries, load_spill, parse_time, percentile, summarize_runs
+from lib.run_logger import spill_run_log
+
+
+NOW = datetime(2026, 1, 10, tzinfo=timezone.utc)
+
+
+def _record(stage: str, status: str, latency: int, *, retry: int = 0, cache: bool = False, error: str = "", at: datetime = NOW) -> dict:
+    return {
+        "stage": stage,
+        "status": status,
+        "attempts": retry + 1,
+        "error_summary": error or None,
+        "metrics": {"latency_ms": latency, "tokens": 10, "cost_usd": 0.01, "cache_hit": cache, "retry_count": retry},
+        "created_at": at.isoformat(),
+    }
+
+
+class RunLogReportTests(unittest.TestCase):
+    def test_percentile_nearest_rank(self) -> None:
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 90), 7)
+        self.assertIsNone(percentile([], 50))
+
+    def test_parse_time_relative_and_iso(self) -> None:
+        self.assertEqual(parse_time("24h", NOW), NOW - timedelta(hours=24))
+        self.assertEqual(parse_time("2026-01-01T00:00:00Z", NOW), datetime(2026, 1, 1, tzinfo=timezone.utc))
+        self.assertIsNone(parse_time(None, NOW))
+
+    def test_summarize_runs_per_stage(self) -> None:
+        records = [
+            _record("script", "success", 100),
+            _record("script", "success", 200, cache=True),
+            _record("script", "failure", 900, retry=2, error="TimeoutError: model call\ntrace"),
+            _record("research", "success", 50),
+        ]
+        summary = summarize_runs(records)
+        script = summary["script"]
+        self.assertEqual(script["count"], 3)
+        self.assertEqual(script["failures"], 1)
+        self.assertEqual(script["p50_ms"], 100)
+        self.assertEqual(script["p99_ms"], 900)
+        self.assertEqual(script["cache_hit_p50_ms"], 200)
+        self.assertAlmostEqual(script["retry_rate"], 1 / 3)
+        self.assertAlmostEqual(script["cache_hit_rate"], 1 / 3)
+        self.assertEqual(script["tokens"], 30)
+        self.assertEqual(script["top_failures"], [{"reason": "TimeoutError", "count": 1}])
+        self.assertEqual(summary["research"]["failure_rate"], 0)
+
+    def test_percentiles_skip_cache_hits_and_untimed_records(self) -> None:
+        records = [
+            _record("research", "success", 4000),
+            _record("research", "success", 6000),
+            _record("research", "success", 0, cache=True),
+            _record("research", "success", 12, cache=True),
+            _record("research", "failure", 0, error="RuntimeError: quota"),
+            {"stage": "research", "status": "started", "metrics": {"cache_hit": False}},
+            {"stage": "research", "status": "success", "metrics": {"latency_ms": None}},
+        ]
+        research = summarize_runs(records)["research"]
+        self.assertEqual(research["count"], 7)
+        self.assertEqual(research["timed"], 2)
+        self.assertEqual((research["p50_ms"], research["p90_ms"]), (4000, 6000))
+        self.assertEqual(research["cache_hit_p50_ms"], 12)
+        self.assertAlmostEqual(research["cache_hit_rate"], 2 / 7)
+
+    def test_diff_summaries_handles_new_stages(self) -> None:
+        current = summarize_runs([_record("script", "success", 300), _record("qa", "success", 10)])
+        baseline = summarize_runs([_record("script", "success", 100)])
+        diff = diff_summaries(current, baseline)
+        self.assertEqual(diff["script"]["p50_ms"], 200)
+        self.assertIsNone(diff["qa"]["p50_ms"])
+
+    def test_spill_round_trip_with_window(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "spill.jsonl"
+            spill_run_log({"stage": "script", "status": "success", "metrics": {"latency_ms": 5}}, path=path)
+            with path.open("a", encoding="utf-8") as handle:
+                handle.write(json.dumps(_record("script", "success", 1, at=NOW - timedelta(days=30))) + "\n")
+                handle.write("{torn\n")
+            recent = load_spill(path, since=datetime.now(timezone.utc) - timedelta(days=1))
+            self.assertEqual(len(recent), 1)
+            self.assertEqual(len(load_spill(path)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
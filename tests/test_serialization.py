@@ -0,0 +1,37 @@
+import hashlib
+import json
+import unittest
+from unittest import mock
+
+from lib import serialization
+from lib.serialization import SerializedPayload, canonical_hash, dumps, loads
+
+
+class SerializationTests(unittest.TestCase):
+    def test_canonical_hash_matches_stdlib_sorted_encoding(self) -> None:
+        payload = {"b": [1, 2.5, None], "a": {"z": True, "y": "한글"}}
+        expected = hashlib.sha256(
+            json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        ).hexdigest()
+        self.assertEqual(canonical_hash(payload), expected)
+        self.assertEqual(canonical_hash({"a": payload["a"], "b": payload["b"]}), expected)
+
+    def test_stdlib_fallback_produces_same_documents(self) -> None:
+        payload = {"title": "테스트", "scenes": [{"id": 1}]}
+        fast_pretty, fast_hash = dumps(payload, pretty=True), canonical_hash(payload)
+        with mock.patch.object(serialization, "orjson", None):
+            self.assertEqual(dumps(payload, pretty=True), fast_pretty)
+            self.assertEqual(canonical_hash(payload), fast_hash)
+            self.assertEqual(loads(dumps(payload)), payload)
+
+    def test_serialized_payload_encodes_once(self) -> None:
+        serialized = SerializedPayload({"video_id": "abcdefghijk"})
+        with mock.patch.object(serialization, "dumps", wraps=serialization.dumps) as spy:
+            first = serialized.text
+            self.assertIs(serialized.text, first)
+        self.assertEqual(spy.call_count, 1)
+        self.assertEqual(serialized.sha256, canonical_hash({"video_id": "abcdefghijk"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from lib import storage_utils
+
+
+class SkipUnchangedWriteTests(unittest.TestCase):
+    def test_identical_payload_is_not_rewritten(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(storage_utils, "DATA_DIR", Path(tmp)), mock.patch.dict(
+            os.environ, {storage_utils.STORE_BACKEND_ENV: "files"}
+        ):
+            path = storage_utils.save_json("plan", "abcdefghijk", {"topic": "inflation"})
+            os.utime(path, ns=(1, 1))
+            storage_utils.save_json("plan", "abcdefghijk", {"topic": "inflation"})
+            self.assertEqual(path.stat().st_mtime_ns, 1)
+
+            storage_utils.save_json("plan", "abcdefghijk", {"topic": "wages"})
+            self.assertNotEqual(path.stat().st_mtime_ns, 1)
+            self.assertEqual(storage_utils.load_json(path), {"topic": "wages"})
+
+    def test_externally_edited_file_is_rewritten(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(storage_utils, "DATA_DIR", Path(tmp)), mock.patch.dict(
+            os.environ, {storage_utils.STORE_BACKEND_ENV: "files"}
+        ):
+            path = storage_utils.save_markdown("plan", "abcdefghijk", "# Plan")
+            path.write_text("# Edit", encoding="utf-8")
+            storage_utils.save_markdown("plan", "abcdefghijk", "# Plan")
+            self.assertEqual(path.read_text(encoding="utf-8"), "# Plan")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from lib.tracing import active_tracer, span, summarize, traced, tracing
+
+
+@traced("work", cat="test")
+def _work() -> int:
+    with span("inner", cat="test"):
+        time.sleep(0.01)
+    return 7
+
+
+class TracingTests(unittest.TestCase):
+    def test_spans_are_noops_without_active_tracer(self) -> None:
+        self.assertIsNone(active_tracer())
+        self.assertEqual(_work(), 7)
+
+    def test_nested_spans_export_chrome_trace_and_self_time(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "trace.json"
+            with tracing(path):
+                _work()
+                _work()
+            self.assertIsNone(active_tracer())
+
+            trace = json.loads(path.read_text(encoding="utf-8"))
+            events = trace["traceEvents"]
+            self.assertEqual({event["ph"] for event in events}, {"X"})
+            self.assertEqual(len(events), 4)
+
+            rows = {row["name"]: row for row in summarize(events)}
+            self.assertEqual(rows["work"]["count"], 2)
+            self.assertGreaterEqual(rows["inner"]["total_ms"], 20)
+            self.assertLess(rows["work"]["self_ms"], rows["work"]["total_ms"] - rows["inner"]["total_ms"] + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import json
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from lib.upload_queue import BandwidthLimiter, UploadQueue
+
+
+class _Status:
+    def __init__(self):
+        self.updates = []
+        self.lock = threading.Lock()
+
+    def update(self, video_id, fields):
+        with self.lock:
+            self.updates.append((video_id, dict(fields)))
+
+
+class UploadQueueTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.status = _Status()
+        self.started = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _payload(self, video_id, size=10, **extra):
+        video = self.root / f"{video_id}.mp4"
+        video.write_bytes(b"x" * size)
+        metadata = self.root / f"{video_id}_metadata.json"
+        metadata.write_text(json.dumps({"title": video_id}), encoding="utf-8")
+        return {"video_id": video_id, "video_path": str(video), "metadata_path": str(metadata), **extra}
+
+    def _uploader(self, *, metadata, video_path, youtube, on_progress, before_chunk, chunk_size, **_):
+        with self.lock:
+            self.started.append(metadata["title"])
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            if metadata["title"] == "broken":
+                raise RuntimeError("quota exceeded")
+            total = video_path.stat().st_size
+            for sent in range(chunk_size, total + chunk_size, chunk_size):
+                before_chunk()
+                time.sleep(0.01)
+                on_progress(min(sent, total), total)
+            return {"video_id": f"yt-{metadata['title']}", "status": "private", "notify_subscribers": False, "client": youtube}
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    def _queue(self, **kwargs):
+        return UploadQueue(
+            youtube=object(), uploader=self._uploader, status=self.status, chunk_size=4, progress_interval_s=0.0, **kwargs
+        )
+
+    def test_priority_order_and_status_rows(self) -> None:
+        queue = self._queue(max_workers=1)
+        queue.submit(self._payload("short_a"), priority=50)
+        queue.submit(self._payload("long_b", priority=10))
+        queue.submit(self._payload("broken"))
+        results = queue.run()
+        self.assertEqual(self.started, ["long_b", "short_a", "broken"])
+        self.assertEqual([r["upload_state"] for r in results], ["done", "done", "failed"])
+        self.assertEqual(results[0]["youtube_video_id"], "yt-long_b")
+
+        states = [fields.get("upload_state") for vid, fields in self.status.updates if vid == "long_b" and "upload_state" in fields]
+        self.assertEqual(states, ["queued", "uploading", "done"])
+        progress = [fields["bytes_uploaded"] for vid, fields in self.status.updates if vid == "long_b" and "bytes_uploaded" in fields]
+        self.assertEqual(progress, [0, 4, 8, 10, 10])
+        failed = [fields for vid, fields in self.status.updates if vid == "broken" and fields.get("upload_state") == "failed"]
+        self.assertIn("quota exceeded", failed[0]["last_error"])
+
+    def test_runs_jobs_concurrently(self) -> None:
+        queue = self._queue(max_workers=3)
+        for index in range(6):
+            queue.submit(self._payload(f"v{index}", size=16))
+        results = queue.run()
+        self.assertEqual(len(results), 6)
+        self.assertGreater(self.max_active, 1)
+        self.assertLessEqual(self.max_active, 3)
+
+    def test_bandwidth_limiter_spaces_reservations(self) -> None:
+        now = [0.0]
+        waits = []
+        limiter = BandwidthLimiter(100.0, sleep=waits.append, clock=lambda: now[0])
+        for _ in range(3):
+            limiter.acquire(50)
+        self.assertEqual(waits, [0.5, 1.0])
+        now[0] = 10.0
+        self.assertEqual(limiter.acquire(50), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
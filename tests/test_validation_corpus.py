@@ -0,0 +1,34 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from lib.validation_runner import discover_video_ids, validate_corpus
+
+
+class ValidationCorpusTests(unittest.TestCase):
+    def test_discover_video_ids_uses_canonical_stage_files(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = Path(tmp)
+            for name in [
+                "abcdefghijk_research.json",
+                "abcdefghijk_research_raw.json",
+                "lmnopqrstuv_metadata.json",
+                "analytics_2026-01-01.json",
+                "zzzzzzzzzzz_plan.md",
+            ]:
+                (data_dir / name).write_text("{}", encoding="utf-8")
+            self.assertEqual(discover_video_ids(data_dir), ["abcdefghijk", "lmnopqrstuv"])
+
+    def test_validate_corpus_reports_failures_without_raising(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = Path(tmp)
+            (data_dir / "abcdefghijk_research.json").write_text(json.dumps({}), encoding="utf-8")
+            results = list(validate_corpus(["abcdefghijk"], data_dir=data_dir, max_workers=1))
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]["status"], "failure")
+        self.assertIsNotNone(results[0]["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import contextlib
+import io
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from lib.video_extractor import ExtractionCache, VideoExtractor
+
+
+class _FakeYdl:
+    def __init__(self, owner, opts):
+        self.owner = owner
+        self.opts = opts
+
+    def extract_info(self, url, download=False):
+        with self.owner.lock:
+            self.owner.calls.append(url)
+            self.owner.active += 1
+            self.owner.max_active = max(self.owner.max_active, self.owner.active)
+        try:
+            time.sleep(0.02)
+            if url.endswith("broken_vid1"):
+                raise RuntimeError("Video unavailable")
+            return {
+                "id": url[-11:],
+                "title": f"title {url[-11:]}",
+                "formats": [{"url": "https://cdn.example/v.mp4"}] * 50,
+                "comments": [{"text": "nice", "author": "someone", "like_count": 3}],
+            }
+        finally:
+            with self.owner.lock:
+                self.owner.active -= 1
+
+    def sanitize_info(self, info):
+        return dict(info)
+
+
+class VideoExtractorTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.now = [1_000.0]
+        self.cache = ExtractionCache(Path(self.tmp.name), ttl_s=3600, clock=lambda: self.now[0])
+        self.calls = []
+        self.instances = []
+        self.lock = threading.Lock()
+        self.active = self.max_active = 0
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _extractor(self, **kwargs):
+        def factory(opts):
+            ydl = _FakeYdl(self, opts)
+            with self.lock:
+                self.instances.append(ydl)
+            return ydl
+
+        return VideoExtractor({"quiet": True}, cache=self.cache, ydl_factory=factory, **kwargs)
+
+    def test_cache_is_reused_across_instances_until_ttl(self) -> None:
+        info = self._extractor().extract("abcdefghijk")
+        self.assertEqual(info["title"], "title abcdefghijk")
+        second = self._extractor()
+        self.assertEqual(second.extract("abcdefghijk"), info)
+        self.assertEqual((second.extractions, second.cache_hits), (0, 1))
+        self.assertEqual(len(self.calls), 1)
+
+        self.now[0] += 3601
+        second.extract("abcdefghijk")
+        self.assertEqual(len(self.calls), 2)
+        second.extract("abcdefghijk", force=True)
+        self.assertEqual(len(self.calls), 3)
+
+    def test_options_are_part_of_the_key(self) -> None:
+        self._extractor().extract("abcdefghijk")
+        other = VideoExtractor({"quiet": True, "max_comments": 5}, cache=self.cache, ydl_factory=lambda opts: _FakeYdl(self, opts))
+        other.extract("abcdefghijk")
+        self.assertEqual(len(self.calls), 2)
+
+    def test_prefetch_is_bounded_parallel_and_reports_failures(self) -> None:
+        extractor = self._extractor(max_workers=3)
+        ids = [f"vid{index:08d}" for index in range(9)] + ["broken_vid1", "vid00000000"]
+        results = extractor.prefetch(ids)
+        self.assertEqual(len(results), 10)
+        self.assertIsInstance(results["broken_vid1"], RuntimeError)
+        self.assertEqual(results["vid00000003"]["title"], "title vid00000003")
+        self.assertGreater(self.max_active, 1)
+        self.assertLessEqual(self.max_active, 3)
+        self.assertLessEqual(len(self.instances), 3)
+        self.assertEqual(len(self.calls), 10)
+
+    def test_concurrent_requests_for_same_video_extract_once(self) -> None:
+        extractor = self._extractor()
+        barrier = threading.Barrier(4)
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append(extractor.extract("abcdefghijk"))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(results), 4)
+        self.assertLessEqual(len(self.calls), 2)
+
+    def test_only_research_fields_are_cached(self) -> None:
+        info = self._extractor().extract("abcdefghijk")
+        self.assertEqual(info, {"id": "abcdefghijk", "title": "title abcdefghijk", "comments": [{"text": "nice"}]})
+        self.assertEqual(self._extractor().extract("abcdefghijk"), info)
+
+    def test_urls_and_odd_ids_get_file_safe_keys(self) -> None:
+        extractor = self._extractor()
+        self.assertTrue(extractor.key("abcdefghijk").startswith("abcdefghijk_"))
+        for video_id in ("https://youtu.be/abcdefghijk?t=3", "../../etc/passwd", "short"):
+            key = extractor.key(video_id)
+            self.assertRegex(key, r"^[A-Za-z0-9_]+$")
+            self.assertNotEqual(key, extractor.key(video_id + "x"))
+        extractor.extract("https://youtu.be/abcdefghijk?t=3")
+        self.assertEqual([path.parent for path in Path(self.tmp.name).iterdir()], [Path(self.tmp.name)])
+
+    def test_cache_write_failure_still_returns_info(self) -> None:
+        def fail(key, info):
+            raise OSError("disk full")
+
+        self.cache.put = fail
+        extractor = self._extractor()
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            info = extractor.extract("abcdefghijk")
+        self.assertEqual(info["title"], "title abcdefghijk")
+        self.assertIn("disk full", stderr.getvalue())
+        self.assertEqual(extractor.extractions, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
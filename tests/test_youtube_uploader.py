@@ -0,0 +1,126 @@
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+from lib.youtube_uploader import CHUNK_ALIGN, UploadSessionStore, run_resumable_upload, upload_chunk_size
+
+
+class _HttpError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.resp = SimpleNamespace(status=status)
+
+
+class _Crash(Exception):
+    pass
+
+
+class _FakeServer:
+    def __init__(self, total, chunk):
+        self.total, self.chunk = total, chunk
+        self.sessions = {}
+        self.bytes_received = 0
+        self.failures = []
+
+    def make_request(self):
+        return _FakeRequest(self)
+
+
+class _FakeRequest:
+    """Mimics googleapiclient HttpRequest.next_chunk for a resumable upload."""
+
+    def __init__(self, server):
+        self.server = server
+        self.resumable_uri = None
+        self.resumable_progress = 0
+        self._in_error_state = False
+
+    def next_chunk(self):
+        server = self.server
+        if self.resumable_uri is None:
+            self.resumable_uri = f"session-{len(server.sessions)}"
+            server.sessions[self.resumable_uri] = 0
+        if self._in_error_state:
+            if self.resumable_uri not in server.sessions:
+                raise _HttpError(404)
+            self.resumable_progress = server.sessions[self.resumable_uri]
+            self._in_error_state = False
+        if server.failures:
+            raise server.failures.pop(0)
+        size = min(server.chunk, server.total - self.resumable_progress)
+        server.bytes_received += size
+        self.resumable_progress += size
+        server.sessions[self.resumable_uri] = self.resumable_progress
+        if self.resumable_progress >= server.total:
+            return None, {"id": "yt-123"}
+        return SimpleNamespace(resumable_progress=self.resumable_progress), None
+
+
+class ResumableUploadTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = UploadSessionStore(Path(self.tmp.name) / "sessions.json")
+        self.sleeps = []
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _upload(self, server, **kwargs):
+        return run_resumable_upload(
+            server.make_request, key="k", total_bytes=server.total, store=self.store, sleep=self.sleeps.append, **kwargs
+        )
+
+    def test_retries_failed_chunks_with_backoff(self) -> None:
+        server = _FakeServer(total=10, chunk=3)
+        server.failures = [ConnectionError("reset"), _HttpError(503), _HttpError(500)]
+        progress = []
+        outcome = self._upload(server, on_progress=lambda sent, total: progress.append(sent))
+        self.assertEqual(outcome["response"]["id"], "yt-123")
+        self.assertEqual(outcome["retries"], 3)
+        self.assertEqual(server.bytes_received, 10)
+        self.assertEqual(len(self.sleeps), 3)
+        self.assertLess(self.sleeps[0], self.sleeps[2])
+        self.assertEqual(progress, [3, 6, 9, 10])
+        self.assertIsNone(self.store.get("k"))
+
+    def test_non_retryable_error_and_retry_budget_raise(self) -> None:
+        server = _FakeServer(total=10, chunk=3)
+        server.failures = [_HttpError(403)]
+        with self.assertRaises(_HttpError):
+            self._upload(server)
+        server = _FakeServer(total=10, chunk=3)
+        server.failures = [_HttpError(503)] * 3
+        with self.assertRaises(_HttpError):
+            self._upload(server, max_retries=2)
+
+    def test_new_process_resumes_from_committed_offset(self) -> None:
+        server = _FakeServer(total=10, chunk=3)
+
+        def crash_after_two_chunks(sent, total):
+            if sent >= 6:
+                raise _Crash()
+
+        with self.assertRaises(_Crash):
+            self._upload(server, on_progress=crash_after_two_chunks)
+        self.assertEqual(self.store.get("k")["offset"], 6)
+
+        outcome = self._upload(server)
+        self.assertEqual(outcome["resumed_from_bytes"], 6)
+        self.assertEqual(outcome["response"]["id"], "yt-123")
+        self.assertEqual(server.bytes_received, 10)
+        self.assertEqual(len(server.sessions), 1)
+
+    def test_expired_session_restarts_upload(self) -> None:
+        server = _FakeServer(total=10, chunk=4)
+        self.store.put("k", {"resumable_uri": "gone", "offset": 8, "total_bytes": 10})
+        outcome = self._upload(server)
+        self.assertEqual(outcome["resumed_from_bytes"], 0)
+        self.assertEqual(server.bytes_received, 10)
+
+    def test_chunk_size_is_aligned(self) -> None:
+        self.assertEqual(upload_chunk_size() % CHUNK_ALIGN, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()